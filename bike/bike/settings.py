@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,18 +42,17 @@ INSTALLED_APPS = [
     'core',
     'django.contrib.humanize',
 ]
-STATIC_URL = '/static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # static files are answered before sessions / auth run (see STORAGES below)
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'bike.urls'
@@ -67,6 +67,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.site_chrome',
             ],
         },
     },
@@ -78,13 +79,91 @@ WSGI_APPLICATION = 'bike.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# WAL lets readers carry on while a write commits. The journal mode is stored in the
+# database file, so it is switched once per deployment with `manage.py enable_wal`,
+# not here. Once it is on, each connection also drops to synchronous=NORMAL (only
+# fsyncs at checkpoints, durable enough in WAL mode, but not in rollback-journal
+# mode), see core/signals.py. Run on every new connection: reads come through a
+# 256 MB memory map, and the busy timeout makes writers queue instead of failing
+# with "database is locked".
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA mmap_size=268435456;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'timeout': 20,
+    # take the write lock at BEGIN, so transactions don't deadlock upgrading from a read
+    'transaction_mode': 'IMMEDIATE',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        # keep connections open between requests; ping them before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # a file rather than shared-cache memory, so threaded tests wait on locks
+        # instead of failing with "database table is locked"
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Optional read replica (e.g. a LiteFS / Litestream copy of db.sqlite3). The
+# read-only views (home, buy_bike, bike_detail) query it for content models,
+# see core/routers.py.
+if os.environ.get('DATABASE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DATABASE_REPLICA_PATH'],
+        # the copy is written by the replication tool, never by us
+        'OPTIONS': {'init_command': 'PRAGMA query_only=ON;PRAGMA mmap_size=268435456;', 'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+
+# Cache
+# core/caching.py keeps a per-process LRU in front of this cache, so it should be
+# shared between workers in production (e.g. Redis / Memcached). LocMem is fine locally.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'driverp-default',
     }
 }
 
+# buy_bike / api listing engine: 'orm' (SQL per request) or 'columnar' (per-worker
+# NumPy index, see core/columnar.py - needs numpy and a shared cache as above)
+BIKE_LISTING_ENGINE = 'orm'
+
+# anonymous copies of /, /buy-bike/ and /bike/<pk>/ are kept this many seconds at
+# most in the cache above (core/pagecache.py); 0 turns the page cache off
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# sell-page price model written by `manage.py train_price_model` (core/price_model.py);
+# without the file the estimate uses the PriceRule heuristic
+PRICE_MODEL_PATH = BASE_DIR / 'price_model.json'
+
+
+# username or email login, see core/backends.py
+AUTHENTICATION_BACKENDS = ['core.backends.EmailOrUsernameBackend']
+
+# login attempts allowed per client IP / per username-or-email: (attempts, window seconds).
+# Checked before hashing (core/throttle.py); counted in the cache above. None disables.
+LOGIN_THROTTLE = {
+    'ip': (30, 300),
+    'identifier': (10, 300),
+}
+# Reverse proxies / load balancers in front of the app that append to X-Forwarded-For.
+# With the default 0 the 'ip' limit counts REMOTE_ADDR, which behind a proxy is the
+# proxy's address for every visitor: set this to the number of proxies when deploying
+# behind them (see core/throttle.py).
+LOGIN_THROTTLE_PROXIES = int(os.environ.get('LOGIN_THROTTLE_PROXIES', 0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,6 +200,17 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# `collectstatic` writes content-hashed copies (base.1a2b3c4d5e6f.css), a manifest
+# that {% static %} resolves names through, and .br / .gz files next to them (the
+# .br files need the `brotli` package from requirements.txt).
+# WhiteNoise serves the hashed names with Cache-Control: max-age=10 years, immutable.
+# Without a manifest only DEBUG and test runs fall back to plain names (core/storage.py).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.ManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -136,7 +226,8 @@ EMAIL_HOST_USER = 'mathivarmaganesan@gmail.com'
 EMAIL_HOST_PASSWORD = 'ryib qgbq lktw iwhf'
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
-import os
+# contact form submissions go to the outbox (core/outbox.py) addressed to these
+CONTACT_EMAIL_RECIPIENTS = ["youremail@example.com"]  # change to your receiving address
 
 # Media files (user-uploaded)
 MEDIA_URL = '/media/'
@@ -45,21 +45,28 @@ class ApproachImageAdmin(admin.ModelAdmin):
 # buybike 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Bike
+from .models import Bike, BikeImage
+
+class BikeImageInline(admin.TabularInline):
+    model = BikeImage
+    extra = 1
+    fields = ('image', 'order')
+
 
 @admin.register(Bike)
 class BikeAdmin(admin.ModelAdmin):
-    list_display = ('id','category','brand','model','variant','make_year','price','owner','is_booked','is_published')
+    inlines = [BikeImageInline]
+    list_display = ('id','category','brand','model','variant','engine_cc','make_year','price','owner','is_booked','is_published')
     list_filter = ('category','brand','make_year','is_booked','is_published','fuel_type')
     search_fields = ('brand','model','variant','location','owner__username')
-    readonly_fields = ('created_at','updated_at','booked_at')
+    readonly_fields = ('engine_cc','created_at','updated_at','booked_at')
 
     fieldsets = (
-        (None, {'fields': ('owner','category','brand','model','variant','price','is_published','is_booked','booked_by','booked_at')}),
+        (None, {'fields': ('owner','category','brand','model','variant','engine_cc','price','is_published','is_booked','booked_by','booked_at')}),
         ('Specs', {'fields': ('make_year','kilometers','fuel_type','previous_owner','transmission','odometer_type','wheel_type','bike_color')}),
         ('Brakes & Ignition', {'fields': ('front_brake_type','rear_brake_type','abs_available','ignition_type')}),
         ('RTO & Registration', {'fields': ('rto_state','rto_city','registration_year','registration_certificate')}),
-        ('Images', {'fields': ('main_image','thumb1','thumb2','thumb3','thumb4','thumb5','thumb6')}),
+        ('Images', {'fields': ('main_image',)}),
         ('Other', {'fields': ('refurbished','finance_available','insurance_available','warranty','location')}),
         ('Timestamps', {'fields': ('created_at','updated_at')}),
     )
@@ -146,3 +153,52 @@ admin.site.register(SatisfiedCustomerSection)
 admin.site.register(HappyCustomer)
 admin.site.register(TrustedRidersSection)
 admin.site.register(FAQ)
+
+
+# background image jobs
+from django.utils import timezone
+from .models import ImageJob
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('name', 'status', 'attempts', 'error', 'available_at', 'locked_at', 'created_at', 'updated_at')
+    actions = ['retry_jobs']
+
+    @admin.action(description="Retry selected jobs")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=ImageJob.STATUS_RUNNING).update(
+            status=ImageJob.STATUS_PENDING, attempts=0, error='', available_at=timezone.now())
+        self.message_user(request, f"{updated} job(s) queued again.")
+
+
+# email outbox
+from .models import OutboxEmail
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'to', 'reply_to')
+    readonly_fields = ('subject', 'body', 'from_email', 'to', 'reply_to', 'status', 'attempts', 'last_error',
+                       'available_at', 'locked_at', 'created_at', 'sent_at')
+    actions = ['retry_emails']
+
+    @admin.action(description="Send selected emails again")
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEmail.STATUS_SENDING).update(
+            status=OutboxEmail.STATUS_PENDING, attempts=0, last_error='', available_at=timezone.now())
+        self.message_user(request, f"{updated} email(s) queued again.")
+
+
+# sell page pricing
+from .models import PriceRule
+
+@admin.register(PriceRule)
+class PriceRuleAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'pattern', 'value', 'priority', 'is_active')
+    list_editable = ('value', 'priority', 'is_active')
+    list_filter = ('kind', 'is_active')
+    search_fields = ('pattern',)
@@ -0,0 +1,396 @@
+# core/assets.py
+"""
+Per-page CSS / JS bundles and the critical CSS inlined for the landing pages.
+
+    python manage.py build_assets          # before collectstatic
+
+Every page loads base.css / base.js plus its own stylesheet and script (PAGES).
+build_assets concatenates and minifies each page's files into one stylesheet and
+one script under core/static/core/bundles/. collectstatic then gives those content
+hashes like any other static file (see STORAGES in settings.py). For the pages in
+CRITICAL_PAGES it also writes <page>.critical.css: the rules that can match markup
+above the page's {# fold #} marker (plus the base.html header). The
+{% page_styles %} tag inlines it in <head> and loads the full bundle without
+blocking the first paint.
+
+With DEBUG on, or before build_assets has run, the tags link the source files one by
+one, so editing a stylesheet needs no rebuild while developing.
+
+The minifiers are deliberately conservative. CSS loses comments and whitespace.
+JS loses comments and indentation but keeps its line breaks, so automatic semicolon
+insertion behaves exactly as before. Strings, template literals and regex literals
+are copied untouched.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+
+BASE_CSS = 'core/css/base.css'
+BASE_JS = 'core/js/base.js'
+
+# page -> (stylesheets, scripts) loaded after base.css / base.js
+PAGES = {
+    'base': ((), ()),
+    'home': (('core/css/home.css',), ('core/js/home.js',)),
+    'about': (('core/css/about.css',), ('core/js/about.js',)),
+    'contact': (('core/css/contact.css',), ('core/js/contact.js',)),
+    'login': (('core/css/auth.css',), ('core/js/login.js',)),
+    'buy_bike': (('core/css/buybike.css',), ('core/js/buybike.js',)),
+    'bike_detail': (('core/css/bike_detail.css',), ('core/js/bike_detail.js',)),
+    'bike_payment': (('core/css/bike_payment.css',), ('core/js/bike_payment.js',)),
+    'sell_bike': (('core/css/sell_bike.css',), ('core/js/sell_bike.js',)),
+}
+
+# page -> template whose markup above {# fold #} decides the critical CSS
+CRITICAL_PAGES = {
+    'home': 'core/home.html',
+    'buy_bike': 'core/buy_bike.html',
+}
+FOLD_MARKER = '{# fold'
+
+BUNDLE_PREFIX = 'core/bundles'
+BUNDLE_DIR = Path(__file__).resolve().parent / 'static' / BUNDLE_PREFIX
+MANIFEST_NAME = 'bundles.json'
+
+
+def page_files(page, kind):
+    """Static names bundled for `page`, in load order; kind is 'css' or 'js'."""
+    styles, scripts = PAGES[page]
+    return [BASE_CSS, *styles] if kind == 'css' else [BASE_JS, *scripts]
+
+
+def _read_static(name):
+    path = finders.find(name)
+    if path is None:
+        raise FileNotFoundError(f"static file {name!r} not found")
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+# minifiers --------------------------------------------------------------------
+
+def _string_end(source, i):
+    """Index after the quoted string starting at source[i]."""
+    quote, i = source[i], i + 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+
+# at-rules whose block holds rules (selectors), not declarations
+_RULE_BLOCK_AT_RULES = re.compile(r'@(-\w+-)?(media|supports|document|layer|container|keyframes|scope)\b')
+
+
+def minify_css(source):
+    out, i, n, space = [], 0, len(source), False
+    blocks, statement = [], 0  # 'rules' / 'decls' per open brace; where the current statement starts in out
+    while i < n:
+        c = source[i]
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            space = True
+            continue
+        if c.isspace():
+            space, i = True, i + 1
+            continue
+        prev = out[-1][-1] if out else '{'
+        # the space in `.a :hover` is a descendant combinator; only `color : red` can lose it
+        colon = ':' if blocks and blocks[-1] == 'decls' else ''
+        if space and prev not in '{};,>(' + colon and c not in '{};,>)!' + colon:
+            out.append(' ')
+        space = False
+        if c in '"\'':
+            end = _string_end(source, i)
+            out.append(source[i:end])
+            i = end
+            continue
+        if c == '}' and prev == ';':
+            out.pop()
+        if c == '{':
+            prelude = ''.join(out[statement:]).strip()
+            blocks.append('rules' if _RULE_BLOCK_AT_RULES.match(prelude) else 'decls')
+        elif c == '}' and blocks:
+            blocks.pop()
+        out.append(c)
+        if c in '{};':
+            statement = len(out)
+        i += 1
+    return ''.join(out)
+
+
+# a `/` after one of these (or at the start) begins a regex literal, not a division
+_REGEX_AFTER_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_AFTER_WORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                      'case', 'do', 'else', 'yield', 'await'}
+
+
+def _is_word(c):
+    return c.isalnum() or c in '_$\\' or ord(c) > 127
+
+
+def _regex_end(source, i):
+    i, in_class = i + 1, False
+    while i < len(source) and (in_class or source[i] != '/'):
+        if source[i] == '\\':
+            i += 1
+        elif source[i] == '[':
+            in_class = True
+        elif source[i] == ']':
+            in_class = False
+        i += 1
+    i += 1
+    while i < len(source) and source[i].isalpha():  # flags
+        i += 1
+    return i
+
+
+def _template_end(source, i):
+    """Index after the template-literal text starting at source[i]: past the closing
+    backtick, or past the `${` that opens a substitution (then True)."""
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+        elif source[i] == '`':
+            return i + 1, False
+        elif source.startswith('${', i):
+            return i + 2, True
+        else:
+            i += 1
+    return i, False
+
+
+def minify_js(source):
+    out, n = [], len(source)
+    i, last, space, newline = 0, '', False, False
+    substitutions = []  # open `${` in template literals: brace depth inside each
+
+    def emit(token):
+        nonlocal space, newline
+        if out:
+            prev = out[-1][-1]
+            if newline:
+                out.append('\n')
+            elif space and ((_is_word(prev) and _is_word(token[0])) or (prev in '+-/' and token[0] in '+-/')):
+                out.append(' ')
+        space = newline = False
+        out.append(token)
+
+    while i < n:
+        c = source[i]
+        if c == '\n':
+            newline, i = True, i + 1
+        elif c.isspace():
+            space, i = True, i + 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            # a comment spanning lines still counts as a line break for ASI
+            newline = newline or '\n' in source[i:end]
+            space, i = True, end
+        elif c in '"\'':
+            end = _string_end(source, i)
+            emit(source[i:end])
+            i, last = end, '"'
+        elif c == '`' or (c == '}' and substitutions and substitutions[-1] == 0):
+            if c == '}':
+                substitutions.pop()
+            end, opened = _template_end(source, i + 1)
+            emit(source[i:end])
+            if opened:
+                substitutions.append(0)
+            i, last = end, ('{' if opened else '"')
+        elif c == '/' and (not last or last in _REGEX_AFTER_CHARS or last in _REGEX_AFTER_WORDS):
+            end = _regex_end(source, i)
+            emit(source[i:end])
+            i, last = end, '"'
+        elif _is_word(c):
+            end = i
+            while end < n and _is_word(source[end]):
+                end += 1
+            emit(source[i:end])
+            i, last = end, source[i:end]
+        else:
+            if substitutions and c in '{}':
+                substitutions[-1] += 1 if c == '{' else -1
+            emit(c)
+            i, last = i + 1, c
+    return ''.join(out).strip() + '\n'
+
+
+# critical CSS -----------------------------------------------------------------
+
+_TEMPLATE_SYNTAX_RE = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.S)
+_TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+_CLASS_RE = re.compile(r'\bclass\s*=\s*"([^"]*)"')
+_ID_RE = re.compile(r'\bid\s*=\s*"([^"]*)"')
+_PSEUDO_RE = re.compile(r'::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?|\[[^\]]*\]')
+_COMBINATOR_RE = re.compile(r'\s*[>+~]\s*|\s+')
+_COMPOUND_RE = re.compile(r'^([a-zA-Z][\w-]*|\*)?')
+
+
+def fold_markup(template_name):
+    """Template source (with base.html's header) above the {# fold #} marker."""
+    source = get_template(template_name).template.source
+    base = get_template('core/base.html').template.source
+    above = source.split(FOLD_MARKER, 1)[0]
+    return base.split('{% block content %}', 1)[0] + above
+
+
+def markup_names(markup):
+    """(tags, classes, ids) used in `markup`; template tags are dropped, their text kept."""
+    markup = _TEMPLATE_SYNTAX_RE.sub(' ', markup)
+    tags = {tag.lower() for tag in _TAG_RE.findall(markup)} | {'html', 'body'}
+    classes = {name for value in _CLASS_RE.findall(markup) for name in value.split()}
+    ids = {value.strip() for value in _ID_RE.findall(markup)}
+    return tags, classes, ids
+
+
+def _split_top_level(text, sep=','):
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(text):
+        depth += c in '(['
+        depth -= c in ')]'
+        if c == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _selector_matches(selector, names):
+    tags, classes, ids = names
+    for compound in _COMBINATOR_RE.split(_PSEUDO_RE.sub('', selector).strip()):
+        tag = _COMPOUND_RE.match(compound).group(1)
+        if tag and tag != '*' and tag.lower() not in tags:
+            return False
+        if not set(re.findall(r'\.([\w-]+)', compound)) <= classes:
+            return False
+        if not set(re.findall(r'#([\w-]+)', compound)) <= ids:
+            return False
+    return True
+
+
+def _blocks(css):
+    """Top-level (prelude, body) pairs of minified CSS; statements like @import get body None."""
+    i, n = 0, len(css)
+    while i < n:
+        brace, semi = css.find('{', i), css.find(';', i)
+        if semi != -1 and (brace == -1 or semi < brace):
+            yield css[i:semi].strip(), None
+            i = semi + 1
+            continue
+        if brace == -1:
+            return
+        depth, j = 1, brace + 1
+        while j < n and depth:
+            if css[j] in '"\'':
+                j = _string_end(css, j)
+                continue
+            depth += {'{': 1, '}': -1}.get(css[j], 0)
+            j += 1
+        yield css[i:brace].strip(), css[brace + 1:j - 1]
+        i = j
+
+
+def _critical_rules(css, names):
+    kept, keyframes = [], {}
+    for prelude, body in _blocks(css):
+        if body is None:
+            continue  # @import / @charset: the full stylesheet still loads them
+        if prelude.startswith('@keyframes') or prelude.startswith('@-webkit-keyframes'):
+            keyframes[prelude.split()[-1]] = f"{prelude}{{{body}}}"
+        elif prelude.startswith('@font-face'):
+            kept.append(f"{prelude}{{{body}}}")
+        elif prelude.startswith('@media') or prelude.startswith('@supports'):
+            inner = _critical_rules(body, names)
+            if inner:
+                kept.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith('@'):
+            continue
+        else:
+            selectors = [s for s in _split_top_level(prelude) if _selector_matches(s, names)]
+            if selectors:
+                kept.append(f"{','.join(selectors)}{{{body}}}")
+    css_out = ''.join(kept)
+    used = [rule for name, rule in keyframes.items() if re.search(rf'\b{re.escape(name)}\b', css_out)]
+    return css_out + ''.join(used)
+
+
+def critical_css(css, markup):
+    """The rules of (minified) `css` that can match an element in `markup`."""
+    return _critical_rules(css, markup_names(markup))
+
+
+# build ------------------------------------------------------------------------
+
+_IMPORT_RE = re.compile(r'@import\s*(?:url\([^)]*\)|"[^"]*"|\'[^\']*\')[^;]*;')
+
+
+def bundle_css(sources):
+    """One minified stylesheet; @import rules only count at the top, so they move there."""
+    imports, rules = [], []
+    for source in sources:
+        css = minify_css(source)
+        imports += [rule for rule in _IMPORT_RE.findall(css) if rule not in imports]
+        rules.append(_IMPORT_RE.sub('', css).strip())
+    return ''.join(imports) + '\n'.join(rules) + '\n'
+
+
+def bundle_js(sources):
+    return ';\n'.join(minify_js(source).strip() for source in sources) + '\n'
+
+
+def build_bundles(out_dir=None):
+    """
+    Write every page bundle (and critical CSS) to `out_dir` plus a bundles.json
+    manifest. Returns {page: {'css': (source bytes, bundle bytes), 'js': ...,
+    'critical': bytes or None}}.
+    """
+    out_dir = Path(out_dir or BUNDLE_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest, report = {}, {}
+    bundlers = {'css': bundle_css, 'js': bundle_js}
+    for page in PAGES:
+        manifest[page], report[page] = {}, {}
+        for kind, bundle_sources in bundlers.items():
+            sources = [_read_static(name) for name in page_files(page, kind)]
+            bundle = bundle_sources(sources)
+            (out_dir / f"{page}.{kind}").write_text(bundle, encoding='utf-8')
+            manifest[page][kind] = f"{BUNDLE_PREFIX}/{page}.{kind}"
+            report[page][kind] = (sum(len(s.encode()) for s in sources), len(bundle.encode()))
+            if kind == 'css' and page in CRITICAL_PAGES:
+                critical = critical_css(bundle, fold_markup(CRITICAL_PAGES[page]))
+                (out_dir / f"{page}.critical.css").write_text(critical, encoding='utf-8')
+                manifest[page]['critical'] = f"{page}.critical.css"
+                report[page]['critical'] = len(critical.encode())
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    return report
+
+
+@lru_cache(maxsize=2)
+def _load_built(path, mtime):
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    for entry in manifest.values():
+        if 'critical' in entry:
+            entry['critical'] = (path.parent / entry['critical']).read_text(encoding='utf-8')
+    return manifest
+
+
+def built_bundles():
+    """{page: {'css': name, 'js': name, 'critical': css text?}} from the last build, or {}."""
+    path = BUNDLE_DIR / MANIFEST_NAME
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    return _load_built(path, mtime)
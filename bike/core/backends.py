@@ -0,0 +1,46 @@
+# core/backends.py
+"""
+Authentication backend: log in with a username or an email address.
+
+    AUTHENTICATION_BACKENDS = ['core.backends.EmailOrUsernameBackend']
+
+The identifier is resolved in one query, username first, then case-insensitive email.
+The query uses the unique username index and the LOWER(email) index added by migration
+0018. The password is hashed once per attempt. Unknown identifiers also pay that one
+hash, so response time doesn't reveal which accounts exist.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+UserModel = get_user_model()
+
+
+def users_matching(identifier):
+    """Users whose username is `identifier` or whose email matches it case-insensitively, username first."""
+    username_field = UserModel.USERNAME_FIELD
+    by_username = Q(**{username_field: identifier})
+    return (
+        UserModel._default_manager
+        .alias(email_lower=Lower('email'))
+        .filter(by_username | Q(email_lower=identifier.lower()))
+        # when several accounts share an email, the oldest wins (as before)
+        .order_by(Case(When(by_username, then=Value(0)), default=Value(1), output_field=IntegerField()), 'pk')
+    )
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = users_matching(username).first()
+        if user is None:
+            # same cost as a wrong password (see ModelBackend.authenticate)
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,77 @@
+# core/caching.py
+"""
+Small caching helpers shared by the views.
+
+Admin-edited content (navbar, home page sections, ...) changes rarely, so we
+keep it in two tiers:
+
+* a per-process LRU (no network / no DB on a warm worker)
+* the shared Django cache (so a cold worker does not hit the DB either)
+
+Both tiers are keyed by a *generation* number stored in the shared cache.
+Saving or deleting a related model bumps the generation once its transaction
+commits (see core/signals.py), which makes every worker miss and rebuild lazily
+on its next request.
+"""
+from functools import lru_cache
+
+from django.core.cache import cache
+
+from .routers import primary_reads
+
+GENERATION_KEY = "core:gen:{}"
+
+
+def get_generation(namespace):
+    """Return the current generation number for `namespace` (starts at 1)."""
+    key = GENERATION_KEY.format(namespace)
+    gen = cache.get(key)
+    if gen is None:
+        # add() is a no-op if another worker raced us to it
+        cache.add(key, 1, timeout=None)
+        gen = cache.get(key, 1)
+    return gen
+
+
+def bump_generation(namespace):
+    """Invalidate everything cached under `namespace`."""
+    key = GENERATION_KEY.format(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # key missing (evicted / never set): start a fresh generation
+        cache.set(key, 2, timeout=None)
+        return 2
+
+
+class GenerationCache:
+    """
+    Two-tier cache for a single value built by `loader()`.
+
+    Usage:
+        chrome_cache = GenerationCache("chrome", load_chrome)
+        value = chrome_cache.get()
+        chrome_cache.invalidate()
+    """
+
+    def __init__(self, namespace, loader, maxsize=4, timeout=None):
+        self.namespace = namespace
+        self.loader = loader
+        self.timeout = timeout
+        self._local = lru_cache(maxsize=maxsize)(self._load)
+
+    def _load(self, generation):
+        key = f"core:{self.namespace}:{generation}"
+        value = cache.get(key)
+        if value is None:
+            with primary_reads():  # a lagging replica would cache stale data for this generation
+                value = self.loader()
+            cache.set(key, value, timeout=self.timeout)
+        return value
+
+    def get(self):
+        return self._local(get_generation(self.namespace))
+
+    def invalidate(self):
+        bump_generation(self.namespace)
+        self._local.cache_clear()
@@ -0,0 +1,247 @@
+# core/columnar.py
+"""
+Optional in-process columnar index for the buy_bike hot path.
+
+Enable with BIKE_LISTING_ENGINE = 'columnar' in settings. Each worker keeps the
+published bikes as NumPy column arrays plus one pre-sorted permutation per sort
+option, so a listing request becomes:
+
+    boolean mask from the filters -> walk the sort permutation -> pk page
+    -> Bike.objects.in_bulk(pks)   (the only query)
+
+Cursors are the same tokens core.pagination produces, so pages from either engine
+can be mixed. Filters the index can't answer (location, q / relevance) make page()
+return None and the caller falls back to the ORM.
+
+Freshness: every Bike save/delete bumps the 'bikes' generation (core/signals.py).
+When it moves, the index pulls the rows with updated_at >= its watermark and
+upserts them; a delete also bumps 'bikes-deleted', which forces a full rebuild.
+Writes that skip save() (queryset.update(), raw SQL) aren't seen until the next
+rebuild, same as the facet cache.
+"""
+import datetime
+import decimal
+import threading
+
+import numpy as np
+from django.db.models import Max
+
+from .caching import get_generation
+from .listing import BIKE_SORTS, CC_BUCKETS
+from .models import Bike
+from .pagination import NEXT, PREVIOUS, KeysetPage, decode_cursor, encode_cursor
+from .routers import primary_reads
+
+FIELDS = ('pk', 'category', 'brand', 'model', 'fuel_type', 'previous_owner', 'price',
+          'make_year', 'kilometers', 'engine_cc', 'created_at', 'is_published')
+
+# ordering key -> column (everything in BIKE_SORTS except the search rank)
+SORT_COLUMNS = {'pk': 'pk', 'created_at': 'created_at', 'price': 'price', 'brand': 'brand', 'model': 'model'}
+# filter -> (column, codes) for the multi-select facets
+CHOICE_FILTERS = {'category': 'category', 'brand': 'brand', 'fuel': 'fuel_type', 'owner': 'previous_owner'}
+UNSUPPORTED_FILTERS = ('location', 'q')
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _micros(value):
+    return (value - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def _columns(rows):
+    """values_list() rows (FIELDS order) -> dict of arrays, published rows only."""
+    rows = [row for row in rows if row[-1]]
+    data = dict(zip(FIELDS, zip(*rows))) if rows else dict.fromkeys(FIELDS, ())
+    return {
+        'pk': np.array(data['pk'], dtype=np.int64),
+        'category': np.array(data['category'], dtype=str),
+        'brand': np.array(data['brand'], dtype=str),
+        'model': np.array(data['model'], dtype=str),
+        'fuel_type': np.array(data['fuel_type'], dtype=str),
+        'previous_owner': np.array(data['previous_owner'], dtype=str),
+        'price': np.array(data['price'], dtype=np.float64),
+        'make_year': np.array(data['make_year'], dtype=np.int64),
+        'kilometers': np.array(data['kilometers'], dtype=np.int64),
+        # NULL engine size (EVs, unparsed variants) is NaN and never matches a cc bucket
+        'engine_cc': np.array([np.nan if cc is None else cc for cc in data['engine_cc']], dtype=np.float64),
+        'created_at': np.array([_micros(value) for value in data['created_at']], dtype=np.int64),
+    }
+
+
+def _concat(old, new):
+    # str arrays of different widths concatenate to the wider dtype
+    return {name: np.concatenate([old[name], new[name]]) for name in old}
+
+
+class Snapshot:
+    """One immutable version of the index; refreshes build a new one and swap it in."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.size = len(columns['pk'])
+        # categorical columns as small int codes, so isin() compares ints not strings
+        self.codes = {}
+        for name in set(CHOICE_FILTERS.values()):
+            values, codes = np.unique(columns[name], return_inverse=True)
+            self.codes[name] = ({value: i for i, value in enumerate(values.tolist())}, codes.reshape(-1))
+        self.orders = {
+            sort: self._order(ordering) for sort, ordering in BIKE_SORTS.items()
+            if all(key.lstrip('-') in SORT_COLUMNS for key in ordering)
+        }
+
+    def column(self, key):
+        return self.columns[SORT_COLUMNS[key]]
+
+    def _order(self, ordering):
+        keys = []
+        for key in ordering:
+            column = self.column(key.lstrip('-'))
+            # descending keys are all numeric (created_at, price, pk)
+            keys.append(-column if key.startswith('-') else column)
+        # lexsort takes the primary key last
+        return np.lexsort(keys[::-1]) if self.size else np.zeros(0, dtype=np.intp)
+
+    def choice_mask(self, name, selected):
+        lookup, codes = self.codes[name]
+        return np.isin(codes, [lookup[value] for value in selected if value in lookup])
+
+
+class ColumnarBikeIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._generation = None
+        self._deleted_generation = None
+        self._watermark = None
+
+    # refresh ------------------------------------------------------------------
+
+    def _fetch(self, since=None):
+        # take the watermark first: anything saved while we read is fetched again next time
+        qs = Bike.objects.order_by()
+        self._watermark = qs.aggregate(latest=Max('updated_at'))['latest'] or since
+        if since is None:
+            qs = qs.filter(is_published=True)
+        else:
+            # unpublished rows are needed here so they can be dropped from the snapshot
+            qs = qs.filter(updated_at__gte=since)
+        return list(qs.values_list(*FIELDS).iterator(chunk_size=5000))
+
+    def _rebuild(self):
+        return Snapshot(_columns(self._fetch()))
+
+    def _apply_changes(self, snapshot):
+        changed = self._fetch(since=self._watermark)
+        if not changed:
+            return snapshot
+        keep = ~np.isin(snapshot.columns['pk'], [row[0] for row in changed])
+        kept = {name: column[keep] for name, column in snapshot.columns.items()}
+        return Snapshot(_concat(kept, _columns(changed)))
+
+    def snapshot(self):
+        if self._snapshot is not None and get_generation('bikes') == self._generation:
+            return self._snapshot
+        with self._lock, primary_reads():
+            # read both generations before the rows so a concurrent save is picked up next time
+            generation, deleted = get_generation('bikes'), get_generation('bikes-deleted')
+            if self._snapshot is None or self._watermark is None or deleted != self._deleted_generation:
+                self._snapshot = self._rebuild()
+            elif generation != self._generation:
+                self._snapshot = self._apply_changes(self._snapshot)
+            self._generation, self._deleted_generation = generation, deleted
+            return self._snapshot
+
+    def reset(self):
+        with self._lock:
+            self._snapshot = self._generation = self._deleted_generation = self._watermark = None
+
+    # query --------------------------------------------------------------------
+
+    def supports(self, filters):
+        return (not any(filters[key] for key in UNSUPPORTED_FILTERS)
+                and all(key.lstrip('-') in SORT_COLUMNS for key in BIKE_SORTS[filters['sort']]))
+
+    def filter_mask(self, snap, filters):
+        """Vectorized filter_bikes()."""
+        cols = snap.columns
+        mask = np.ones(snap.size, dtype=bool)
+        for key, name in CHOICE_FILTERS.items():
+            if filters[key]:
+                mask &= snap.choice_mask(name, filters[key])
+        if filters['min_price'] is not None:
+            mask &= cols['price'] >= filters['min_price']
+        if filters['max_price'] is not None:
+            mask &= cols['price'] <= filters['max_price']
+        if filters['min_year'] is not None:
+            mask &= cols['make_year'] >= filters['min_year']
+        if filters['max_year'] is not None:
+            mask &= cols['make_year'] <= filters['max_year']
+        if filters['max_km'] is not None:
+            mask &= cols['kilometers'] <= filters['max_km']
+        if filters['cc'] in CC_BUCKETS:
+            with np.errstate(invalid='ignore'):
+                mask &= cols['engine_cc'] < CC_BUCKETS[filters['cc']]
+        return mask
+
+    def keyset_mask(self, snap, ordering, values, direction):
+        """Vectorized pagination.keyset_filter()."""
+        after = np.zeros(snap.size, dtype=bool)
+        equal = np.ones(snap.size, dtype=bool)
+        for key, value in zip(ordering, values):
+            column = snap.column(key.lstrip('-'))
+            if isinstance(value, datetime.datetime):
+                value = _micros(value)
+            elif isinstance(value, decimal.Decimal):
+                value = float(value)
+            forward = not key.startswith('-') if direction == NEXT else key.startswith('-')
+            after |= equal & ((column > value) if forward else (column < value))
+            equal &= column == value
+        return after
+
+    def page(self, filters, cursor=None, per_page=24):
+        """(KeysetPage, total) for the filters, or None if they need the ORM."""
+        if not self.supports(filters):
+            return None
+        snap = self.snapshot()
+        ordering = list(BIKE_SORTS[filters['sort']])
+        mask = self.filter_mask(snap, filters)
+        total = int(np.count_nonzero(mask))
+
+        order = snap.orders[filters['sort']]
+        decoded = decode_cursor(Bike, ordering, cursor)
+        direction = NEXT
+        if decoded is not None:
+            direction, values = decoded
+            mask &= self.keyset_mask(snap, ordering, values, direction)
+            if direction == PREVIOUS:
+                order = order[::-1]
+
+        positions = order[mask[order]][:per_page + 1]
+        pks = snap.columns['pk'][positions[:per_page]].tolist()
+        if direction == PREVIOUS:
+            pks.reverse()
+        bikes = Bike.objects.in_bulk(pks)
+        rows = [bikes[pk] for pk in pks if pk in bikes]
+
+        more = len(positions) > per_page
+        if decoded is None:
+            has_next, has_previous = more, False
+        elif direction == NEXT:
+            has_next, has_previous = more, True
+        else:
+            has_next, has_previous = True, more
+
+        page = KeysetPage(rows, has_next=has_next and bool(rows), has_previous=has_previous and bool(rows))
+        if page.has_next:
+            page.next_cursor = encode_cursor(ordering, NEXT, _row_values(rows[-1], ordering))
+        if page.has_previous:
+            page.previous_cursor = encode_cursor(ordering, PREVIOUS, _row_values(rows[0], ordering))
+        return page, total
+
+
+def _row_values(obj, ordering):
+    return [getattr(obj, key.lstrip('-')) for key in ordering]
+
+
+# one index per worker process
+bike_index = ColumnarBikeIndex()
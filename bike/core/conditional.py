@@ -0,0 +1,80 @@
+# core/conditional.py
+"""
+Validators for conditional GETs (ETag / Last-Modified) on the bike pages.
+
+    @read_from_replica
+    @condition(etag_func=bike_listing_etag)
+    def buy_bike(request): ...
+
+Django's condition() decorator calls these before the view. When the browser's
+If-None-Match / If-Modified-Since still matches it answers 304, so the view never
+runs its listing queries or touches the template engine.
+
+* detail page: the bike's updated_at (one primary-key lookup). Booking goes through
+  Bike._set_booking and gallery photos touch the parent bike (core/signals.py), so
+  both advance it.
+* listings: MAX(updated_at) over all bikes, answered from the bike_updated_idx index
+  without a table scan. Deletes don't move the max, so the 'bikes-deleted' generation
+  is mixed in. Un-publishing is a save, so it does move it. The ETag also carries a
+  hash of the normalized query string.
+
+Both pages vary on the logged-in user (navbar, Buy Now vs Login to Buy) and on the
+admin-edited navbar, so every ETag includes the user id and the 'chrome' generation.
+Last-Modified is only sent to anonymous visitors: a client that revalidates with
+If-Modified-Since alone would otherwise be told an anonymous copy is still fresh
+after logging in.
+
+The validator query runs under the same replica routing as the view (put
+@read_from_replica outside @condition). The rendered page is then never older than
+the validator stored with it.
+"""
+import hashlib
+
+from django.db.models import Max
+
+from .caching import get_generation
+from .models import Bike
+
+
+def normalized_query_string(params):
+    """`params` (a QueryDict) with keys and repeated values sorted, blanks dropped."""
+    pairs = sorted((key, value) for key, values in params.lists() for value in values if value != '')
+    return '&'.join(f"{key}={value}" for key, value in pairs)
+
+
+def _viewer(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else 0
+
+
+def _stamp(value):
+    return value.strftime('%Y%m%d%H%M%S%f') if value else '0'
+
+
+def bike_updated_at(request, pk):
+    """updated_at of bike `pk` (None if it doesn't exist), queried once per request."""
+    # condition() calls etag_func and last_modified_func separately
+    seen = request.__dict__.setdefault('_bike_updated_at', {})
+    if pk not in seen:
+        seen[pk] = Bike.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return seen[pk]
+
+
+def bike_detail_etag(request, pk):
+    updated_at = bike_updated_at(request, pk)
+    if updated_at is None:
+        return None  # the view answers 404
+    return f"bike-{pk}-{_stamp(updated_at)}-u{_viewer(request)}-c{get_generation('chrome')}"
+
+
+def bike_detail_last_modified(request, pk):
+    if _viewer(request):
+        return None
+    return bike_updated_at(request, pk)
+
+
+def bike_listing_etag(request):
+    last = Bike.objects.aggregate(last=Max('updated_at'))['last']
+    query = hashlib.sha1(normalized_query_string(request.GET).encode()).hexdigest()[:16]
+    return (f"bikes-{_stamp(last)}-d{get_generation('bikes-deleted')}-{query}"
+            f"-u{_viewer(request)}-c{get_generation('chrome')}")
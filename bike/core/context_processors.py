@@ -0,0 +1,20 @@
+# core/context_processors.py
+from .caching import GenerationCache
+from .models import SiteBrand, NavItem
+
+
+def _load_chrome():
+    # materialize the queryset so it can be cached / pickled
+    return SiteBrand.objects.first(), list(NavItem.objects.all())
+
+
+chrome_cache = GenerationCache("chrome", _load_chrome)
+
+
+def site_chrome(request):
+    """
+    Navbar brand + menu items for base.html.
+    Served from cache; invalidated by SiteBrand / NavItem signals (core/signals.py).
+    """
+    brand, navitems = chrome_cache.get()
+    return {'brand': brand, 'navitems': navitems}
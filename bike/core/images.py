@@ -0,0 +1,198 @@
+# core/images.py
+"""
+Resized WebP + JPEG derivatives of uploaded bike photos.
+
+For an original at bikes/3/Honda_Shine/side.png the derivatives live next to it:
+
+    bikes/3/Honda_Shine/derived/side.png-320w.webp   side.png-320w.jpg
+    bikes/3/Honda_Shine/derived/side.png-640w.webp   ...
+
+Widths larger than the original are skipped (a small original gets one derivative at
+its own width). Which widths exist is cached per file name, so templates can build
+srcset attributes without touching storage on every request. Templates use the
+{% responsive_image %} tag in core/templatetags/bike_images.py.
+
+Saving a Bike only queues an ImageJob per new original (enqueue_derivatives); the
+process_image_jobs command does the Pillow work in a process pool, so admin saves
+never wait for resizing. Until a job finishes templates show the original.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+
+# extension -> (Pillow format, save options)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+WIDTHS_CACHE_TIMEOUT = 60 * 60 * 24
+RETRY_BACKOFF = 30  # seconds before the first retry of a failed job; doubles each time
+
+# "no derivatives yet" is re-checked soon: a worker may be about to write them
+PENDING_WIDTHS_CACHE_TIMEOUT = 60
+
+# `sizes` for the buy_bike card grid: 3 / 2 / 1 columns, see buybike.css
+CARD_IMAGE_SIZES = "(max-width: 640px) 100vw, (max-width: 1000px) 50vw, 33vw"
+
+
+def derivative_name(name, width, ext):
+    folder, filename = posixpath.split(name)
+    return posixpath.join(folder, 'derived', f"{filename}-{width}w.{ext}")
+
+
+def _widths_cache_key(name):
+    return f"core:img:{hashlib.sha1(name.encode()).hexdigest()}"
+
+
+def _target_widths(original_width):
+    widths = [w for w in DERIVATIVE_WIDTHS if w < original_width]
+    return widths or [original_width]
+
+
+def _flatten(image):
+    """RGB copy of `image` with transparency composited on white (JPEG has no alpha)."""
+    image = ImageOps.exif_transpose(image)  # also drops the EXIF orientation tag
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def make_derivatives(name, storage=default_storage):
+    """Write every derivative of the stored file `name`; return the widths written."""
+    with storage.open(name, 'rb') as fh:
+        with Image.open(fh) as original:
+            image = _flatten(original)
+
+    widths = _target_widths(image.width)
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for ext, (fmt, options) in DERIVATIVE_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            target = derivative_name(name, width, ext)
+            # overwrite in place; storage.save() would otherwise pick a new name
+            storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+    cache.set(_widths_cache_key(name), widths, WIDTHS_CACHE_TIMEOUT)
+    return widths
+
+
+def derivative_widths(name, storage=default_storage):
+    """Widths available for `name` ([] until its derivatives have been generated)."""
+    key = _widths_cache_key(name)
+    widths = cache.get(key)
+    if widths is None:
+        folder = posixpath.join(posixpath.dirname(name), 'derived')
+        prefix = posixpath.basename(name) + '-'
+        files = storage.listdir(folder)[1] if storage.exists(folder) else []
+        widths = sorted(
+            int(f[len(prefix):-len('w.jpg')]) for f in files
+            if f.startswith(prefix) and f.endswith('w.jpg') and f[len(prefix):-len('w.jpg')].isdigit()
+        )
+        cache.set(key, widths, WIDTHS_CACHE_TIMEOUT if widths else PENDING_WIDTHS_CACHE_TIMEOUT)
+    return widths
+
+
+def ensure_derivatives(field_file):
+    """Generate derivatives for an image field's file unless they already exist."""
+    if not field_file or derivative_widths(field_file.name, field_file.storage):
+        return
+    try:
+        make_derivatives(field_file.name, field_file.storage)
+    except (OSError, Image.DecompressionBombError):
+        # unreadable/unsupported upload: templates fall back to the original
+        logger.exception("Could not create derivatives for %s", field_file.name)
+
+
+def responsive_sources(field_file):
+    """
+    {'src', 'srcset': {'webp', 'jpg'}} for an image field, for templates and the
+    listing API. srcset is empty (and src is the original) if there are no derivatives.
+    """
+    if not field_file:
+        return None
+    storage, name = field_file.storage, field_file.name
+    widths = derivative_widths(name, storage)
+    if not widths:
+        return {'src': field_file.url, 'srcset': {}}
+    srcset = {
+        ext: ", ".join(f"{storage.url(derivative_name(name, w, ext))} {w}w" for w in widths)
+        for ext in DERIVATIVE_FORMATS
+    }
+    return {'src': storage.url(derivative_name(name, widths[-1], 'jpg')), 'srcset': srcset}
+
+
+# job queue ------------------------------------------------------------------
+
+def enqueue_derivatives(field_file):
+    """Queue derivatives for an image field's file unless they exist (or are queued)."""
+    if not field_file or derivative_widths(field_file.name, field_file.storage):
+        return None
+    job, created = ImageJob.objects.get_or_create(name=field_file.name)
+    if not created and job.status in (ImageJob.STATUS_DONE, ImageJob.STATUS_FAILED):
+        # derivatives were deleted, or a re-upload reused the name: run it again
+        now = timezone.now()
+        ImageJob.objects.filter(pk=job.pk, status=job.status).update(
+            status=ImageJob.STATUS_PENDING, attempts=0, error='', available_at=now, updated_at=now)
+    return job
+
+
+def claim_image_jobs(limit):
+    """
+    Take up to `limit` pending jobs. Each claim is a conditional UPDATE, so several
+    workers can poll the same table without processing a job twice.
+    """
+    claimed = []
+    pending = ImageJob.objects.filter(status=ImageJob.STATUS_PENDING)
+    ready = pending.filter(available_at__lte=timezone.now()).order_by('available_at', 'pk')
+    for pk in ready.values_list('pk', flat=True)[:limit]:
+        now = timezone.now()
+        if pending.filter(pk=pk).update(status=ImageJob.STATUS_RUNNING, attempts=F('attempts') + 1,
+                                        locked_at=now, updated_at=now):
+            claimed.append(pk)
+    return list(ImageJob.objects.filter(pk__in=claimed))
+
+
+def requeue_stale_image_jobs(older_than):
+    """Put back jobs whose worker died mid-run (running for longer than `older_than` seconds)."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return ImageJob.objects.filter(status=ImageJob.STATUS_RUNNING, locked_at__lt=cutoff).update(
+        status=ImageJob.STATUS_PENDING, locked_at=None, updated_at=timezone.now())
+
+
+def finish_image_job(job, widths=None, error=None):
+    """Mark a claimed job done, or schedule a retry (30s, 60s, ...) until MAX_ATTEMPTS."""
+    now = timezone.now()
+    available_at = job.available_at
+    if error is None:
+        status = ImageJob.STATUS_DONE
+        cache.set(_widths_cache_key(job.name), widths, WIDTHS_CACHE_TIMEOUT)
+    elif job.attempts < ImageJob.MAX_ATTEMPTS:
+        status = ImageJob.STATUS_PENDING
+        available_at = now + timedelta(seconds=RETRY_BACKOFF * 2 ** (job.attempts - 1))
+    else:
+        status = ImageJob.STATUS_FAILED
+    ImageJob.objects.filter(pk=job.pk).update(status=status, error=error or '', available_at=available_at,
+                                              locked_at=None, updated_at=now)
@@ -0,0 +1,230 @@
+# core/listing.py
+"""
+Bike listing filters shared by the buy_bike page and the /api/bikes/ endpoint.
+
+parse_bike_filters() turns GET params into a plain dict (bad numbers are dropped,
+as the page always did) and filter_bikes() applies that dict to the published bikes.
+bike_facets() returns the sidebar counts for a filter dict, and bike_listing_page()
+the current page + total from whichever engine is configured.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import get_generation
+from .models import Bike
+from .pagination import paginate_keyset
+from .routers import primary_reads
+from .search import search_bikes
+
+BIKES_PER_PAGE = 24
+
+# sort option -> ordering used for keyset pagination (pk is the tie-breaker)
+BIKE_SORTS = {
+    'newest': ('-created_at', '-pk'),
+    'price_asc': ('price', 'pk'),
+    'price_desc': ('-price', '-pk'),
+    'alpha': ('brand', 'model', 'pk'),
+    'relevance': ('search_rank', 'pk'),  # only when `q` is given (see core/search.py)
+}
+
+# cc radio value -> exclusive upper bound on Bike.engine_cc
+CC_BUCKETS = {
+    'below100': 100,
+    'below200': 200,
+    'below300': 300,
+    'below400': 400,
+}
+
+
+def _number(value, cast):
+    if not value:
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_bike_filters(params):
+    q = (params.get('q') or '').strip()
+    # searches default to best match; relevance makes no sense without a query
+    sort = params.get('sort') or ('relevance' if q else 'newest')
+    if sort not in BIKE_SORTS or (sort == 'relevance' and not q):
+        sort = 'newest'
+    return {
+        'category': params.getlist('category'),
+        'brand': params.getlist('brand'),
+        'fuel': params.getlist('fuel'),
+        'owner': params.getlist('owner'),
+        'cc': params.get('cc'),
+        'min_price': _number(params.get('min_price'), float),
+        'max_price': _number(params.get('max_price'), float),
+        'min_year': _number(params.get('min_year'), int),
+        'max_year': _number(params.get('max_year'), int),
+        'max_km': _number(params.get('max_km'), int),
+        'location': params.get('location'),
+        'q': q,
+        'sort': sort,
+    }
+
+
+def filter_bikes(filters, queryset=None):
+    qs = Bike.objects.filter(is_published=True) if queryset is None else queryset
+
+    if filters['category']:
+        qs = qs.filter(category__in=filters['category'])
+    if filters['brand']:
+        qs = qs.filter(brand__in=filters['brand'])
+
+    if filters['min_price'] is not None:
+        qs = qs.filter(price__gte=filters['min_price'])
+    if filters['max_price'] is not None:
+        qs = qs.filter(price__lte=filters['max_price'])
+
+    if filters['min_year'] is not None:
+        qs = qs.filter(make_year__gte=filters['min_year'])
+    if filters['max_year'] is not None:
+        qs = qs.filter(make_year__lte=filters['max_year'])
+
+    if filters['max_km'] is not None:
+        qs = qs.filter(kilometers__lte=filters['max_km'])
+
+    # CC buckets are indexed range predicates on the parsed engine size
+    if filters['cc'] in CC_BUCKETS:
+        qs = qs.filter(engine_cc__lt=CC_BUCKETS[filters['cc']])
+
+    if filters['fuel']:
+        qs = qs.filter(fuel_type__in=filters['fuel'])
+    if filters['owner']:
+        qs = qs.filter(previous_owner__in=filters['owner'])
+
+    if filters['location']:
+        qs = qs.filter(location__icontains=filters['location'])
+
+    if filters['q']:
+        qs = search_bikes(qs, filters['q'], rank=filters['sort'] == 'relevance')
+
+    return qs
+
+
+def bike_listing_page(filters, cursor=None, per_page=BIKES_PER_PAGE):
+    """
+    (KeysetPage, total) for a filter dict. With BIKE_LISTING_ENGINE = 'columnar' the
+    in-memory index answers what it can (see core/columnar.py); everything else, and
+    the default 'orm' engine, is a COUNT plus one keyset query.
+    """
+    if getattr(settings, 'BIKE_LISTING_ENGINE', 'orm') == 'columnar':
+        from .columnar import bike_index  # the index is only built when this engine is on
+        result = bike_index.page(filters, cursor, per_page=per_page)
+        if result is not None:
+            return result
+    qs = filter_bikes(filters)
+    return paginate_keyset(qs, BIKE_SORTS[filters['sort']], cursor, per_page=per_page), qs.count()
+
+
+# facets ---------------------------------------------------------------------
+
+# price histogram bands: [low, high) in rupees, None = open ended
+PRICE_BANDS = [
+    (0, 25000), (25000, 50000), (50000, 75000), (75000, 100000),
+    (100000, 150000), (150000, 200000), (200000, 300000), (300000, None),
+]
+
+# facet -> the filter keys it ignores, so a facet still shows its other options
+FACET_OWN_FILTERS = {
+    'brand': ('brand',),
+    'category': ('category',),
+    'fuel_type': ('fuel',),
+    'previous_owner': ('owner',),
+    'cc': ('cc',),
+    'price': ('min_price', 'max_price'),
+    'year': ('min_year', 'max_year'),
+}
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+
+
+def facet_cache_key(filters):
+    """Normalized key: list order and the sort option don't change the counts."""
+    normalized = {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in filters.items() if key != 'sort' and value not in (None, '', [])
+    }
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"core:facets:{get_generation('bikes')}:{digest}"
+
+
+def _base_for(filters, facet):
+    without = dict(filters, sort='newest')  # no relevance annotation needed for counts
+    for key in FACET_OWN_FILTERS[facet]:
+        without[key] = [] if isinstance(filters[key], list) else None
+    return filter_bikes(without).order_by()
+
+
+def _grouped(filters, facet, field):
+    rows = _base_for(filters, facet).values(field).annotate(n=Count('pk')).order_by(field)
+    return {row[field]: row['n'] for row in rows}
+
+
+def _choice_counts(counts, field, selected):
+    choices = Bike._meta.get_field(field).choices
+    return [
+        {'value': value, 'label': label, 'count': counts.get(value, 0), 'selected': value in selected}
+        for value, label in choices
+    ]
+
+
+def _compute_facets(filters):
+    brands = _grouped(filters, 'brand', 'brand')
+    # keep selected brands visible even when the other filters leave them empty
+    brand_names = sorted(set(brands) | set(filters['brand']))
+
+    cc = _base_for(filters, 'cc').aggregate(**{
+        bucket: Count('pk', filter=Q(engine_cc__lt=limit)) for bucket, limit in CC_BUCKETS.items()
+    })
+
+    price_filters = {}
+    for low, high in PRICE_BANDS:
+        band = Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+        price_filters[f"{low}-{high or ''}"] = Count('pk', filter=band)
+    prices = _base_for(filters, 'price').aggregate(**price_filters)
+
+    years = _grouped(filters, 'year', 'make_year')
+
+    return {
+        'brand': [
+            {'value': name, 'label': name, 'count': brands.get(name, 0), 'selected': name in filters['brand']}
+            for name in brand_names
+        ],
+        'category': _choice_counts(_grouped(filters, 'category', 'category'), 'category', filters['category']),
+        'fuel_type': _choice_counts(_grouped(filters, 'fuel_type', 'fuel_type'), 'fuel_type', filters['fuel']),
+        'previous_owner': _choice_counts(_grouped(filters, 'previous_owner', 'previous_owner'), 'previous_owner', filters['owner']),
+        'cc': [
+            {'value': bucket, 'limit': limit, 'count': cc[bucket], 'selected': filters['cc'] == bucket}
+            for bucket, limit in CC_BUCKETS.items()
+        ],
+        'price': [
+            {'min': low, 'max': high, 'count': prices[f"{low}-{high or ''}"]}
+            for low, high in PRICE_BANDS
+        ],
+        'year': [{'year': year, 'count': count} for year, count in years.items()],
+    }
+
+
+def bike_facets(filters):
+    """
+    Sidebar counts for the current filters, each facet ignoring its own selection.
+    A handful of grouped/conditional aggregates, cached per normalized filter set until
+    a Bike is saved or deleted (the 'bikes' generation, see core/signals.py).
+    """
+    key = facet_cache_key(filters)
+    facets = cache.get(key)
+    if facets is None:
+        with primary_reads():  # cached until the next bump, so not from a lagging replica
+            facets = _compute_facets(filters)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
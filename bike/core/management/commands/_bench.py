@@ -0,0 +1,53 @@
+# Shared helpers for the bench_* management commands (not a command itself).
+import contextlib
+import random
+import statistics
+import time
+
+from django.test.utils import setup_databases, teardown_databases
+
+BRANDS = ["Honda", "TVS", "Bajaj", "Hero", "Yamaha", "Suzuki", "Royal Enfield", "KTM"]
+VARIANTS = [("97cc", 97), ("110cc", 110), ("125cc", 125), ("160cc", 160), ("350cc", 350), ("3.0kWh", None)]
+
+
+@contextlib.contextmanager
+def scratch_database(verbosity=0):
+    """Run against a throwaway test database so benchmarks never touch real data."""
+    config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity=verbosity)
+
+
+def timed(fn, repeat=20):
+    """Call fn() `repeat` times; return (median ms, p95 ms)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def seed_bikes(owner, count, seed, batch_size=5000):
+    """bulk_create `count` random bikes (about 90% published) for `owner`."""
+    from core.models import Bike
+
+    rnd = random.Random(seed)
+    batch = []
+    for _ in range(count):
+        variant, cc = rnd.choice(VARIANTS)
+        batch.append(Bike(
+            owner=owner, brand=rnd.choice(BRANDS), model=f"Model {rnd.randrange(40)}",
+            variant=variant, engine_cc=cc, category=rnd.choice(["motorbike", "scooter", "ev"]),
+            fuel_type="electric" if cc is None else "petrol",
+            previous_owner=rnd.choice(["1st", "2nd", "3rd+"]), make_year=rnd.randrange(2008, 2026),
+            kilometers=rnd.randrange(0, 80000), price=rnd.randrange(15000, 400000, 500),
+            location="Chennai", is_published=rnd.random() < 0.9,
+        ))
+        if len(batch) == batch_size:
+            Bike.objects.bulk_create(batch)
+            batch = []
+    Bike.objects.bulk_create(batch)
@@ -0,0 +1,131 @@
+"""
+Mixed read/write load on SQLite: listing reads vs sell / booking writes, per journal mode.
+
+    python manage.py bench_db_concurrency                    # 100k bikes, 8 readers, 2 writers, 10s
+    python manage.py bench_db_concurrency --readers 16 --seconds 5
+
+Reader threads load buy_bike pages (COUNT + keyset page) and single bikes; writer
+threads insert SellRequests and book / unbook bikes. Each mode runs against the same
+scratch database: the old rollback journal (journal_mode=DELETE, synchronous=FULL)
+and WAL (as set by enable_wal) with the connection settings from settings.SQLITE_OPTIONS.
+"""
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.http import QueryDict
+
+from core.listing import bike_listing_page, parse_bike_filters
+from core.models import Bike, SellRequest
+
+from ._bench import scratch_database, seed_bikes
+
+MODES = {
+    "rollback journal": "PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL;",
+    "WAL (settings)": "PRAGMA journal_mode=WAL;" + settings.SQLITE_OPTIONS["init_command"],
+}
+QUERIES = ["", "brand=Honda&sort=price_asc", "category=scooter&max_km=30000", "min_year=2018&sort=price_desc"]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent listing reads and writes under each SQLite journal mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--seconds", type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stderr.write("This benchmark compares SQLite journal modes.")
+            return
+        with scratch_database():
+            User = get_user_model()
+            owner = User.objects.create_user("bench", "bench@example.com", "bench")
+            self.buyer = User.objects.create_user("buyer", "buyer@example.com", "bench")
+            self.stdout.write(f"seeding {options['rows']} bikes ...")
+            seed_bikes(owner, options["rows"], seed=options["rows"])
+            self.pks = list(Bike.objects.values_list("pk", flat=True))
+
+            self.stdout.write(f"\n{options['rows']:,} bikes, {options['readers']} readers, "
+                              f"{options['writers']} writers, {options['seconds']:.0f}s per mode")
+            self.stdout.write(f"{'mode':<18}{'reads/s':>9}{'read p50':>10}{'read p95':>10}"
+                              f"{'writes/s':>10}{'write p95':>11}{'errors':>8}")
+            original = connection.settings_dict["OPTIONS"]
+            try:
+                for label, init_command in MODES.items():
+                    self.use(dict(original, init_command=init_command))
+                    self.run(label, options["readers"], options["writers"], options["seconds"])
+            finally:
+                self.use(original)
+
+    def use(self, options):
+        # every thread's connection is built from this settings dict
+        connections.close_all()
+        connection.settings_dict["OPTIONS"] = options
+        connection.ensure_connection()  # journal_mode is switched on this first connection
+
+    def run(self, label, readers, writers, seconds):
+        stop = time.perf_counter() + seconds
+        reads, writes, errors = [], [], []
+
+        def reader(seed):
+            rnd = random.Random(seed)
+            filters = [parse_bike_filters(QueryDict(q)) for q in QUERIES]
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    if rnd.random() < 0.5:
+                        bike_listing_page(rnd.choice(filters))
+                    else:
+                        Bike.objects.filter(pk=rnd.choice(self.pks)).first()
+                except OperationalError as exc:
+                    errors.append(exc)
+                else:
+                    reads.append(time.perf_counter() - start)
+
+        def writer(seed):
+            rnd = random.Random(seed)
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    if rnd.random() < 0.5:
+                        SellRequest.objects.create(brand="Honda", model="Shine", variant="125cc", year=2020,
+                                                   kms_range="1 - 5000", owner="1st Owner", estimated_price=50000)
+                    else:
+                        bike = Bike(pk=rnd.choice(self.pks))
+                        bike.book(self.buyer) or bike.unbook()
+                except OperationalError as exc:
+                    errors.append(exc)
+                else:
+                    writes.append(time.perf_counter() - start)
+
+        def run_thread(target, seed):
+            try:
+                target(seed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run_thread, args=(reader, i)) for i in range(readers)]
+        threads += [threading.Thread(target=run_thread, args=(writer, 1000 + i)) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write(
+            f"{label:<18}{len(reads) / seconds:>9.0f}{statistics.median(reads or [0]) * 1000:>10.1f}"
+            f"{percentile(reads, 0.95) * 1000:>10.1f}{len(writes) / seconds:>10.0f}"
+            f"{percentile(writes, 0.95) * 1000:>11.1f}{len(errors):>8}"
+        )
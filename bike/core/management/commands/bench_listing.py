@@ -0,0 +1,64 @@
+"""
+Compare the buy_bike listing engines (ORM vs the NumPy columnar index).
+
+    python manage.py bench_listing                 # 100k and 1M published bikes
+    python manage.py bench_listing --rows 20000 --repeat 5
+
+Runs in a scratch test database; timings are per page (COUNT + page rows) in ms.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+from django.test.utils import override_settings
+
+from core.listing import bike_listing_page, parse_bike_filters
+
+from ._bench import scratch_database, seed_bikes, timed
+
+QUERIES = {
+    "all, newest": "",
+    "brand + price_asc": "brand=Honda&brand=TVS&sort=price_asc",
+    "category + price band": "category=scooter&min_price=40000&max_price=80000",
+    "cc + year + km": "cc=below200&min_year=2018&max_km=30000&sort=price_desc",
+    "alpha, deep cursor": "sort=alpha",
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark the ORM and columnar listing engines at several table sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            owner = get_user_model().objects.create_user("bench", "bench@example.com", "bench")
+            created = 0
+            for rows in sorted(options["rows"]):
+                self.stdout.write(f"seeding {rows - created} bikes ...")
+                seed_bikes(owner, rows - created, seed=rows)
+                created = rows
+                self.run(rows, options["repeat"])
+
+    def run(self, rows, repeat):
+        from core.columnar import bike_index
+
+        bike_index.reset()
+        with override_settings(BIKE_LISTING_ENGINE="columnar"):
+            build_ms, _ = timed(lambda: (bike_index.reset(), bike_index.snapshot()), repeat=1)
+
+        self.stdout.write(f"\n{rows:,} bikes (columnar index build {build_ms:.0f} ms)")
+        self.stdout.write(f"{'query':<24}{'orm p50':>10}{'orm p95':>10}{'col p50':>10}{'col p95':>10}")
+        for label, query in QUERIES.items():
+            filters = parse_bike_filters(QueryDict(query))
+            cursor = None
+            if label.endswith("deep cursor"):
+                # a cursor a few pages in, so neither engine gets the first-page shortcut
+                for _ in range(5):
+                    cursor = bike_listing_page(filters, cursor)[0].next_cursor
+            results = []
+            for engine in ("orm", "columnar"):
+                with override_settings(BIKE_LISTING_ENGINE=engine):
+                    results += timed(lambda: bike_listing_page(filters, cursor), repeat=repeat)
+            self.stdout.write(f"{label:<24}" + "".join(f"{ms:>10.2f}" for ms in results))
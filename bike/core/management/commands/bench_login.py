@@ -0,0 +1,77 @@
+"""
+Benchmark login lookups: the old view flow vs core.backends.EmailOrUsernameBackend.
+
+    python manage.py bench_login                   # 100k users
+    python manage.py bench_login --users 10000 --repeat 5
+
+The old flow called authenticate() with the identifier and, when that failed, looked
+the email up with email__iexact (a full scan) and called authenticate() again, so email
+logins and failures hashed twice. Runs in a scratch test database; reports wall and
+CPU milliseconds per attempt.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from core.backends import EmailOrUsernameBackend
+
+from ._bench import scratch_database, timed
+
+PASSWORD = "correct horse battery"
+
+
+def legacy_login(identifier, password):
+    backend = ModelBackend()
+    user = backend.authenticate(None, username=identifier, password=password)
+    if user is None:
+        user_obj = get_user_model().objects.filter(email__iexact=identifier).first()
+        if user_obj:
+            user = backend.authenticate(None, username=user_obj.username, password=password)
+    return user
+
+
+class Command(BaseCommand):
+    help = "Benchmark username/email login: latency and CPU per attempt."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.seed(options["users"])
+            self.run(options["users"], options["repeat"])
+
+    def seed(self, count, batch_size=5000):
+        User = get_user_model()
+        password = make_password(PASSWORD)  # hashing once; every user shares it
+        self.stdout.write(f"seeding {count} users ...")
+        for start in range(0, count, batch_size):
+            User.objects.bulk_create(
+                User(username=f"rider{i}", email=f"Rider{i}@Example.com", password=password)
+                for i in range(start, min(count, start + batch_size))
+            )
+
+    def run(self, users, repeat):
+        target = users // 2
+        cases = {
+            "username, ok": (f"rider{target}", PASSWORD),
+            "email, ok": (f"rider{target}@example.com", PASSWORD),
+            "email, bad password": (f"rider{target}@example.com", "wrong"),
+            "unknown email": ("nobody@example.com", "wrong"),
+        }
+        backend = EmailOrUsernameBackend()
+        flows = {"old": legacy_login, "new": lambda i, p: backend.authenticate(None, username=i, password=p)}
+
+        self.stdout.write(f"\n{users:,} users, ms per attempt")
+        self.stdout.write(f"{'attempt':<22}" + "".join(f"{f + ' ' + m:>11}" for f in flows for m in ("p50", "cpu")))
+        for label, (identifier, password) in cases.items():
+            cells = []
+            for flow in flows.values():
+                cpu = time.process_time()
+                p50, _ = timed(lambda: flow(identifier, password), repeat=repeat)
+                cells += [p50, (time.process_time() - cpu) * 1000 / repeat]
+            self.stdout.write(f"{label:<22}" + "".join(f"{ms:>11.1f}" for ms in cells))
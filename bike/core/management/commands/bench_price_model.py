@@ -0,0 +1,99 @@
+"""
+Benchmark the sell-page price model (core/price_model.py).
+
+    python manage.py bench_price_model                 # 1M published bikes
+    python manage.py bench_price_model --rows 50000 --repeat 5
+
+Runs in a scratch test database. Reports the training time, single estimates
+(model vs the PriceRule engine, in microseconds) and batch prediction over every row.
+"""
+import math
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.models import Bike
+from core.price_model import train_price_model
+from core.pricing import get_pricing_engine
+
+from ._bench import scratch_database, timed
+
+# brand -> (new price of a 125cc bike, variants)
+BRANDS = {
+    "Honda": (85000, ["110cc", "125cc", "160cc"]),
+    "TVS": (70000, ["110cc", "125cc", "160cc"]),
+    "Bajaj": (75000, ["125cc", "150cc", "200cc"]),
+    "Hero": (60000, ["97cc", "110cc", "125cc"]),
+    "Royal Enfield": (140000, ["350cc", "411cc", "650cc"]),
+    "KTM": (150000, ["200cc", "250cc", "390cc"]),
+    "Ather": (120000, ["2.9kWh", "3.7kWh"]),
+}
+OWNERS = ["1st", "2nd", "3rd+"]
+SELL_KMS = ["1 - 5000", "5001 - 10000", "10001 - 20000", "20001 - 50000", "50001 - 100000"]
+SELL_OWNERS = ["1st Owner", "2nd Owner", "3rd Owner"]
+CALLS = 1000  # single estimates per timed sample
+
+
+class Command(BaseCommand):
+    help = "Benchmark training and prediction of the sell-page price model."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            owner = get_user_model().objects.create_user("bench", "bench@example.com", "bench")
+            self.stdout.write(f"seeding {options['rows']} bikes ...")
+            self.seed(owner, options["rows"])
+            self.run(options["rows"], options["repeat"])
+
+    def seed(self, owner, count, batch_size=5000):
+        # prices follow a known log-linear shape plus noise, so the fit can be checked
+        rnd = random.Random(count)
+        batch = []
+        for _ in range(count):
+            brand = rnd.choice(list(BRANDS))
+            base, variants = BRANDS[brand]
+            variant = rnd.choice(variants)
+            year, km, owners = rnd.randrange(2008, 2026), rnd.randrange(0, 80000), rnd.randrange(3)
+            cc = float(variant[:-2]) if variant.endswith("cc") else 125
+            price = (base * (cc / 125) ** 0.6 * 0.92 ** (2025 - year) * (1 - km / 400000) * 0.95 ** owners
+                     * math.exp(rnd.gauss(0, 0.08)))
+            batch.append(Bike(
+                owner=owner, brand=brand, model="Bench", variant=variant, make_year=year, kilometers=km,
+                previous_owner=OWNERS[owners], price=round(price, -2), location="Chennai", is_published=True,
+            ))
+            if len(batch) == batch_size:
+                Bike.objects.bulk_create(batch)
+                batch = []
+        Bike.objects.bulk_create(batch)
+
+    def run(self, rows, repeat):
+        start = time.perf_counter()
+        model = train_price_model()
+        train_s = time.perf_counter() - start
+        self.stdout.write(f"\n{rows:,} bikes: trained in {train_s:.2f}s, rmse {model.rmse:.3f} (log price)")
+
+        rnd = random.Random(0)
+        queries = [
+            (brand, rnd.choice(BRANDS[brand][1]), rnd.randrange(2008, 2026), rnd.choice(SELL_KMS),
+             rnd.choice(SELL_OWNERS))
+            for brand in rnd.choices(list(BRANDS), k=CALLS)
+        ]
+        engine = get_pricing_engine()
+
+        def per_call(fn):
+            p50, p95 = timed(lambda: [fn(*query) for query in queries], repeat=repeat)
+            return p50 * 1000 / CALLS, p95 * 1000 / CALLS
+
+        self.stdout.write(f"{'single estimate':<24}{'p50 us':>10}{'p95 us':>10}")
+        for label, fn in (("model.predict", model.predict), ("PriceRule engine", engine.quote)):
+            p50, p95 = per_call(fn)
+            self.stdout.write(f"{label:<24}{p50:>10.2f}{p95:>10.2f}")
+
+        batch = queries * (rows // CALLS)
+        p50, p95 = timed(lambda: model.predict_many(batch), repeat=max(1, repeat // 4))
+        self.stdout.write(f"predict_many({len(batch):,} rows): p50 {p50:.0f} ms, p95 {p95:.0f} ms")
@@ -0,0 +1,28 @@
+"""
+Bundle and minify each page's CSS / JS and extract critical CSS (see core/assets.py).
+
+    python manage.py build_assets
+    python manage.py collectstatic --noinput    # hashes + compresses the bundles
+
+Prints, per page, the bytes of the source files and of the bundle, and the size of the
+critical CSS inlined in <head>.
+"""
+from django.core.management.base import BaseCommand
+
+from core.assets import BUNDLE_DIR, PAGES, build_bundles
+
+
+class Command(BaseCommand):
+    help = "Build the per-page CSS/JS bundles and critical CSS under core/static/core/bundles/."
+
+    def handle(self, *args, **options):
+        report = build_bundles()
+        self.stdout.write(f"{'page':<14}{'css src':>9}{'css min':>9}{'js src':>9}{'js min':>9}{'critical':>10}{'requests':>10}")
+        for page, sizes in report.items():
+            css, js = sizes["css"], sizes["js"]
+            styles, scripts = PAGES[page]
+            # base + page files before, one stylesheet + one script after
+            requests = f"{2 + len(styles) + len(scripts)} -> 2"
+            self.stdout.write(f"{page:<14}{css[0]:>9}{css[1]:>9}{js[0]:>9}{js[1]:>9}"
+                              f"{sizes.get('critical', '-'):>10}{requests:>10}")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(report)} bundles to {BUNDLE_DIR}."))
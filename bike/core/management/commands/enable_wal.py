@@ -0,0 +1,29 @@
+"""
+Switch the SQLite database to write-ahead logging. A one-off deployment step:
+
+    python manage.py enable_wal
+
+The journal mode is stored in the database file itself, so it is set once here rather
+than from settings.SQLITE_OPTIONS on every connection (which would rewrite the header
+of any db.sqlite3 a manage.py command opens, e.g. the dev database in the repo).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Put the SQLite database in WAL journal mode (persistent, run once per database file)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError("WAL is an SQLite journal mode.")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            mode = cursor.fetchone()[0]
+        if mode != "wal":
+            raise CommandError(f"SQLite kept journal_mode={mode}.")
+        self.stdout.write(self.style.SUCCESS(f"{connection.settings_dict['NAME']}: journal_mode=wal"))
@@ -0,0 +1,29 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+
+from core.images import ensure_derivatives, make_derivatives
+from core.models import Bike, BikeImage
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for existing bike images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate even if derivatives exist.")
+
+    def handle(self, *args, **options):
+        done = 0
+        images = chain(
+            (bike.main_image for bike in Bike.objects.only("pk", "main_image").iterator()),
+            (photo.image for photo in BikeImage.objects.only("pk", "image").iterator()),
+        )
+        for image in images:
+            if not image:
+                continue
+            if options["force"]:
+                make_derivatives(image.name, image.storage)
+            else:
+                ensure_derivatives(image)
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} images."))
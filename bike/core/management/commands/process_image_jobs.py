@@ -0,0 +1,96 @@
+"""
+Image job worker: runs queued ImageJobs (resized derivatives, see core/images.py)
+in a pool of processes, one Pillow job per core.
+
+    python manage.py process_image_jobs            # poll forever
+    python manage.py process_image_jobs --once     # drain the queue and exit
+    python manage.py process_image_jobs --workers 0 --once   # in-process, for debugging
+
+Several workers (even on different hosts sharing the database and media storage) can
+run at once; jobs are claimed with a conditional UPDATE.
+"""
+import logging
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.images import claim_image_jobs, finish_image_job, make_derivatives, requeue_stale_image_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # needed under the spawn/forkserver start methods; a no-op after fork
+    django.setup()
+
+
+class _InlinePool:
+    """Executor stand-in for --workers 0."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Command(BaseCommand):
+    help = "Process queued image jobs in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (0 = run in this process).")
+        parser.add_argument("--batch", type=int, default=None, help="Jobs claimed per round (default 4 per worker).")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--stale", type=int, default=600,
+                            help="Requeue jobs left running for this many seconds (crashed worker).")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        batch = options["batch"] or max(1, workers) * 4
+        if workers:
+            # forked children must not share the parent's database connections
+            # (children never query; one in a caller's transaction is left open)
+            for conn in connections.all(initialized_only=True):
+                if not conn.in_atomic_block:
+                    conn.close()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        else:
+            pool = _InlinePool()
+
+        done = failed = 0
+        with pool:
+            while True:
+                requeue_stale_image_jobs(options["stale"])
+                jobs = claim_image_jobs(batch)
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                futures = {pool.submit(make_derivatives, job.name): job for job in jobs}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        widths = future.result()
+                    except Exception as exc:
+                        logger.exception("Image job %s failed", job.name)
+                        finish_image_job(job, error=f"{type(exc).__name__}: {exc}")
+                        failed += 1
+                    else:
+                        finish_image_job(job, widths=widths)
+                        done += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} image jobs ({failed} failed)."))
@@ -0,0 +1,35 @@
+"""
+Outbox sender: delivers queued OutboxEmail rows (see core/outbox.py).
+
+    python manage.py send_queued_email            # poll forever
+    python manage.py send_queued_email --once     # drain what is due and exit
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import requeue_stale_emails, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over a reused connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=50, help="Messages sent per connection.")
+        parser.add_argument("--once", action="store_true", help="Exit when nothing is due.")
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds to sleep when nothing is due.")
+        parser.add_argument("--stale", type=int, default=600,
+                            help="Requeue messages left sending for this many seconds (crashed sender).")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            requeue_stale_emails(options["stale"])
+            sent, failed = send_queued_emails(options["batch"])
+            total_sent += sent
+            total_failed += failed
+            if not (sent or failed):
+                if options["once"]:
+                    break
+                time.sleep(options["poll"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {total_sent} emails ({total_failed} failed)."))
@@ -0,0 +1,38 @@
+"""
+Fit the sell-page price model on published bikes (see core/price_model.py).
+
+    python manage.py train_price_model
+    python manage.py train_price_model --output /srv/models/price_model.json
+
+Workers pick the new file up on their next sell estimate; no restart needed.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.price_model import train_price_model
+
+
+class Command(BaseCommand):
+    help = "Fit the price model on published Bike listings and write its coefficients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Defaults to settings.PRICE_MODEL_PATH.")
+
+    def handle(self, *args, **options):
+        output = options["output"] or getattr(settings, "PRICE_MODEL_PATH", None)
+        if not output:
+            raise CommandError("Set PRICE_MODEL_PATH or pass --output.")
+
+        start = time.perf_counter()
+        try:
+            model = train_price_model()
+        except ValueError as exc:
+            # too little data: keep whatever model is deployed (or the heuristic)
+            raise CommandError(str(exc))
+        model.save(output)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained on {model.listings} listings, {len(model.brands)} brands, "
+            f"rmse {model.rmse:.3f} (log price) in {time.perf_counter() - start:.1f}s -> {output}"))
@@ -0,0 +1,47 @@
+"""
+Value a dealer CSV of bikes through the sell pricing (see core/valuation.py).
+
+    python manage.py value_bikes dealer.csv > valued.csv
+    python manage.py value_bikes - --output valued.csv --no-save < dealer.csv
+
+Each valid row is saved as a SellRequest (in batches) unless --no-save is given.
+"""
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.valuation import BATCH_SIZE, missing_columns, valuation_csv, value_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV of bikes through the sell pricing and write a CSV with estimated prices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="CSV file, or - for stdin.")
+        parser.add_argument("--output", default=None, help="Output CSV (default: stdout).")
+        parser.add_argument("--no-save", action="store_true", help="Only price the rows, don't store SellRequests.")
+        parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Rows priced and saved per batch.")
+
+    def handle(self, *args, **options):
+        try:
+            source = sys.stdin if options["input"] == "-" else open(options["input"], newline="", encoding="utf-8-sig")
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with source:
+            reader = csv.DictReader(source)
+            missing = missing_columns(reader.fieldnames)
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(missing)}")
+
+            rows = value_rows(reader, save=not options["no_save"], batch_size=options["batch"])
+            out = open(options["output"], "w", newline="") if options["output"] else None
+            try:
+                for line in valuation_csv(rows):
+                    if out:
+                        out.write(line)
+                    else:
+                        self.stdout.write(line, ending="")
+            finally:
+                if out:
+                    out.close()
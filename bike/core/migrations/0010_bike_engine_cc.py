@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:07
+
+import re
+
+from django.db import migrations, models
+
+# frozen copy of core.models.ENGINE_CC_RE so this migration never changes behaviour
+ENGINE_CC_RE = re.compile(r'(\d+(?:\.\d+)?)\s*cc\b', re.IGNORECASE)
+
+
+def backfill_engine_cc(apps, schema_editor):
+    Bike = apps.get_model('core', 'Bike')
+    changed = []
+    for bike in Bike.objects.only('pk', 'variant').iterator():
+        match = ENGINE_CC_RE.search(bike.variant or '')
+        if match:
+            bike.engine_cc = int(round(float(match.group(1))))
+            changed.append(bike)
+    Bike.objects.bulk_update(changed, ['engine_cc'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_faq_happycustomer_satisfiedcustomersection_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bike',
+            name='engine_cc',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, help_text='Parsed from variant on save (e.g. 124.8cc -> 125)', null=True),
+        ),
+        migrations.RunPython(backfill_engine_cc, migrations.RunPython.noop),
+    ]
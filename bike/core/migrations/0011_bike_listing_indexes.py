@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_bike_engine_cc'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at'], name='bike_pub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['price'], name='bike_pub_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['brand', 'model'], name='bike_pub_brand_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', 'created_at'], name='bike_pub_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', 'price'], name='bike_pub_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['fuel_type', 'created_at'], name='bike_pub_fuel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['make_year'], name='bike_pub_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['kilometers'], name='bike_pub_km_idx'),
+        ),
+    ]
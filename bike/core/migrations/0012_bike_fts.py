@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:09
+
+from django.db import migrations
+
+# frozen copy of the core.search SQL so this migration never changes behaviour
+CREATE_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_bike_fts USING fts5(
+        brand, model, variant, location,
+        content='core_bike', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS core_bike_fts_ai AFTER INSERT ON core_bike BEGIN
+        INSERT INTO core_bike_fts(rowid, brand, model, variant, location)
+        VALUES (new.id, new.brand, new.model, new.variant, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_bike_fts_ad AFTER DELETE ON core_bike BEGIN
+        INSERT INTO core_bike_fts(core_bike_fts, rowid, brand, model, variant, location)
+        VALUES ('delete', old.id, old.brand, old.model, old.variant, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_bike_fts_au AFTER UPDATE OF brand, model, variant, location ON core_bike BEGIN
+        INSERT INTO core_bike_fts(core_bike_fts, rowid, brand, model, variant, location)
+        VALUES ('delete', old.id, old.brand, old.model, old.variant, old.location);
+        INSERT INTO core_bike_fts(rowid, brand, model, variant, location)
+        VALUES (new.id, new.brand, new.model, new.variant, new.location);
+    END""",
+    "INSERT INTO core_bike_fts(core_bike_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_bike_fts_ai",
+    "DROP TRIGGER IF EXISTS core_bike_fts_ad",
+    "DROP TRIGGER IF EXISTS core_bike_fts_au",
+    "DROP TABLE IF EXISTS core_bike_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_bike_listing_indexes'),
+    ]
+
+    operations = [
+        # SQLite only: FTS5 index over brand/model/variant/location, trigger-maintained
+        migrations.RunPython(create_fts, drop_fts),
+    ]
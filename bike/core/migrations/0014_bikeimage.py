@@ -0,0 +1,114 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:28
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+THUMB_FIELDS = ['thumb1', 'thumb2', 'thumb3', 'thumb4', 'thumb5', 'thumb6']
+
+
+def thumbs_to_images(apps, schema_editor):
+    Bike = apps.get_model('core', 'Bike')
+    BikeImage = apps.get_model('core', 'BikeImage')
+    images = []
+    for bike in Bike.objects.only('pk', *THUMB_FIELDS).iterator():
+        # the same stored file is referenced, nothing is copied
+        names = [getattr(bike, field).name for field in THUMB_FIELDS if getattr(bike, field)]
+        images += [BikeImage(bike_id=bike.pk, image=name, order=i) for i, name in enumerate(names)]
+    BikeImage.objects.bulk_create(images, batch_size=500)
+
+
+def images_to_thumbs(apps, schema_editor):
+    Bike = apps.get_model('core', 'Bike')
+    BikeImage = apps.get_model('core', 'BikeImage')
+    changed = {}
+    for image in BikeImage.objects.order_by('bike_id', 'order', 'pk').iterator():
+        bike = changed.setdefault(image.bike_id, Bike(pk=image.bike_id))
+        taken = sum(1 for field in THUMB_FIELDS if getattr(bike, field))
+        if taken < len(THUMB_FIELDS):  # photos beyond six are dropped
+            setattr(bike, THUMB_FIELDS[taken], image.image.name)
+    Bike.objects.bulk_update(changed.values(), THUMB_FIELDS, batch_size=500)
+
+
+# frozen copy of the core.search SQL (see 0012_bike_fts) so this migration never changes behaviour
+FTS_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_bike_fts USING fts5(
+        brand, model, variant, location,
+        content='core_bike', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS core_bike_fts_ai AFTER INSERT ON core_bike BEGIN
+        INSERT INTO core_bike_fts(rowid, brand, model, variant, location)
+        VALUES (new.id, new.brand, new.model, new.variant, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_bike_fts_ad AFTER DELETE ON core_bike BEGIN
+        INSERT INTO core_bike_fts(core_bike_fts, rowid, brand, model, variant, location)
+        VALUES ('delete', old.id, old.brand, old.model, old.variant, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_bike_fts_au AFTER UPDATE OF brand, model, variant, location ON core_bike BEGIN
+        INSERT INTO core_bike_fts(core_bike_fts, rowid, brand, model, variant, location)
+        VALUES ('delete', old.id, old.brand, old.model, old.variant, old.location);
+        INSERT INTO core_bike_fts(rowid, brand, model, variant, location)
+        VALUES (new.id, new.brand, new.model, new.variant, new.location);
+    END""",
+    "INSERT INTO core_bike_fts(core_bike_fts) VALUES ('rebuild')",
+]
+
+
+def repair_fts(apps, schema_editor):
+    # SQLite may rebuild core_bike to change its columns, dropping the FTS triggers
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_imagejob'),
+    ]
+
+    operations = [
+        # runs last when unapplying, after the thumb columns are back
+        migrations.RunPython(migrations.RunPython.noop, repair_fts),
+        migrations.CreateModel(
+            name='BikeImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to=core.models.bike_image_upload_path)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('bike', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='core.bike')),
+            ],
+            options={
+                'ordering': ['order', 'pk'],
+                'indexes': [models.Index(fields=['bike', 'order'], name='bikeimage_bike_order_idx')],
+            },
+        ),
+        migrations.RunPython(thumbs_to_images, images_to_thumbs),
+        migrations.RemoveField(
+            model_name='bike',
+            name='thumb1',
+        ),
+        migrations.RemoveField(
+            model_name='bike',
+            name='thumb2',
+        ),
+        migrations.RemoveField(
+            model_name='bike',
+            name='thumb3',
+        ),
+        migrations.RemoveField(
+            model_name='bike',
+            name='thumb4',
+        ),
+        migrations.RemoveField(
+            model_name='bike',
+            name='thumb5',
+        ),
+        migrations.RemoveField(
+            model_name='bike',
+            name='thumb6',
+        ),
+        migrations.RunPython(repair_fts, migrations.RunPython.noop),
+    ]
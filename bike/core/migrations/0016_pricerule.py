@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+# the rules sell_get_price used to hard-code, in their original order
+SEED_RULES = [
+    ('brand', 'TVS', 60000, 100), ('brand', 'Honda', 75000, 100), ('brand', 'Bajaj', 50000, 100),
+    ('brand', 'Hero', 40000, 100), ('brand', 'Royal Enfield', 220000, 100), ('brand', 'Yamaha', 80000, 100),
+    ('brand', 'Vespa', 95000, 100), ('brand', 'KTM', 240000, 100), ('brand', 'Suzuki', 85000, 100),
+    ('variant', '350|410|400', 1.6, 10),
+    ('variant', '150', 1.25, 20),
+    ('variant', '125', 1.05, 30),
+    ('variant', '110', 0.92, 40),
+    ('kms', 'Under', 0.96, 10),
+    ('kms', '^(?=.*5,000)(?=.*20,000)', 0.9, 20),
+    ('kms', '20,000', 0.8, 30),
+    ('kms', r'\+|50,000', 0.72, 40),
+    ('owner', '^2nd', 0.88, 10),
+    ('owner', '^3rd', 0.75, 20),
+]
+
+
+def seed_rules(apps, schema_editor):
+    PriceRule = apps.get_model('core', 'PriceRule')
+    PriceRule.objects.bulk_create(
+        PriceRule(kind=kind, pattern=pattern, value=value, priority=priority)
+        for kind, pattern, value, priority in SEED_RULES
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('brand', 'Brand base price'), ('variant', 'Variant multiplier'), ('kms', 'Kilometres multiplier'), ('owner', 'Owner multiplier')], max_length=10)),
+                ('pattern', models.CharField(help_text='Brand: exact brand name. Others: regular expression searched in the submitted value; the first active rule (by priority) that matches sets the multiplier.', max_length=200)),
+                ('value', models.FloatField(help_text='Brand: base price in rupees. Others: multiplier, e.g. 0.9')),
+                ('priority', models.PositiveIntegerField(default=100, help_text='Lower numbers are tried first')),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['kind', 'priority', 'pk'],
+            },
+        ),
+        migrations.RunPython(seed_rules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def cancel_duplicate_pending(apps, schema_editor):
+    # the constraint can't be added while a rider has two pending requests for a bike;
+    # keep the oldest one
+    TestRide = apps.get_model('core', 'TestRide')
+    seen, duplicates = set(), []
+    pending = TestRide.objects.filter(status='pending').order_by('created_at', 'pk')
+    for pk, bike_id, user_id in pending.values_list('pk', 'bike_id', 'user_id').iterator():
+        if (bike_id, user_id) in seen:
+            duplicates.append(pk)
+        seen.add((bike_id, user_id))
+    TestRide.objects.filter(pk__in=duplicates).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_pricerule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_pending, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='testride',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('bike', 'user'), name='testride_one_pending_per_user'),
+        ),
+    ]
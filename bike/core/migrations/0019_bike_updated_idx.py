@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_user_email_lower_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['updated_at'], name='bike_updated_idx'),
+        ),
+    ]
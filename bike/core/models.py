@@ -94,11 +94,14 @@ class ApproachImage(models.Model):
 
 # buybike model
 # core/models.py (only the Bike model fragment shown; merge with your existing code)
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
 import os
+import re
+
+from .caching import bump_generation
 
 User = get_user_model()
 
@@ -154,6 +157,16 @@ def bike_upload_path(instance, filename):
     # optional: return f"{folder}/{int(timezone.now().timestamp())}_{base}{ext}"
     return f"{folder}/{base}{ext}"
 
+# engine size is typed into `variant` (e.g. "124.8cc", "350 CC"); EVs use kWh
+ENGINE_CC_RE = re.compile(r'(\d+(?:\.\d+)?)\s*cc\b', re.IGNORECASE)
+
+def parse_engine_cc(variant):
+    """Return the engine size in whole cc parsed from a variant string, or None."""
+    match = ENGINE_CC_RE.search(variant or "")
+    if not match:
+        return None
+    return int(round(float(match.group(1))))
+
 # ... other CHOICES (OWNER_CHOICES, etc.) as before ...
 
 class Bike(models.Model):
@@ -164,6 +177,8 @@ class Bike(models.Model):
     brand = models.CharField(max_length=120)
     model = models.CharField(max_length=120)
     variant = models.CharField(max_length=120, blank=True, null=True)  # you use this for CC
+    engine_cc = models.PositiveIntegerField(blank=True, null=True, db_index=True, editable=False,
+                                            help_text="Parsed from variant on save (e.g. 124.8cc -> 125)")
 
     # specs
     make_year = models.PositiveIntegerField(help_text="e.g. 2018")
@@ -190,14 +205,8 @@ class Bike(models.Model):
     odometer_type = models.CharField(max_length=80, blank=True, null=True, help_text="Digital / Analog")
     wheel_type = models.CharField(max_length=20, choices=WHEEL_TYPE_CHOICES, blank=True, null=True)
 
-    # Images
+    # Images (the gallery lives in BikeImage, so listing rows only carry the card image)
     main_image = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
-    thumb1 = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
-    thumb2 = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
-    thumb3 = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
-    thumb4 = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
-    thumb5 = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
-    thumb6 = models.ImageField(upload_to=bike_upload_path, blank=True, null=True)
 
     # Booking
     is_booked = models.BooleanField(default=False)
@@ -209,23 +218,80 @@ class Bike(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # buy_bike always filters on is_published, so these are partial indexes over
+        # the published rows only, each matching a sort key or a common filter + sort.
+        indexes = [
+            models.Index(fields=['created_at'], name='bike_pub_created_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['price'], name='bike_pub_price_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['brand', 'model'], name='bike_pub_brand_model_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['category', 'created_at'], name='bike_pub_category_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['category', 'price'], name='bike_pub_category_price_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['fuel_type', 'created_at'], name='bike_pub_fuel_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['make_year'], name='bike_pub_year_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['kilometers'], name='bike_pub_km_idx', condition=models.Q(is_published=True)),
+            # MAX(updated_at) for the listing ETag (core/conditional.py); covers unpublished rows too
+            models.Index(fields=['updated_at'], name='bike_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.brand} {self.model} ({self.make_year})"
 
+    def save(self, *args, **kwargs):
+        # keep the numeric engine size in sync with the free-text variant
+        self.engine_cc = parse_engine_cc(self.variant)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'variant' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'engine_cc'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('bike-detail', args=[self.pk])
 
     def book(self, user):
-        self.is_booked = True
-        self.booked_by = user
-        self.booked_at = timezone.now()
-        self.save(update_fields=['is_booked','booked_by','booked_at'])
+        """
+        Book the bike for `user`. Returns False if it was already booked.
+
+        One conditional UPDATE (... WHERE is_booked = false), so of any number of
+        concurrent buyers exactly one wins, without locking other bikes.
+        """
+        return self._set_booking(user, timezone.now(), was_booked=False)
 
     def unbook(self):
-        self.is_booked = False
-        self.booked_by = None
-        self.booked_at = None
-        self.save(update_fields=['is_booked','booked_by','booked_at'])
+        """Release the booking. Returns False if the bike wasn't booked."""
+        return self._set_booking(None, None, was_booked=True)
+
+    def _set_booking(self, user, booked_at, was_booked):
+        now = timezone.now()
+        changed = Bike.objects.filter(pk=self.pk, is_booked=was_booked).update(
+            is_booked=not was_booked, booked_by=user, booked_at=booked_at, updated_at=now)
+        if changed:
+            self.is_booked, self.booked_by, self.booked_at, self.updated_at = not was_booked, user, booked_at, now
+            # update() sends no post_save; listings show the Booked badge (bumped on
+            # commit, like the handlers in core/signals.py)
+            transaction.on_commit(lambda: bump_generation("bikes"))
+        return bool(changed)
+
+
+def bike_image_upload_path(instance, filename):
+    # same folder as the bike's main image
+    return bike_upload_path(instance.bike, filename)
+
+
+class BikeImage(models.Model):
+    """Gallery photo shown as a thumbnail on the detail page, in `order`."""
+    bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='images')
+    image = models.ImageField(upload_to=bike_image_upload_path)
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'pk']
+        indexes = [
+            models.Index(fields=['bike', 'order'], name='bikeimage_bike_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bike} photo {self.order}"
 
 
 # test
@@ -257,6 +323,11 @@ class TestRide(models.Model):
         ordering = ['-created_at']
         verbose_name = "Test Ride"
         verbose_name_plural = "Test Rides"
+        constraints = [
+            # one open request per rider and bike; book_test_ride relies on this
+            models.UniqueConstraint(fields=['bike', 'user'], condition=models.Q(status='pending'),
+                                    name='testride_one_pending_per_user'),
+        ]
 
     def __str__(self):
         return f"TestRide #{self.pk} - {self.bike} by {self.user}"
@@ -482,3 +553,114 @@ class FAQ(models.Model):
 
     def __str__(self):
         return self.question
+
+
+# background image processing (see core/images.py and the process_image_jobs command)
+class ImageJob(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    MAX_ATTEMPTS = 3
+
+    # storage name of the original, e.g. bikes/3/Honda_Shine/side.png
+    name = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not claimed before this (retry backoff)")
+    locked_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='imagejob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+# outgoing email, sent by the send_queued_email command (see core/outbox.py)
+class OutboxEmail(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    MAX_ATTEMPTS = 5
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(help_text="List of recipient addresses")
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not sent before this (retry backoff)")
+    locked_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Outbox email"
+        verbose_name_plural = "Outbox"
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+# sell page pricing rules (compiled by core/pricing.py)
+from django.core.exceptions import ValidationError
+
+class PriceRule(models.Model):
+    KIND_BRAND = "brand"
+    KIND_VARIANT = "variant"
+    KIND_KMS = "kms"
+    KIND_OWNER = "owner"
+    KIND_CHOICES = [
+        (KIND_BRAND, "Brand base price"),
+        (KIND_VARIANT, "Variant multiplier"),
+        (KIND_KMS, "Kilometres multiplier"),
+        (KIND_OWNER, "Owner multiplier"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    pattern = models.CharField(
+        max_length=200,
+        help_text="Brand: exact brand name. Others: regular expression searched in the submitted "
+                  "value; the first active rule (by priority) that matches sets the multiplier.")
+    value = models.FloatField(help_text="Brand: base price in rupees. Others: multiplier, e.g. 0.9")
+    priority = models.PositiveIntegerField(default=100, help_text="Lower numbers are tried first")
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['kind', 'priority', 'pk']
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.pattern} = {self.value}"
+
+    def clean(self):
+        if self.kind != self.KIND_BRAND:
+            try:
+                re.compile(self.pattern)
+            except re.error as exc:
+                raise ValidationError({'pattern': f"Invalid regular expression: {exc}"})
@@ -0,0 +1,104 @@
+# core/outbox.py
+"""
+Email outbox: views queue messages in the OutboxEmail table and return at once;
+the send_queued_email command delivers them in batches over one connection.
+
+    queue_email(subject, body, ["sales@example.com"], reply_to=[visitor_email])
+
+send_queued_emails() claims up to `batch_size` due messages, opens the configured
+EMAIL_BACKEND once and sends them one by one, so a bad recipient only fails its own
+message. Failures are retried with exponential backoff (1, 2, 4, 8 minutes) and
+marked failed after OutboxEmail.MAX_ATTEMPTS. Works with any backend, including
+locmem and filebased for tests and local development.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import BadHeaderError, EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+RETRY_BACKOFF = 60  # seconds before the first retry; doubles each attempt
+
+
+def queue_email(subject, body, to, from_email=None, reply_to=()):
+    # refuse here what EmailMessage would refuse at send time, instead of retrying it
+    if any(c in value for value in (subject, from_email or '', *to, *reply_to) for c in '\r\n'):
+        raise BadHeaderError(f"Header values can't contain newlines (subject {subject!r})")
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, to=list(to), reply_to=list(reply_to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def claim_emails(limit):
+    """Take up to `limit` due messages; the conditional UPDATE keeps senders from doubling up."""
+    claimed = []
+    pending = OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING)
+    due = pending.filter(available_at__lte=timezone.now()).order_by('available_at', 'pk')
+    for pk in due.values_list('pk', flat=True)[:limit]:
+        if pending.filter(pk=pk).update(status=OutboxEmail.STATUS_SENDING, attempts=F('attempts') + 1,
+                                        locked_at=timezone.now()):
+            claimed.append(pk)
+    return list(OutboxEmail.objects.filter(pk__in=claimed))
+
+
+def requeue_stale_emails(older_than):
+    """Put back messages whose sender died mid-batch (sending for longer than `older_than` seconds)."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return OutboxEmail.objects.filter(status=OutboxEmail.STATUS_SENDING, locked_at__lt=cutoff).update(
+        status=OutboxEmail.STATUS_PENDING, locked_at=None)
+
+
+def _failed(email, error):
+    now = timezone.now()
+    if email.attempts < OutboxEmail.MAX_ATTEMPTS:
+        status, available_at = OutboxEmail.STATUS_PENDING, now + timedelta(seconds=RETRY_BACKOFF * 2 ** (email.attempts - 1))
+    else:
+        status, available_at = OutboxEmail.STATUS_FAILED, email.available_at
+    OutboxEmail.objects.filter(pk=email.pk).update(status=status, available_at=available_at, locked_at=None,
+                                                   last_error=error)
+
+
+def _message(email, connection):
+    return EmailMessage(email.subject, email.body, email.from_email, email.to,
+                        reply_to=email.reply_to or None, connection=connection)
+
+
+def send_queued_emails(batch_size=50):
+    """Send one batch of due messages. Returns (sent, failed)."""
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # server unreachable: the whole batch waits for its next attempt
+        logger.exception("Could not connect to the mail server")
+        for email in emails:
+            _failed(email, f"{type(exc).__name__}: {exc}")
+        return 0, len(emails)
+
+    sent = failed = 0
+    try:
+        for email in emails:
+            try:
+                _message(email, connection).send()
+            except Exception as exc:
+                logger.exception("Sending outbox email %s failed", email.pk)
+                _failed(email, f"{type(exc).__name__}: {exc}")
+                failed += 1
+            else:
+                OutboxEmail.objects.filter(pk=email.pk).update(
+                    status=OutboxEmail.STATUS_SENT, sent_at=timezone.now(), locked_at=None, last_error='')
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,100 @@
+# core/pagecache.py
+"""
+Whole-page cache for anonymous visitors.
+
+    @cache_anonymous_page(listing_page_key)
+    def buy_bike(request): ...
+
+Anonymous GET / HEAD requests for `/`, `/buy-bike/` and `/bike/<pk>/` are answered
+from the shared cache without running the view (no ORM, no template rendering).
+Logged-in users always get a freshly rendered page, because base.html and the detail
+page differ for them. Their requests don't read or fill the cache.
+
+Each key function returns (key, version):
+
+* home: ('home', 'home' generation)
+* listings: (path + hash of the normalized query string, 'bikes' generation). Saving
+  or deleting a Bike, or booking one, bumps that generation (core/signals.py,
+  Bike._set_booking).
+* detail: ('bike:<pk>', the bike's updated_at). Saving or deleting a Bike also
+  purges its entry (purge_bike_page); bookings and gallery changes move updated_at.
+
+The navbar ('chrome') generation is part of every version. A stored page is served
+only while its version matches. Generations are bumped, and detail pages purged, once
+the saving transaction commits (core/signals.py): a render that raced with a save read
+the old rows under the old version, so it is never served after the commit. The TTL
+bounds what nothing invalidates, e.g. responsive image derivatives finishing in the
+background.
+
+A response is only stored if rendering it left nothing per-visitor behind: a CSRF
+token, a flash message, a session write, or a cookie.
+
+settings.PAGE_CACHE_TIMEOUT sets the TTL in seconds; 0 or None turns the cache off.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .caching import get_generation
+from .conditional import bike_updated_at, normalized_query_string
+
+KEY_PREFIX = "core:page"
+DEFAULT_PAGE_CACHE_TIMEOUT = 60 * 10
+
+
+def home_page_key(request):
+    return 'home', get_generation('home')
+
+
+def listing_page_key(request):
+    query = hashlib.sha1(normalized_query_string(request.GET).encode()).hexdigest()
+    return f"{request.path}?{query}", get_generation('bikes')
+
+
+def bike_page_key(request, pk):
+    # shares the lookup with the ETag / Last-Modified validators
+    return f"bike:{pk}", bike_updated_at(request, pk)
+
+
+def purge_bike_page(pk):
+    cache.delete(f"{KEY_PREFIX}:bike:{pk}")
+
+
+def _is_anonymous_get(request):
+    return request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+
+
+def _is_shareable(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if 'private' in response.get('Cache-Control', '') or request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return False
+    messages = getattr(request, '_messages', None)
+    if messages is not None and (messages.used or messages.added_new):
+        return False
+    session = getattr(request, 'session', None)
+    return not (session is not None and session.modified)
+
+
+def cache_anonymous_page(key_func):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', DEFAULT_PAGE_CACHE_TIMEOUT)
+            if not timeout or not _is_anonymous_get(request):
+                return view(request, *args, **kwargs)
+            key, version = key_func(request, *args, **kwargs)
+            key, version = f"{KEY_PREFIX}:{key}", (get_generation('chrome'), version)
+            entry = cache.get(key)
+            if entry is not None and entry['version'] == version:
+                return HttpResponse(entry['content'], content_type=entry['content_type'])
+            response = view(request, *args, **kwargs)
+            if _is_shareable(request, response):
+                cache.set(key, {'version': version, 'content': response.content,
+                                'content_type': response['Content-Type']}, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,136 @@
+# core/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page remembers the sort key of its first/last row and the
+next query asks for rows strictly before/after that key. The ordering must end with
+a unique column (the pk) so the position is unambiguous:
+
+    page = paginate_keyset(qs, ('-created_at', '-pk'), request.GET.get('cursor'))
+
+Cursors are opaque url-safe tokens. A cursor made for a different ordering (or a
+mangled one) is ignored and the first page is returned.
+"""
+import base64
+import datetime
+import decimal
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    has_next: bool = False
+    has_previous: bool = False
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _split(key):
+    return (key[1:], True) if key.startswith("-") else (key, False)
+
+
+def _to_json(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def _from_json(model, name, value):
+    try:
+        model_field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # annotations (e.g. search rank) are stored as plain JSON values
+        return value
+    return model_field.to_python(value)
+
+
+def encode_cursor(ordering, direction, values):
+    payload = {"o": ",".join(ordering), "d": direction, "v": [_to_json(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(model, ordering, token):
+    """Return (direction, values) or None if the token is unusable."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["o"] != ",".join(ordering) or payload["d"] not in (NEXT, PREVIOUS):
+            return None
+        values = payload["v"]
+        if len(values) != len(ordering):
+            return None
+        names = [_split(key)[0] for key in ordering]
+        return payload["d"], [_from_json(model, n, v) for n, v in zip(names, values)]
+    except (ValueError, TypeError, KeyError, ValidationError):
+        return None
+
+
+def keyset_filter(ordering, values, direction):
+    """
+    Q object selecting rows after (NEXT) or before (PREVIOUS) `values` in `ordering`:
+    (a > x) OR (a = x AND b > y) OR ...  with > / < flipped for descending keys.
+    """
+    condition = Q()
+    equal_so_far = {}
+    for key, value in zip(ordering, values):
+        name, descending = _split(key)
+        forward = not descending if direction == NEXT else descending
+        lookup = "gt" if forward else "lt"
+        condition |= Q(**equal_so_far, **{f"{name}__{lookup}": value})
+        equal_so_far[name] = value
+    return condition
+
+
+def _reverse(ordering):
+    return [key[1:] if key.startswith("-") else f"-{key}" for key in ordering]
+
+
+def _row_values(obj, ordering):
+    return [getattr(obj, _split(key)[0]) for key in ordering]
+
+
+def paginate_keyset(queryset, ordering, cursor=None, per_page=24):
+    ordering = list(ordering)
+    decoded = decode_cursor(queryset.model, ordering, cursor)
+
+    if decoded is None:
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        has_next, has_previous = len(rows) > per_page, False
+        rows = rows[:per_page]
+    else:
+        direction, values = decoded
+        qs = queryset.filter(keyset_filter(ordering, values, direction))
+        if direction == NEXT:
+            rows = list(qs.order_by(*ordering)[:per_page + 1])
+            has_next, has_previous = len(rows) > per_page, True
+            rows = rows[:per_page]
+        else:
+            rows = list(qs.order_by(*_reverse(ordering))[:per_page + 1])
+            has_next, has_previous = True, len(rows) > per_page
+            rows = rows[:per_page][::-1]
+
+    page = KeysetPage(rows, has_next=has_next and bool(rows), has_previous=has_previous and bool(rows))
+    if page.has_next:
+        page.next_cursor = encode_cursor(ordering, NEXT, _row_values(rows[-1], ordering))
+    if page.has_previous:
+        page.previous_cursor = encode_cursor(ordering, PREVIOUS, _row_values(rows[0], ordering))
+    return page
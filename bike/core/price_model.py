@@ -0,0 +1,224 @@
+# core/price_model.py
+"""
+Sell-page price model fitted on our own published Bike listings.
+
+    log(price) = brand + a*log(cc) + b*age + c*log(1 + km) + d*owners
+
+(bikes without a parsable engine size get a separate `no_cc` term instead of
+a*log(cc)). The train_price_model command fits it with NumPy least squares and writes
+the coefficients to settings.PRICE_MODEL_PATH as JSON:
+
+    python manage.py train_price_model
+
+Workers load that file once (and again only when its mtime changes), and a
+prediction is a handful of float operations. The model only answers for brands with
+at least MIN_BRAND_LISTINGS listings; everything else returns None and
+core.pricing.estimate_price falls back to the PriceRule heuristic.
+"""
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Bike, parse_engine_cc
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MIN_LISTINGS = 200        # below this there is nothing worth fitting
+MIN_BRAND_LISTINGS = 25   # brands with fewer listings use the heuristic
+MAX_OWNERS = 3            # listings only record 1st / 2nd / 3rd+
+
+# coefficient order after the per-brand intercepts
+TERMS = ('log_cc', 'no_cc', 'age', 'log_km', 'owners')
+LISTING_OWNERS = {'1st': 1, '2nd': 2, '3rd+': 3}
+
+NUMBER_RE = re.compile(r'\d[\d,]*')
+OWNER_RE = re.compile(r'\d+')
+
+
+def kms_midpoint(kms):
+    """Kilometres for a sell-form range: "5001 - 10000" -> 7500.5, "Under 5,000" -> 2500."""
+    numbers = [int(n.replace(',', '')) for n in NUMBER_RE.findall(kms or '')]
+    if not numbers:
+        return None
+    if 'under' in kms.lower():
+        return numbers[0] / 2
+    return sum(numbers) / len(numbers)
+
+
+def owner_count(owner):
+    """'2nd Owner' -> 2; capped at MAX_OWNERS, 1 when there is no number."""
+    match = OWNER_RE.search(owner or '')
+    return min(MAX_OWNERS, max(1, int(match.group()))) if match else 1
+
+
+class PriceModel:
+    def __init__(self, brands, coef, reference_year, max_age, listings=0, rmse=None, trained_at=None):
+        self.brands = dict(brands)        # brand -> intercept
+        self.coef = dict(coef)            # TERMS -> coefficient
+        self.reference_year = reference_year
+        self.max_age = max_age            # ages are clipped to what the data covered
+        self.listings = listings
+        self.rmse = rmse                  # in log(price), ~ relative error
+        self.trained_at = trained_at
+
+    def covers(self, brand):
+        return brand in self.brands
+
+    def predict(self, brand, variant, year, kms, owner, current_year=None):
+        """Estimated price as a float, or None when the model can't answer."""
+        intercept = self.brands.get(brand)
+        km = kms_midpoint(kms)
+        if intercept is None or km is None:
+            return None
+        current_year = current_year or timezone.now().year
+        cc = parse_engine_cc(variant)
+        coef = self.coef
+        z = (intercept
+             + (coef['log_cc'] * math.log(cc) if cc else coef['no_cc'])
+             + coef['age'] * min(max(0, current_year - year), self.max_age)
+             + coef['log_km'] * math.log1p(km)
+             + coef['owners'] * owner_count(owner))
+        return math.exp(z)
+
+    def predict_many(self, rows, current_year=None):
+        """predict() for (brand, variant, year, kms, owner) rows; NaN where it can't answer."""
+        rows = list(rows)
+        if not rows:
+            return np.zeros(0)
+        current_year = current_year or timezone.now().year
+        brands, variants, years, kms, owners = zip(*rows)
+        coef = self.coef
+
+        # parse each distinct string once; None becomes NaN
+        def mapped(values, parse):
+            lookup = {value: parse(value) for value in set(values)}
+            return np.array([lookup[value] for value in values], dtype=np.float64)
+
+        intercept = mapped(brands, self.brands.get)
+        cc = mapped(variants, lambda v: parse_engine_cc(v) or None)
+        km = mapped(kms, kms_midpoint)
+        age = np.clip(current_year - np.asarray(years, dtype=np.float64), 0, self.max_age)
+        with np.errstate(invalid='ignore'):
+            cc_term = np.where(np.isnan(cc), coef['no_cc'], coef['log_cc'] * np.log(cc))
+        z = (intercept + cc_term + coef['age'] * age + coef['log_km'] * np.log1p(km)
+             + coef['owners'] * mapped(owners, owner_count))
+        return np.exp(z)
+
+    # serialization -------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'version': FORMAT_VERSION, 'trained_at': self.trained_at, 'listings': self.listings,
+            'rmse': self.rmse, 'reference_year': self.reference_year, 'max_age': self.max_age,
+            'brands': self.brands, 'coef': self.coef,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported price model version {data.get('version')!r}")
+        return cls(data['brands'], data['coef'], data['reference_year'], data['max_age'],
+                   listings=data.get('listings', 0), rmse=data.get('rmse'), trained_at=data.get('trained_at'))
+
+    def save(self, path):
+        # write + rename, so a worker never reads a half-written file
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(self.to_dict(), fh, indent=1)
+        os.replace(tmp, path)
+
+
+# training -------------------------------------------------------------------------
+
+def _design(rows, brand_index, reference_year):
+    """values_list() rows -> (X, log price) for one chunk."""
+    brands, ccs, years, kms, owners, prices = zip(*rows)
+    n, k = len(rows), len(brand_index)
+    X = np.zeros((n, k + len(TERMS)))
+    X[np.arange(n), [brand_index[b] for b in brands]] = 1.0
+    cc = np.array([np.nan if c is None else c for c in ccs], dtype=np.float64)
+    no_cc = np.isnan(cc)
+    X[:, k] = np.where(no_cc, 0.0, np.log(np.where(no_cc, 1.0, cc)))
+    X[:, k + 1] = no_cc
+    X[:, k + 2] = np.maximum(0, reference_year - np.array(years, dtype=np.float64))
+    X[:, k + 3] = np.log1p(np.array(kms, dtype=np.float64))
+    X[:, k + 4] = [LISTING_OWNERS.get(o, 1) for o in owners]
+    return X, np.log(np.array(prices, dtype=np.float64))
+
+
+def train_price_model(queryset=None, reference_year=None, chunk_size=50000):
+    """
+    Fit the model on published bikes. Rows are streamed in chunks and only the
+    normal equations (X'X, X'y) are kept, so memory doesn't grow with the table.
+    Raises ValueError when there are fewer than MIN_LISTINGS usable listings.
+    """
+    reference_year = reference_year or timezone.now().year
+    qs = (Bike.objects.filter(is_published=True) if queryset is None else queryset).filter(price__gt=0)
+
+    counts = dict(qs.order_by().values_list('brand').annotate(n=Count('pk')))
+    brands = sorted(brand for brand, n in counts.items() if n >= MIN_BRAND_LISTINGS)
+    total = sum(counts[brand] for brand in brands)
+    if total < MIN_LISTINGS:
+        raise ValueError(f"Only {total} listings from brands with {MIN_BRAND_LISTINGS}+ listings; "
+                         f"need at least {MIN_LISTINGS} to fit a price model.")
+
+    brand_index = {brand: i for i, brand in enumerate(brands)}
+    size = len(brands) + len(TERMS)
+    xtx, xty, yty, max_age = np.zeros((size, size)), np.zeros(size), 0.0, 0
+
+    rows = qs.filter(brand__in=brands).order_by().values_list(
+        'brand', 'engine_cc', 'make_year', 'kilometers', 'previous_owner', 'price').iterator(chunk_size=chunk_size)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        X, y = _design(chunk, brand_index, reference_year)
+        xtx += X.T @ X
+        xty += X.T @ y
+        yty += y @ y
+        max_age = max(max_age, int(X[:, len(brands) + 2].max()))
+
+    # lstsq copes with a singular X'X (e.g. no bike without an engine size)
+    beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+    sse = max(0.0, yty - 2 * beta @ xty + beta @ xtx @ beta)
+    return PriceModel(
+        brands=dict(zip(brands, beta[:len(brands)].tolist())),
+        coef=dict(zip(TERMS, beta[len(brands):].tolist())),
+        reference_year=reference_year, max_age=max_age, listings=total,
+        rmse=math.sqrt(sse / total), trained_at=timezone.now().isoformat(),
+    )
+
+
+# serving --------------------------------------------------------------------------
+
+_loaded = {}  # path -> (mtime_ns, PriceModel or None)
+
+
+def get_price_model():
+    """The model at settings.PRICE_MODEL_PATH, loaded once per file version (None if absent)."""
+    path = str(getattr(settings, 'PRICE_MODEL_PATH', '') or '')
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path) as fh:
+            model = PriceModel.from_dict(json.load(fh))
+    except (OSError, ValueError, KeyError):
+        logger.exception("Could not load the price model from %s", path)
+        model = None  # remembered for this mtime, so a bad file is logged once
+    _loaded[path] = (mtime, model)
+    return model
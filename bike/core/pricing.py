@@ -0,0 +1,131 @@
+# core/pricing.py
+"""
+Sell-page price estimates.
+
+    price = base(brand) * variant * age * kms * owner     -> rounded down to 100
+
+The brand base prices and the variant / kms / owner multipliers are PriceRule rows
+(editable in the admin). They are compiled once into a PricingEngine, i.e. a brand
+dict plus ordered lists of precompiled regexes, and cached per 'pricing'
+generation, which core/signals.py bumps whenever a rule changes.
+
+    engine = get_pricing_engine()
+    engine.quote("Honda", "Shine 125", 2019, "5,000 - 20,000", "1st Owner")
+    engine.quote_many(rows)      # rows of (brand, variant, year, kms, owner) -> numpy array
+
+quote_many() matches each distinct string once and does the arithmetic on whole
+NumPy columns in the same order as quote(), so both give identical prices.
+
+estimate_price() is what the sell page uses: the model trained on our listings
+(core/price_model.py) when one is deployed and covers the brand, else these rules.
+"""
+import re
+
+import numpy as np
+from django.utils import timezone
+
+from .caching import GenerationCache
+from .models import PriceRule
+from .price_model import get_price_model
+
+DEFAULT_BASE = 50000     # brands without a rule
+AGE_DEPRECIATION = 0.06  # per year
+AGE_FLOOR = 0.35         # never below 35% for age
+ROUND_TO = 100
+
+
+class PricingEngine:
+    def __init__(self, brand_base, variant_rules=(), kms_rules=(), owner_rules=()):
+        # *_rules: ordered [(compiled regex, multiplier)], first match wins
+        self.brand_base = dict(brand_base)
+        self.variant_rules = list(variant_rules)
+        self.kms_rules = list(kms_rules)
+        self.owner_rules = list(owner_rules)
+
+    @classmethod
+    def from_rules(cls, rules):
+        """Build from (kind, pattern, value) tuples already in priority order."""
+        brand_base, factors = {}, {PriceRule.KIND_VARIANT: [], PriceRule.KIND_KMS: [], PriceRule.KIND_OWNER: []}
+        for kind, pattern, value in rules:
+            if kind == PriceRule.KIND_BRAND:
+                brand_base.setdefault(pattern, value)
+            elif kind in factors:
+                factors[kind].append((re.compile(pattern, re.DOTALL), value))
+        return cls(brand_base, factors[PriceRule.KIND_VARIANT], factors[PriceRule.KIND_KMS],
+                   factors[PriceRule.KIND_OWNER])
+
+    @staticmethod
+    def _factor(rules, value):
+        for regex, factor in rules:
+            if regex.search(value):
+                return factor
+        return 1.0
+
+    def quote(self, brand, variant, year, kms, owner, current_year=None):
+        current_year = current_year or timezone.now().year
+        base = self.brand_base.get(brand, DEFAULT_BASE)
+        vf = self._factor(self.variant_rules, variant)
+        age = max(0, current_year - year)
+        age_factor = max(AGE_FLOOR, 1 - (age * AGE_DEPRECIATION))
+        kms_factor = self._factor(self.kms_rules, kms)
+        owner_factor = self._factor(self.owner_rules, owner)
+        price = int(round(base * vf * age_factor * kms_factor * owner_factor))
+        return (price // ROUND_TO) * ROUND_TO
+
+    def _column(self, values, lookup):
+        """Map a string column through `lookup`, calling it once per distinct value."""
+        uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        return np.array([lookup(v) for v in uniques.tolist()], dtype=np.float64)[inverse.reshape(-1)]
+
+    def quote_many(self, rows, current_year=None):
+        """Prices for an iterable of (brand, variant, year, kms, owner) as an int64 array."""
+        rows = list(rows)
+        if not rows:
+            return np.zeros(0, dtype=np.int64)
+        current_year = current_year or timezone.now().year
+        brands, variants, years, kms, owners = zip(*rows)
+
+        base = self._column(brands, lambda b: self.brand_base.get(b, DEFAULT_BASE))
+        vf = self._column(variants, lambda v: self._factor(self.variant_rules, v))
+        age = np.maximum(0, current_year - np.asarray(years, dtype=np.int64))
+        age_factor = np.maximum(AGE_FLOOR, 1 - (age * AGE_DEPRECIATION))
+        kms_factor = self._column(kms, lambda k: self._factor(self.kms_rules, k))
+        owner_factor = self._column(owners, lambda o: self._factor(self.owner_rules, o))
+
+        # same operation order as quote() so the floats round identically
+        price = np.rint(base * vf * age_factor * kms_factor * owner_factor).astype(np.int64)
+        return (price // ROUND_TO) * ROUND_TO
+
+
+def load_pricing_engine():
+    rules = PriceRule.objects.filter(is_active=True).order_by('kind', 'priority', 'pk')
+    return PricingEngine.from_rules(rules.values_list('kind', 'pattern', 'value'))
+
+
+pricing_cache = GenerationCache("pricing", load_pricing_engine)
+
+
+def get_pricing_engine():
+    return pricing_cache.get()
+
+
+def estimate_price(brand, variant, year, kms, owner, current_year=None):
+    model = get_price_model()
+    if model is not None:
+        price = model.predict(brand, variant, year, kms, owner, current_year=current_year)
+        if price is not None:
+            return (int(round(price)) // ROUND_TO) * ROUND_TO
+    return get_pricing_engine().quote(brand, variant, year, kms, owner, current_year=current_year)
+
+
+def estimate_many(rows, current_year=None):
+    """estimate_price() for (brand, variant, year, kms, owner) rows as an int64 array."""
+    rows = list(rows)
+    prices = get_pricing_engine().quote_many(rows, current_year=current_year)
+    model = get_price_model()
+    if model is not None and rows:
+        predicted = model.predict_many(rows, current_year=current_year)
+        known = ~np.isnan(predicted)
+        # np.rint rounds half to even like round(), so single and bulk estimates agree
+        prices[known] = (np.rint(predicted[known]).astype(np.int64) // ROUND_TO) * ROUND_TO
+    return prices
@@ -0,0 +1,71 @@
+# core/routers.py
+"""
+Send the read-only pages' content queries to a read replica.
+
+    @read_from_replica
+    def buy_bike(request): ...
+
+While a decorated view runs, reads of `core` models go to the 'replica' database
+alias if settings.DATABASES defines one (see settings.py). Everything else goes to
+'default': writes, other views, and auth / session lookups, which must see a login
+that just happened. Without a replica configured the router is a no-op.
+
+Anything stored under a cache generation (GenerationCache loaders, facet counts, the
+columnar index) is built inside primary_reads(). A replica that lags behind the write
+which bumped the generation would otherwise pin stale data until the next write.
+
+The flag is a ContextVar, so concurrent requests in threads or async tasks don't see
+each other's setting.
+"""
+import contextlib
+import functools
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+REPLICA_APPS = {'core'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_reads_active():
+    return _replica_reads.get()
+
+
+def read_from_replica(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+@contextlib.contextmanager
+def primary_reads():
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (_replica_reads.get() and model._meta.app_label in REPLICA_APPS
+                and REPLICA_ALIAS in settings.DATABASES):
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # same data on both aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
@@ -0,0 +1,105 @@
+# core/search.py
+"""
+Full-text search for the buy_bike `q` box.
+
+On SQLite the bikes are indexed in an FTS5 table (core_bike_fts) over brand, model,
+variant and location. It is an external-content table kept in sync by triggers on
+core_bike, so admin saves/deletes (and bulk inserts) update it without any Python
+code. Other databases fall back to the old icontains search.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "core_bike_fts"
+FTS_COLUMNS = "brand, model, variant, location"
+
+CREATE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {FTS_COLUMNS},
+        content='core_bike', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+]
+
+# separate from the table so they can be re-created after SQLite rebuilds core_bike
+# (the schema editor's table remake drops triggers along with the old table)
+CREATE_TRIGGERS_SQL = [
+    f"""CREATE TRIGGER IF NOT EXISTS core_bike_fts_ai AFTER INSERT ON core_bike BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.id, new.brand, new.model, new.variant, new.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_bike_fts_ad AFTER DELETE ON core_bike BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.id, old.brand, old.model, old.variant, old.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_bike_fts_au AFTER UPDATE OF {FTS_COLUMNS} ON core_bike BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.id, old.brand, old.model, old.variant, old.location);
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.id, new.brand, new.model, new.variant, new.location);
+    END""",
+]
+
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_bike_fts_ai",
+    "DROP TRIGGER IF EXISTS core_bike_fts_ad",
+    "DROP TRIGGER IF EXISTS core_bike_fts_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def install_fts(schema_editor, rebuild=True):
+    """Create (or repair) the FTS table + triggers. No-op on non-SQLite databases."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_FTS_SQL + CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+    if rebuild:
+        schema_editor.execute(REBUILD_SQL)
+
+
+def uninstall_fts(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def match_expression(q):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+    "royal enf" -> '"royal"* "enf"*'. Returns None if there is nothing to search for.
+    """
+    tokens = TOKEN_RE.findall(q or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_bikes(qs, q, rank=False):
+    """
+    Restrict `qs` to bikes matching `q`. With rank=True the rows are annotated with
+    `search_rank` (FTS5 bm25, lower is better) so they can be ordered by relevance.
+    """
+    if connections[qs.db].vendor != "sqlite":
+        qs = qs.filter(Q(brand__icontains=q) | Q(model__icontains=q) | Q(variant__icontains=q) | Q(location__icontains=q))
+        return qs.annotate(search_rank=RawSQL("0", (), output_field=FloatField())) if rank else qs
+
+    expression = match_expression(q)
+    if expression is None:
+        qs = qs.none()
+        return qs.annotate(search_rank=RawSQL("0", (), output_field=FloatField())) if rank else qs
+    qs = qs.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (expression,)))
+    if rank:
+        qs = qs.annotate(search_rank=RawSQL(
+            f"(SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = core_bike.id)",
+            (expression,), output_field=FloatField(),
+        ))
+    return qs
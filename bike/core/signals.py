@@ -0,0 +1,102 @@
+# core/signals.py
+# Cache invalidation hooks. Connected in CoreConfig.ready().
+#
+# Generations are bumped on commit, not from inside the saving transaction (the admin
+# saves atomically): a request running meanwhile still reads the old rows, and would
+# otherwise store them under the new generation, where nothing expires them.
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import bump_generation
+from .context_processors import chrome_cache
+from .images import enqueue_derivatives
+from .pagecache import purge_bike_page
+from .pricing import pricing_cache
+from .models import (
+    Bike, BikeImage, PriceRule, SiteBrand, NavItem, HomePage, HeroImage, HomeFeature, SupportSection, SupportItem,
+    SatisfiedCustomerSection, HappyCustomer, TrustedRidersSection, FAQ,
+)
+from .views import home_cache
+
+
+# navbar
+@receiver([post_save, post_delete], sender=SiteBrand)
+@receiver([post_save, post_delete], sender=NavItem)
+def invalidate_chrome(sender, using=None, **kwargs):
+    transaction.on_commit(chrome_cache.invalidate, using=using)
+
+
+# home page sections
+HOME_CONTENT_MODELS = (
+    HomePage, HeroImage, HomeFeature, SupportSection, SupportItem,
+    SatisfiedCustomerSection, HappyCustomer, TrustedRidersSection, FAQ,
+)
+
+
+def invalidate_home(sender, using=None, **kwargs):
+    transaction.on_commit(home_cache.invalidate, using=using)
+
+
+for _model in HOME_CONTENT_MODELS:
+    post_save.connect(invalidate_home, sender=_model, dispatch_uid=f"home-cache-save-{_model.__name__}")
+    post_delete.connect(invalidate_home, sender=_model, dispatch_uid=f"home-cache-delete-{_model.__name__}")
+
+
+# bike listings (facet counts, anonymous listing pages etc. are cached per 'bikes' generation);
+# the bike's own anonymous detail page is purged directly
+@receiver([post_save, post_delete], sender=Bike)
+def invalidate_listings(sender, instance, using=None, **kwargs):
+    pk = instance.pk  # cleared on the instance once a delete finishes
+
+    def invalidate():
+        bump_generation("bikes")
+        purge_bike_page(pk)
+
+    transaction.on_commit(invalidate, using=using)
+
+
+# the columnar listing index upserts saved rows by updated_at but must rebuild on deletes
+@receiver(post_delete, sender=Bike)
+def invalidate_listings_deleted(sender, using=None, **kwargs):
+    transaction.on_commit(lambda: bump_generation("bikes-deleted"), using=using)
+
+
+# the detail page's ETag / Last-Modified is the bike's updated_at (core/conditional.py),
+# so gallery changes move it too
+@receiver([post_save, post_delete], sender=BikeImage)
+def touch_bike_for_gallery(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Bike.objects.filter(pk=instance.bike_id).update(updated_at=timezone.now())
+
+
+# resized WebP/JPEG copies of newly uploaded photos, made by the process_image_jobs worker
+@receiver(post_save, sender=Bike)
+def queue_bike_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw:
+        enqueue_derivatives(instance.main_image)
+
+
+@receiver(post_save, sender=BikeImage)
+def queue_gallery_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw:
+        enqueue_derivatives(instance.image)
+
+
+# sell page pricing tables
+@receiver([post_save, post_delete], sender=PriceRule)
+def invalidate_pricing(sender, using=None, **kwargs):
+    transaction.on_commit(pricing_cache.invalidate, using=using)
+
+
+# SQLite: synchronous=NORMAL only once `manage.py enable_wal` has switched the file to
+# WAL; in rollback-journal mode it can corrupt the database on power loss
+@receiver(connection_created)
+def relax_sqlite_sync_in_wal_mode(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    # the raw connection: this runs while connecting, outside query logging
+    if connection.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        connection.connection.execute("PRAGMA synchronous=NORMAL")
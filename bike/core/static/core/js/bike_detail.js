@@ -1,16 +1,25 @@
 // bike_detail.js
 document.addEventListener('DOMContentLoaded', function () {
+  // copy the clicked thumb's responsive sources onto the main <picture> (sizes stay)
+  function showImage(main, thumb) {
+    const mainSource = main.parentElement.querySelector('source');
+    const thumbSource = thumb.parentElement.querySelector('source');
+    if (mainSource) mainSource.srcset = thumbSource ? thumbSource.srcset : '';
+    main.srcset = thumb.srcset || '';
+    main.src = thumb.src;
+  }
+
   // Thumbnail click -> change main image
   document.querySelectorAll('.thumb').forEach(t => {
     t.addEventListener('click', function () {
-      const url = this.dataset.src || this.src;
+      const thumb = this;
       const main = document.getElementById('mainBikeImage');
       if (main) {
         // simple fade effect
         main.style.transition = 'opacity .25s ease';
         main.style.opacity = 0;
         setTimeout(() => {
-          main.src = url;
+          showImage(main, thumb);
           main.style.opacity = 1;
         }, 180);
       }
@@ -43,19 +43,45 @@ document.addEventListener('DOMContentLoaded', function () {
       return;
     }
 
-    // show modal
-    successModal.style.display = 'flex';
-    successModal.setAttribute('aria-hidden', 'false');
+    // book on the server first: only one buyer can win a bike
+    const token = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    confirmBtn.disabled = true;
+    fetch(confirmBtn.dataset.bookUrl, {
+      method: 'POST',
+      headers: {
+        'X-CSRFToken': token ? token.value : '',
+        'X-Requested-With': 'XMLHttpRequest',
+        'Accept': 'application/json'
+      },
+      body: new URLSearchParams({ pay: sel.value })
+    })
+      .then(r => r.json().then(json => ({ status: r.status, json: json })))
+      .then(({ status, json }) => {
+        if (!json || !json.success) {
+          alert((json && json.message) || 'Could not book this bike. Please try again.');
+          if (status === 409) {
+            confirmBtn.textContent = 'Already Booked';
+          } else {
+            confirmBtn.disabled = false;
+          }
+          return;
+        }
 
-    // simulate server-side booking and redirect after a pause
-    setTimeout(function () {
-      // close and redirect (or you could POST to server)
-      // you said you want popup then redirect; adjust as needed
-      successModal.style.display = 'none';
-      successModal.setAttribute('aria-hidden', 'true');
-      // redirect back to home or details page
-      window.location.href = '/'; 
-    }, 1800);
+        // show modal
+        successModal.style.display = 'flex';
+        successModal.setAttribute('aria-hidden', 'false');
+
+        // close and redirect back to home after a pause
+        setTimeout(function () {
+          successModal.style.display = 'none';
+          successModal.setAttribute('aria-hidden', 'true');
+          window.location.href = '/';
+        }, 1800);
+      })
+      .catch(() => {
+        confirmBtn.disabled = false;
+        alert('Network error. Please try again.');
+      });
   });
 
   if (successClose) {
@@ -1,5 +1,5 @@
 // core/static/core/js/buybike.js
-// Full buybike.js: accessible single-click accordion + range sync + apply filters + sort auto-apply
+// Full buybike.js: accessible single-click accordion + range sync + apply filters (via /api/bikes/) + sort auto-apply
 
 document.addEventListener('DOMContentLoaded', function () {
   // ---------- Accordion toggles (accessible, single-click) ----------
@@ -77,50 +77,186 @@ document.addEventListener('DOMContentLoaded', function () {
     });
   }
 
-  // ---------- Apply Filters: build query string & redirect ----------
+  // ---------- facet histogram bands fill the min/max inputs ----------
+  document.querySelectorAll('.facet-band').forEach(band => {
+    band.addEventListener('click', function () {
+      const minInput = document.querySelector(band.dataset.minTarget);
+      const maxInput = document.querySelector(band.dataset.maxTarget);
+      if (minInput) minInput.value = band.dataset.min;
+      if (maxInput) {
+        maxInput.value = band.dataset.max;
+        maxInput.dispatchEvent(new Event('input'));
+      }
+    });
+  });
+
+  // ---------- Apply Filters: build query string & fetch results ----------
   const applyBtn = document.getElementById('applyFilters');
-  if (applyBtn) {
-    applyBtn.addEventListener('click', function () {
-      const params = new URLSearchParams();
+  const grid = document.getElementById('productsGrid');
+  const pager = document.getElementById('pager');
+  const totalCount = document.getElementById('totalCount');
+
+  function buildParams() {
+    const params = new URLSearchParams();
+
+    // categories (multiple)
+    document.querySelectorAll('.cat-checkbox:checked').forEach(c => params.append('category', c.value));
+
+    // brands
+    document.querySelectorAll('.brand-checkbox:checked').forEach(b => params.append('brand', b.value));
 
-      // categories (multiple)
-      document.querySelectorAll('.cat-checkbox:checked').forEach(c => params.append('category', c.value));
+    // price
+    if (minPrice && minPrice.value) params.set('min_price', minPrice.value);
+    if (maxPrice && maxPrice.value) params.set('max_price', maxPrice.value);
 
-      // brands
-      document.querySelectorAll('.brand-checkbox:checked').forEach(b => params.append('brand', b.value));
+    // year
+    if (minYear && minYear.value) params.set('min_year', minYear.value);
+    if (maxYear && maxYear.value) params.set('max_year', maxYear.value);
 
-      // price
-      if (minPrice && minPrice.value) params.set('min_price', minPrice.value);
-      if (maxPrice && maxPrice.value) params.set('max_price', maxPrice.value);
+    // km
+    if (maxKm && maxKm.value) params.set('max_km', maxKm.value);
 
-      // year
-      if (minYear && minYear.value) params.set('min_year', minYear.value);
-      if (maxYear && maxYear.value) params.set('max_year', maxYear.value);
+    // cc (single radio)
+    const cc = document.querySelector('input[name="cc"]:checked');
+    if (cc) params.set('cc', cc.value);
 
-      // km
-      if (maxKm && maxKm.value) params.set('max_km', maxKm.value);
+    // fuel
+    document.querySelectorAll('input[name="fuel"]:checked').forEach(f => params.append('fuel', f.value));
 
-      // cc (single radio)
-      const cc = document.querySelector('input[name="cc"]:checked');
-      if (cc) params.set('cc', cc.value);
+    // owners
+    document.querySelectorAll('input[name="owner"]:checked').forEach(o => params.append('owner', o.value));
 
-      // fuel
-      document.querySelectorAll('input[name="fuel"]:checked').forEach(f => params.append('fuel', f.value));
+    // sort
+    const sort = document.getElementById('sortSelect');
+    if (sort && sort.value) params.set('sort', sort.value);
 
-      // sort
-      const sort = document.getElementById('sortSelect');
-      if (sort && sort.value) params.set('sort', sort.value);
+    // keep existing location / search params if present
+    const q = new URLSearchParams(window.location.search);
+    if (q.get('location')) params.set('location', q.get('location'));
+    if (q.get('q')) params.set('q', q.get('q'));
 
-      // keep existing location param if present
-      const q = new URLSearchParams(window.location.search);
-      if (q.get('location')) params.set('location', q.get('location'));
+    return params;
+  }
+
+  function escapeHtml(value) {
+    return String(value == null ? '' : value).replace(/[&<>"']/g, ch => ({
+      '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    }[ch]));
+  }
+
+  function capfirst(value) {
+    value = String(value || '');
+    return value.charAt(0).toUpperCase() + value.slice(1);
+  }
 
-      // build URL and redirect
-      const url = window.location.pathname + (params.toString() ? ('?' + params.toString()) : '');
-      window.location.href = url;
+  // must match the card markup in buy_bike.html
+  function cardHtml(bike) {
+    const d = grid.dataset;
+    // same markup as the {% responsive_image %} tag
+    const srcset = bike.image_srcset || {};
+    const sizes = escapeHtml(d.imageSizes);
+    const image = bike.image
+      ? `<picture>${srcset.webp ? `<source type="image/webp" srcset="${escapeHtml(srcset.webp)}" sizes="${sizes}">` : ''}` +
+        `<img src="${escapeHtml(bike.image)}" alt="${escapeHtml(bike.alt)}" decoding="async" loading="lazy"` +
+        `${srcset.jpg ? ` srcset="${escapeHtml(srcset.jpg)}" sizes="${sizes}"` : ''}></picture>`
+      : '<div class="image-fake">No Image</div>';
+    return `
+      <article class="product-card">
+        <a class="card-link" href="${escapeHtml(bike.url)}">
+          <div class="card-image">
+            ${bike.is_booked ? '<span class="badge booked">Booked</span>' : ''}
+            ${image}
+            <img class="logo-watermark" src="${escapeHtml(d.logoSrc)}" alt="DriveRP logo">
+          </div>
+          <div class="card-body">
+            <div class="title">${escapeHtml(bike.title)}</div>
+            <div class="meta">
+              <span class="km"><img src="${escapeHtml(d.kmIcon)}" alt="km" class="icon"> ${escapeHtml(bike.kilometers)} Km • ${escapeHtml(capfirst(bike.fuel_type))} • ${escapeHtml(bike.previous_owner)} Owner</span>
+            </div>
+            <div class="price">₹ ${escapeHtml(bike.price)}</div>
+            <div class="location"><img src="${escapeHtml(d.locationIcon)}" class="icon"> ${escapeHtml(bike.location)}</div>
+          </div>
+        </a>
+      </article>`;
+  }
+
+  function pagerHtml(params, data) {
+    let html = '';
+    if (data.previous_cursor) {
+      const prev = new URLSearchParams(params);
+      prev.set('cursor', data.previous_cursor);
+      html += `<a class="btn link" href="?${escapeHtml(prev.toString())}" rel="prev">← Previous</a>`;
+    }
+    if (data.next_cursor) {
+      const next = new URLSearchParams(params);
+      next.set('cursor', data.next_cursor);
+      html += `<a class="btn primary" href="?${escapeHtml(next.toString())}" rel="next">Next →</a>`;
+    }
+    return html;
+  }
+
+  // refresh the sidebar counts from the API facets (input name -> facet key)
+  const FACET_INPUTS = { category: 'category', brand: 'brand', fuel: 'fuel_type', owner: 'previous_owner', cc: 'cc' };
+  function updateFacetCounts(facets) {
+    if (!facets) return;
+    Object.keys(FACET_INPUTS).forEach(name => {
+      const counts = {};
+      (facets[FACET_INPUTS[name]] || []).forEach(f => { counts[f.value] = f.count; });
+      document.querySelectorAll(`input[name="${name}"]`).forEach(input => {
+        const badge = input.closest('label') && input.closest('label').querySelector('.facet-count');
+        if (badge) badge.textContent = counts[input.value] || 0;
+      });
     });
   }
 
+  // fetch JSON for `params` and patch only the results grid (falls back to a full load)
+  function loadResults(params, pushState) {
+    const query = params.toString();
+    const pageUrl = window.location.pathname + (query ? ('?' + query) : '');
+    if (!grid || !grid.dataset.api || !window.fetch) {
+      window.location.href = pageUrl;
+      return;
+    }
+    grid.setAttribute('aria-busy', 'true');
+    fetch(grid.dataset.api + (query ? ('?' + query) : ''), { headers: { 'Accept': 'application/json' } })
+      .then(resp => {
+        if (!resp.ok) throw new Error('HTTP ' + resp.status);
+        return resp.json();
+      })
+      .then(data => {
+        grid.innerHTML = data.results.map(cardHtml).join('');
+        if (pager) pager.innerHTML = pagerHtml(params, data);
+        if (totalCount) totalCount.textContent = data.total;
+        updateFacetCounts(data.facets);
+        if (pushState) window.history.pushState({ buybike: true }, '', pageUrl);
+      })
+      .catch(() => { window.location.href = pageUrl; })
+      .finally(() => grid.removeAttribute('aria-busy'));
+  }
+
+  if (applyBtn) {
+    applyBtn.addEventListener('click', function () {
+      loadResults(buildParams(), true);
+    });
+  }
+
+  // next / previous links
+  if (pager) {
+    pager.addEventListener('click', function (ev) {
+      const link = ev.target.closest('a[href]');
+      if (!link) return;
+      ev.preventDefault();
+      loadResults(new URLSearchParams(link.getAttribute('href').split('?')[1] || ''), true);
+      const products = document.querySelector('.products');
+      if (products) products.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    });
+  }
+
+  // back / forward between fetched states
+  window.addEventListener('popstate', function () {
+    loadResults(new URLSearchParams(window.location.search), false);
+  });
+
   // ---------- sort auto apply ----------
   const sortSelect = document.getElementById('sortSelect');
   if (sortSelect) {
@@ -128,10 +264,10 @@ document.addEventListener('DOMContentLoaded', function () {
       // trigger apply button to reuse same logic
       if (applyBtn) applyBtn.click();
       else {
-        // fallback: append sort and reload
         const params = new URLSearchParams(window.location.search);
+        params.delete('cursor');
         params.set('sort', sortSelect.value);
-        window.location.href = window.location.pathname + '?' + params.toString();
+        loadResults(params, true);
       }
     });
   }
@@ -0,0 +1,28 @@
+# core/storage.py
+"""
+Static files storage (settings.STORAGES['staticfiles']).
+
+WhiteNoise's CompressedManifestStaticFilesStorage: collectstatic writes hashed,
+precompressed copies and {% static %} resolves names through their manifest.
+
+Before collectstatic has written a manifest there is nothing to resolve through.
+With DEBUG on, or in a test run (any runner: Django's, pytest-django, ...), names are
+then used as they are and served by the staticfiles finders. Anywhere else a missing
+manifest raises "Missing staticfiles manifest entry", as Django's strict storage
+does, rather than quietly serving unhashed URLs that can't be cached as immutable.
+"""
+from django.conf import settings
+from django.core import mail
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+def _plain_names_allowed():
+    # setup_test_environment() creates mail.outbox, teardown removes it
+    return settings.DEBUG or hasattr(mail, 'outbox')
+
+
+class ManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    def stored_name(self, name):
+        if not self.hashed_files and _plain_names_allowed():  # no manifest loaded or written yet
+            return name
+        return super().stored_name(name)
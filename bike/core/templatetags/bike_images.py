@@ -0,0 +1,32 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.images import responsive_sources
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, alt="", sizes="100vw", lazy=True, **attrs):
+    """
+    <picture> for an image field with WebP + JPEG srcsets from core/images.py:
+
+        {% responsive_image bike.main_image alt=bike.model sizes="(max-width: 640px) 100vw, 33vw" %}
+
+    Extra keyword arguments become <img> attributes (id, class, ...). Pass lazy=False
+    for the above-the-fold image. Images without derivatives get the original as src.
+    """
+    sources = responsive_sources(field_file)
+    if sources is None:
+        return ""
+    img_attrs = {"src": sources["src"], "alt": alt, "decoding": "async", **attrs}
+    if lazy:
+        img_attrs["loading"] = "lazy"
+    else:
+        img_attrs["fetchpriority"] = "high"
+    webp = ""
+    if sources["srcset"]:
+        img_attrs.update(srcset=sources["srcset"]["jpg"], sizes=sizes)
+        webp = format_html('<source type="image/webp" srcset="{}" sizes="{}">', sources["srcset"]["webp"], sizes)
+    return format_html("<picture>{}<img{}></picture>", webp, flatatt(img_attrs))
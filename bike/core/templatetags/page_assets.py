@@ -0,0 +1,48 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from core.assets import built_bundles, page_files
+
+register = template.Library()
+
+
+def _built(page):
+    # while developing, the source files are linked one by one (no rebuild after edits)
+    if settings.DEBUG:
+        return None
+    return built_bundles().get(page)
+
+
+@register.simple_tag
+def page_styles(page):
+    """
+    Stylesheets for a page in core/assets.py PAGES, for <head>:
+
+        {% block head %}{% page_styles "home" %}{% page_scripts "home" %}{% endblock %}
+
+    After build_assets this is the page's single bundle. For pages with critical CSS,
+    that CSS is inlined and the bundle loads without blocking rendering.
+    """
+    built = _built(page)
+    if built is None:
+        return format_html_join("", '<link rel="stylesheet" href="{}">', ((static(name),) for name in page_files(page, "css")))
+    href = static(built["css"])
+    if "critical" not in built:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>'
+        '<link rel="preload" as="style" href="{}" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(built["critical"].replace("</", "<\\/")), href, href,
+    )
+
+
+@register.simple_tag
+def page_scripts(page):
+    """Deferred <script> tags for a page: its bundle after build_assets, else base.js + its own."""
+    built = _built(page)
+    names = [built["js"]] if built else page_files(page, "js")
+    return format_html_join("", '<script defer src="{}"></script>', ((static(name),) for name in names))
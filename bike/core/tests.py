@@ -1,3 +1,1802 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings as django_settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core import mail
+from django.core.mail import BadHeaderError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse, QueryDict
+from django.middleware.csrf import get_token
+from django.template import Context, Template
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import assets
+from .backends import users_matching
+from .caching import get_generation
+from .routers import ReplicaRouter, primary_reads, read_from_replica, replica_reads_active
+from .context_processors import chrome_cache
+from .images import claim_image_jobs, derivative_name, derivative_widths, requeue_stale_image_jobs
+from .listing import BIKE_SORTS, bike_facets, bike_listing_page, filter_bikes, parse_bike_filters
+from .models import (
+    FAQ, Bike, BikeImage, HomePage, ImageJob, NavItem, OutboxEmail, PriceRule, SellRequest, SiteBrand, TestRide,
+)
+from .outbox import queue_email, send_queued_emails
+from .pagecache import KEY_PREFIX as PAGE_KEY_PREFIX, cache_anonymous_page
+from .pagination import NEXT, keyset_filter
+from .price_model import get_price_model
+from .throttle import SlidingWindowLimiter, client_ip, throttle_stats
+from .valuation import value_rows
+from .pricing import PricingEngine, estimate_many, estimate_price, get_pricing_engine, pricing_cache
+from .views import home_cache
+
+from PIL import Image
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+User = get_user_model()
+
+
+def make_bike(owner, **kwargs):
+    fields = dict(
+        owner=owner, brand="Honda", model="Shine", variant="124cc",
+        make_year=2020, kilometers=12000, price=55000, location="Chennai",
+        is_published=True,
+    )
+    fields.update(kwargs)
+    return Bike.objects.create(**fields)
+
+
+def clear_caches():
+    cache.clear()
+    chrome_cache._local.cache_clear()
+    home_cache._local.cache_clear()
+    pricing_cache._local.cache_clear()
+
+
+class SiteChromeCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        cls.bike = make_bike(cls.owner)
+        SiteBrand.objects.create(left_text="Drive", right_text="RP")
+        NavItem.objects.create(title="Home", url="/", order=0)
+        NavItem.objects.create(title="Buy Bike", url="/buy-bike/", order=1)
+
+    def setUp(self):
+        clear_caches()
+
+    def page_urls(self):
+        return [
+            reverse("home"),
+            reverse("buy-bike"),
+            reverse("sell-bike"),
+            reverse("about"),
+            reverse("contact"),
+            reverse("login"),
+            reverse("bike-detail", args=[self.bike.pk]),
+        ]
+
+    def capture(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response, [q["sql"] for q in ctx.captured_queries]
+
+    def test_warm_pages_skip_chrome_queries(self):
+        for url in self.page_urls():
+            with self.subTest(url=url):
+                clear_caches()
+                _, cold = self.capture(url)
+                response, warm = self.capture(url)
+                self.assertLessEqual(len(warm), len(cold) - 2)
+                self.assertFalse([sql for sql in warm if "core_sitebrand" in sql or "core_navitem" in sql])
+                self.assertContains(response, "Buy Bike")
+
+    def test_save_and_delete_invalidate_chrome(self):
+        url = reverse("contact")
+        self.capture(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            NavItem.objects.create(title="Sell Bike", url="/sell-bike/", order=2)
+        response, queries = self.capture(url)
+        self.assertContains(response, "Sell Bike")
+        self.assertTrue([sql for sql in queries if "core_navitem" in sql])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteBrand.objects.all().delete()
+        response, _ = self.capture(url)
+        self.assertNotContains(response, 'class="script-left">Drive<')
+
+    def test_generation_moves_only_after_commit(self):
+        # a concurrent request must not cache the pre-save rows under the new generation
+        generation = get_generation("chrome")
+        with self.captureOnCommitCallbacks(execute=True):
+            NavItem.objects.create(title="Sell Bike", url="/sell-bike/", order=2)
+            self.assertEqual(get_generation("chrome"), generation)
+        self.assertGreater(get_generation("chrome"), generation)
+
+
+class HomeContentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        HomePage.objects.create(hero_heading="Ride more, spend less")
+        FAQ.objects.create(question="Is the fee refundable?", answer="Yes.")
+
+    def setUp(self):
+        clear_caches()
+
+    def test_warm_home_page_runs_no_queries(self):
+        self.client.get(reverse("home"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("home"))
+        self.assertContains(response, "Ride more, spend less")
+        self.assertContains(response, "Is the fee refundable?")
+
+    def test_admin_edit_rebuilds_on_next_request(self):
+        self.client.get(reverse("home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQ.objects.create(question="Do you deliver?", answer="Across Tamil Nadu.")
+        self.assertContains(self.client.get(reverse("home")), "Do you deliver?")
+
+        page = HomePage.objects.get()
+        page.hero_heading = "Fresh hero copy"
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save()
+        self.assertContains(self.client.get(reverse("home")), "Fresh hero copy")
+
+    def test_page_rendered_during_an_edit_is_not_kept(self):
+        self.client.get(reverse("home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQ.objects.create(question="Do you deliver?", answer="Across Tamil Nadu.")
+            # still the pre-edit generation: whatever a concurrent request caches now
+            # is dropped by the bump on commit
+            self.assertNotContains(self.client.get(reverse("home")), "Do you deliver?")
+        self.assertContains(self.client.get(reverse("home")), "Do you deliver?")
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)  # every page render is inspected
+class BuyBikeKeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        # equal prices force the pk tie-breaker to do its job
+        for i in range(45):
+            make_bike(cls.owner, brand="Honda" if i % 3 else "TVS", model=f"M{i:02d}", price=40000 + (i % 4) * 1000)
+        make_bike(cls.owner, brand="Honda", model="Hidden", is_published=False)
+
+    def walk(self, params):
+        """Follow next cursors to the end, then previous cursors back to the start."""
+        url = reverse("buy-bike")
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            page = response.context["page"]
+            pages.append([b.pk for b in page])
+            if not page.has_next:
+                break
+            response = self.client.get(url, {**params, "cursor": page.next_cursor})
+        backwards = [pages[-1]]
+        while response.context["page"].has_previous:
+            response = self.client.get(url, {**params, "cursor": response.context["page"].previous_cursor})
+            backwards.append([b.pk for b in response.context["page"]])
+        return pages, backwards[::-1]
+
+    def test_pages_cover_every_row_once_in_sort_order(self):
+        orderings = {
+            "newest": ("-created_at", "-pk"),
+            "price_asc": ("price", "pk"),
+            "price_desc": ("-price", "-pk"),
+            "alpha": ("brand", "model", "pk"),
+        }
+        for sort, ordering in orderings.items():
+            with self.subTest(sort=sort):
+                pages, backwards = self.walk({"sort": sort})
+                expected = list(Bike.objects.filter(is_published=True).order_by(*ordering).values_list("pk", flat=True))
+                self.assertEqual(sum(pages, []), expected)
+                self.assertEqual(pages, backwards)
+                self.assertEqual(len(pages), 2)
+
+    def test_cursor_keeps_filters_and_never_uses_offset(self):
+        params = {"brand": "Honda", "sort": "price_asc"}
+        first = self.client.get(reverse("buy-bike"), params)
+        self.assertEqual(first.context["total_count"], 30)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(reverse("buy-bike"), {**params, "cursor": first.context["page"].next_cursor})
+        self.assertFalse([q["sql"] for q in ctx.captured_queries if "OFFSET" in q["sql"]])
+        shown = [b.brand for b in first.context["page"]] + [b.brand for b in second.context["page"]]
+        self.assertEqual(shown, ["Honda"] * 30)
+
+    def test_foreign_or_garbage_cursor_falls_back_to_first_page(self):
+        first = self.client.get(reverse("buy-bike"), {"sort": "newest"})
+        token = first.context["page"].next_cursor
+        for params in ({"sort": "price_asc", "cursor": token}, {"cursor": "not-a-cursor"}):
+            page = self.client.get(reverse("buy-bike"), params).context["page"]
+            self.assertFalse(page.has_previous)
+            self.assertEqual(len(page), 24)
+
+
+class BikeListApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        for i in range(30):
+            make_bike(cls.owner, brand="Honda" if i % 2 else "TVS", model=f"M{i:02d}", price=30000 + i * 1000)
+
+    def test_api_matches_page_filters_and_pages(self):
+        params = {"brand": "Honda", "min_price": "35000", "sort": "price_desc"}
+        page = self.client.get(reverse("buy-bike"), params).context
+        data = self.client.get(reverse("api-bikes"), params).json()
+
+        self.assertEqual(data["total"], page["total_count"])
+        self.assertEqual([c["id"] for c in data["results"]], [b.pk for b in page["bikes"]])
+        self.assertIsNone(data["next_cursor"])
+        self.assertEqual([f["value"] for f in data["facets"]["brand"]], ["Honda", "TVS"])
+
+        card = data["results"][0]
+        self.assertEqual(card["price"], "59,000.00")
+        self.assertEqual(card["url"], reverse("bike-detail", args=[card["id"]]))
+
+    def test_api_cursor_walks_to_second_page(self):
+        first = self.client.get(reverse("api-bikes")).json()
+        self.assertEqual(len(first["results"]), 24)
+        second = self.client.get(reverse("api-bikes"), {"cursor": first["next_cursor"]}).json()
+        self.assertEqual(len(second["results"]), 6)
+        self.assertIsNotNone(second["previous_cursor"])
+
+
+class EngineCcTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+
+    def test_parse_engine_cc(self):
+        from .models import parse_engine_cc
+        self.assertEqual(parse_engine_cc("124.8cc"), 125)
+        self.assertEqual(parse_engine_cc("Classic 350 CC"), 350)
+        self.assertEqual(parse_engine_cc("97.2cc BS6"), 97)
+        self.assertIsNone(parse_engine_cc("3.0kWh"))
+        self.assertIsNone(parse_engine_cc(None))
+
+    def test_save_keeps_engine_cc_in_sync(self):
+        bike = make_bike(self.owner, variant="109.51cc")
+        self.assertEqual(bike.engine_cc, 110)
+        bike.variant = "349cc"
+        bike.save(update_fields=["variant"])
+        bike.refresh_from_db()
+        self.assertEqual(bike.engine_cc, 349)
+
+    def test_cc_buckets_filter_by_engine_size(self):
+        small = make_bike(self.owner, variant="97.2cc")
+        mid = make_bike(self.owner, variant="149cc")
+        big = make_bike(self.owner, variant="349cc")
+        make_bike(self.owner, variant="3.0kWh")
+        expected = {"below100": [small], "below200": [small, mid], "below300": [small, mid], "below400": [small, mid, big]}
+        for bucket, bikes in expected.items():
+            with self.subTest(cc=bucket):
+                response = self.client.get(reverse("buy-bike"), {"cc": bucket})
+                self.assertEqual({b.pk for b in response.context["bikes"]}, {b.pk for b in bikes})
+
+    def test_fixture_carries_engine_cc(self):
+        # loaddata saves raw, skipping Bike.save()
+        from .models import parse_engine_cc
+        call_command("loaddata", "bikes_fixture_18_with_category", verbosity=0)
+        bikes = Bike.objects.filter(pk__in=range(2, 20))
+        self.assertEqual(len(bikes), 18)
+        for bike in bikes:
+            self.assertEqual(bike.engine_cc, parse_engine_cc(bike.variant), bike.variant)
+        self.assertEqual(bikes.filter(engine_cc__isnull=False).count(), 11)  # the rest are electric
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class BikeListingQueryPlanTests(TestCase):
+    """Every common buy_bike filter/sort combination must be answered from an index."""
+
+    COMBINATIONS = [
+        "",
+        "sort=price_asc",
+        "sort=price_desc",
+        "sort=alpha",
+        "category=scooter",
+        "category=motorbike&sort=price_asc",
+        "brand=Honda&brand=TVS",
+        "brand=Honda&sort=alpha",
+        "fuel=petrol",
+        "min_year=2015&max_year=2020",
+        "max_km=20000",
+        "min_price=10000&max_price=200000&sort=price_asc",
+        "cc=below200",
+        "min_price=10000&max_price=200000&min_year=2007&max_year=2025&max_km=100000",
+        "q=honda",
+        "q=roy enf&sort=price_asc",
+    ]
+    FULL_SCAN_RE = re.compile(r"\bSCAN (core_bike\b|\"core_bike\")(?! USING)")
+    CURSOR_VALUES = {"created_at": timezone.now(), "price": 50000, "brand": "Honda", "model": "Shine",
+                     "search_rank": -1.0, "pk": 10}
+
+    def assertIndexed(self, qs, label):
+        plan = qs.explain()
+        self.assertIsNone(self.FULL_SCAN_RE.search(plan), f"{label} falls back to a full table scan:\n{plan}")
+
+    def test_common_filters_use_indexes(self):
+        for combination in self.COMBINATIONS:
+            with self.subTest(params=combination):
+                filters = parse_bike_filters(QueryDict(combination))
+                qs = filter_bikes(filters)
+                ordering = BIKE_SORTS[filters["sort"]]
+                values = [self.CURSOR_VALUES[key.lstrip("-")] for key in ordering]
+
+                self.assertIndexed(qs.order_by(*ordering)[:25], "first page")
+                self.assertIndexed(qs.filter(keyset_filter(ordering, values, NEXT)).order_by(*ordering)[:25], "next page")
+                self.assertIndexed(qs.values("pk"), "count")
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "FTS5 index is SQLite only")
+class BikeFullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        cls.classic = make_bike(cls.owner, brand="Royal Enfield", model="Classic", variant="349cc", location="Madurai")
+        cls.shine = make_bike(cls.owner, brand="Honda", model="Shine", variant="124cc", location="Chennai")
+        cls.activa = make_bike(cls.owner, brand="Honda", model="Activa", variant="109.51cc", location="Coimbatore")
+
+    def search(self, q, **params):
+        return [b.pk for b in self.client.get(reverse("buy-bike"), {"q": q, **params}).context["bikes"]]
+
+    def test_prefix_terms_must_all_match(self):
+        self.assertEqual(self.search("roy enf"), [self.classic.pk])
+        self.assertEqual(set(self.search("hon")), {self.shine.pk, self.activa.pk})
+        self.assertEqual(self.search("honda chen"), [self.shine.pk])
+        self.assertEqual(self.search("!!"), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.shine.location = "Salem"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shine.save()
+        self.assertEqual(self.search("chennai"), [])
+        self.assertEqual(self.search("salem"), [self.shine.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new = make_bike(self.owner, brand="KTM", model="Duke", variant="390cc", location="Trichy")
+        self.assertEqual(self.search("duke"), [new.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            new.delete()
+        self.assertEqual(self.search("duke"), [])
+
+    def test_default_sort_is_relevance_and_pages_by_rank(self):
+        make_bike(self.owner, brand="Honda", model="Honda Honda", variant="Honda", location="Honda Nagar")
+        response = self.client.get(reverse("buy-bike"), {"q": "honda"})
+        self.assertEqual(response.context["selected_sort"], "relevance")
+        ranks = [b.search_rank for b in response.context["bikes"]]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(response.context["bikes"][0].model, "Honda Honda")
+        # an explicit sort still wins, and relevance is ignored without a query
+        self.assertEqual(self.client.get(reverse("buy-bike"), {"q": "honda", "sort": "price_asc"}).context["selected_sort"], "price_asc")
+        self.assertEqual(self.client.get(reverse("buy-bike"), {"sort": "relevance"}).context["selected_sort"], "newest")
+
+
+class BikeFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        make_bike(cls.owner, brand="Honda", category="scooter", variant="109cc", price=45000, make_year=2019)
+        make_bike(cls.owner, brand="Honda", category="motorbike", variant="149cc", price=90000, make_year=2021)
+        make_bike(cls.owner, brand="TVS", category="scooter", variant="124cc", price=60000, make_year=2019,
+                  previous_owner="2nd")
+        make_bike(cls.owner, brand="Bajaj", category="ev", variant="3.0kWh", fuel_type="electric", price=120000,
+                  make_year=2023)
+        make_bike(cls.owner, brand="KTM", variant="390cc", price=250000, is_published=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, query):
+        return bike_facets(parse_bike_filters(QueryDict(query)))
+
+    def counts(self, facet):
+        return {f["value"]: f["count"] for f in facet}
+
+    def test_counts_ignore_own_selection_only(self):
+        facets = self.facets("brand=Honda&category=scooter")
+        # brand facet: other brands still offered, restricted by category
+        self.assertEqual(self.counts(facets["brand"]), {"Honda": 1, "TVS": 1})
+        # category facet: restricted by brand, not by category
+        self.assertEqual(self.counts(facets["category"]), {"scooter": 1, "motorbike": 1, "ev": 0})
+        self.assertEqual(self.counts(facets["previous_owner"]), {"1st": 1, "2nd": 0, "3rd+": 0})
+        self.assertEqual(self.counts(facets["cc"]), {"below100": 0, "below200": 1, "below300": 1, "below400": 1})
+
+    def test_unpublished_bikes_and_histograms(self):
+        facets = self.facets("")
+        self.assertNotIn("KTM", self.counts(facets["brand"]))
+        self.assertEqual({y["year"]: y["count"] for y in facets["year"]}, {2019: 2, 2021: 1, 2023: 1})
+        prices = {(band["min"], band["max"]): band["count"] for band in facets["price"] if band["count"]}
+        self.assertEqual(prices, {(25000, 50000): 1, (50000, 75000): 1, (75000, 100000): 1, (100000, 150000): 1})
+        # the price histogram ignores the price filter itself
+        self.assertEqual(self.facets("min_price=100000")["price"], facets["price"])
+
+    def test_cached_per_normalized_filters_until_a_bike_changes(self):
+        self.facets("brand=TVS&brand=Honda&sort=price_asc")
+        with self.assertNumQueries(0):
+            self.facets("brand=Honda&brand=TVS")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_bike(self.owner, brand="Hero", variant="97cc")
+        self.assertIn("Hero", self.counts(self.facets("brand=Honda&brand=TVS")["brand"]))
+
+    def test_sidebar_renders_counts_and_keeps_selected_brand(self):
+        response = self.client.get(reverse("buy-bike"), {"brand": "Yamaha"})
+        self.assertContains(response, 'value="Yamaha" class="brand-checkbox" checked')
+        self.assertContains(response, 'name="owner" value="2nd"')
+
+
+@unittest.skipIf(numpy is None, "numpy not installed")
+@override_settings(BIKE_LISTING_ENGINE="columnar")
+class ColumnarListingTests(TestCase):
+    QUERIES = [
+        "", "sort=price_asc", "sort=price_desc", "sort=alpha", "brand=Honda&brand=TVS&sort=price_desc",
+        "category=scooter&min_price=41000&max_price=43000", "fuel=electric", "owner=2nd&sort=alpha",
+        "cc=below200&min_year=2019&max_km=15000", "brand=Nope",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        for i in range(60):
+            make_bike(
+                cls.owner, brand=("Honda", "TVS", "Bajaj")[i % 3], model=f"M{i % 7}",
+                category=("scooter", "motorbike")[i % 2], variant=("110cc", "160cc", "350cc", "EV")[i % 4],
+                fuel_type="electric" if i % 4 == 3 else "petrol", previous_owner=("1st", "2nd")[i % 5 == 0],
+                make_year=2015 + i % 8, kilometers=1000 * (i % 20), price=40000 + (i % 5) * 1000,
+            )
+        make_bike(cls.owner, brand="Honda", model="Hidden", is_published=False)
+
+    def setUp(self):
+        from .columnar import bike_index
+        self.index = bike_index
+        self.index.reset()
+
+    def orm_page(self, filters, cursor=None):
+        with self.settings(BIKE_LISTING_ENGINE="orm"):
+            return bike_listing_page(filters, cursor)
+
+    def assertSamePages(self, query):
+        filters = parse_bike_filters(QueryDict(query))
+        cursor, previous = None, None
+        while True:
+            page, total = bike_listing_page(filters, cursor)
+            expected, expected_total = self.orm_page(filters, cursor)
+            self.assertEqual(total, expected_total)
+            self.assertEqual([b.pk for b in page], [b.pk for b in expected])
+            self.assertEqual((page.next_cursor, page.previous_cursor), (expected.next_cursor, expected.previous_cursor))
+            if previous is not None:
+                # walking back lands on the same rows
+                back, _ = bike_listing_page(filters, page.previous_cursor)
+                self.assertEqual([b.pk for b in back], previous)
+            if not page.has_next:
+                return
+            cursor, previous = page.next_cursor, [b.pk for b in page]
+
+    def test_matches_orm_pages_totals_and_cursors(self):
+        for query in self.QUERIES:
+            with self.subTest(query=query):
+                self.assertSamePages(query)
+
+    def test_page_is_a_single_in_bulk_query_once_warm(self):
+        filters = parse_bike_filters(QueryDict("brand=Honda&sort=price_asc"))
+        bike_listing_page(filters)
+        with self.assertNumQueries(1):
+            bike_listing_page(filters)
+
+    def test_search_and_location_fall_back_to_orm(self):
+        for query in ("q=honda", "location=chen"):
+            filters = parse_bike_filters(QueryDict(query))
+            self.assertIsNone(self.index.page(filters))
+            self.assertEqual(bike_listing_page(filters)[1], filter_bikes(filters).count())
+
+    def test_refreshes_incrementally_and_rebuilds_on_delete(self):
+        filters = parse_bike_filters(QueryDict("sort=price_desc"))
+        bike_listing_page(filters)
+        with self.captureOnCommitCallbacks(execute=True):
+            bike = make_bike(self.owner, brand="Royal Enfield", price=999999)
+            Bike.objects.filter(model="Hidden").get().save()  # unchanged unpublished row
+        page, total = bike_listing_page(filters)
+        self.assertEqual((page.object_list[0], total), (bike, 61))
+
+        bike.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            bike.save()
+        self.assertEqual(bike_listing_page(filters)[1], 60)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Bike.objects.filter(brand="TVS").first().delete()
+        page, total = bike_listing_page(filters)
+        self.assertEqual(total, 59)
+        self.assertSamePages("sort=price_desc")
+
+
+def png_upload(name, size, mode="RGBA"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+def run_image_jobs(workers=0):
+    out = io.StringIO()
+    call_command("process_image_jobs", once=True, workers=workers, stdout=out)
+    return out.getvalue()
+
+
+class TempMediaMixin:
+    def setUp(self):
+        super().setUp()
+        clear_caches()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = self.settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ResponsiveImageTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+
+    def make_bike(self, photos=(), **kwargs):
+        bike = make_bike(self.owner, **kwargs)
+        for order, upload in enumerate(photos):
+            BikeImage.objects.create(bike=bike, image=upload, order=order)
+        run_image_jobs()
+        return bike
+
+    def test_save_writes_webp_and_jpeg_at_each_width_below_the_original(self):
+        bike = self.make_bike(main_image=png_upload("side.png", (1500, 1000)),
+                              photos=[png_upload("tiny.png", (200, 100), mode="RGB")])
+        name = bike.main_image.name
+        self.assertEqual(derivative_widths(name), [320, 640, 960, 1280])
+        with bike.main_image.storage.open(derivative_name(name, 640, "jpg")) as fh, Image.open(fh) as jpeg:
+            self.assertEqual((jpeg.format, jpeg.size, jpeg.mode), ("JPEG", (640, 427), "RGB"))
+        with bike.main_image.storage.open(derivative_name(name, 320, "webp")) as fh, Image.open(fh) as webp:
+            self.assertEqual(webp.format, "WEBP")
+        # small originals are never upscaled
+        self.assertEqual(derivative_widths(bike.images.get().image.name), [200])
+        # the width list survives a cold cache (read back from storage)
+        cache.clear()
+        self.assertEqual(derivative_widths(name), [320, 640, 960, 1280])
+
+    def test_tag_renders_picture_with_srcset_sizes_and_lazy_loading(self):
+        bike = self.make_bike(main_image=png_upload("side.png", (800, 600)))
+        html = Template(
+            '{% load bike_images %}{% responsive_image bike.main_image alt="Shine" sizes="50vw" class="x" %}'
+        ).render(Context({"bike": bike}))
+        webp = bike.main_image.storage.url(derivative_name(bike.main_image.name, 640, "webp"))
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn(f"{webp} 640w", html)
+        for attr in ('sizes="50vw"', 'loading="lazy"', 'alt="Shine"', 'class="x"', " 320w, "):
+            self.assertIn(attr, html)
+
+    def test_listing_and_detail_use_derivatives(self):
+        bike = self.make_bike(main_image=png_upload("side.png", (800, 600)),
+                              photos=[png_upload("rear.png", (800, 600))])
+        listing = self.client.get(reverse("buy-bike"))
+        self.assertContains(listing, 'type="image/webp"')
+        self.assertNotContains(listing, f'src="{bike.main_image.url}"')
+        api = self.client.get(reverse("api-bikes")).json()["results"][0]
+        self.assertIn("640w", api["image_srcset"]["webp"])
+
+        detail = self.client.get(reverse("bike-detail", args=[bike.pk]))
+        self.assertContains(detail, 'id="mainBikeImage"')
+        self.assertContains(detail, 'fetchpriority="high"')
+        self.assertContains(detail, 'sizes="72px"')
+        self.assertContains(detail, 'alt="thumb 1"')
+
+    def test_images_without_derivatives_fall_back_to_the_original(self):
+        bike = self.make_bike(main_image=png_upload("side.png", (400, 300)))
+        for path in bike.main_image.storage.listdir("bikes/%d/Honda_Shine/derived" % self.owner.pk)[1]:
+            bike.main_image.storage.delete("bikes/%d/Honda_Shine/derived/%s" % (self.owner.pk, path))
+        cache.clear()
+        html = Template("{% load bike_images %}{% responsive_image img %}").render(Context({"img": bike.main_image}))
+        self.assertIn(f'src="{bike.main_image.url}"', html)
+        self.assertNotIn("srcset", html)
+
+
+class ImageJobQueueTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+
+    def test_save_only_queues_and_the_pool_worker_writes_derivatives(self):
+        bike = make_bike(self.owner, main_image=png_upload("side.png", (800, 600)))
+        photo = BikeImage.objects.create(bike=bike, image=png_upload("rear.png", (800, 600)))
+        self.assertEqual(ImageJob.objects.filter(status=ImageJob.STATUS_PENDING).count(), 2)
+        self.assertEqual(derivative_widths(bike.main_image.name), [])
+        bike.save()  # already queued: no duplicate jobs
+        self.assertEqual(ImageJob.objects.count(), 2)
+
+        self.assertIn("Processed 2 image jobs (0 failed)", run_image_jobs(workers=2))
+        self.assertEqual(set(ImageJob.objects.values_list("status", flat=True)), {ImageJob.STATUS_DONE})
+        self.assertEqual(derivative_widths(photo.image.name), [320, 640])
+
+    def test_claims_are_exclusive_and_stale_jobs_are_requeued(self):
+        make_bike(self.owner, main_image=png_upload("side.png", (400, 300)))
+        self.assertEqual(len(claim_image_jobs(10)), 1)
+        self.assertEqual(claim_image_jobs(10), [])
+        self.assertEqual(requeue_stale_image_jobs(older_than=3600), 0)
+        self.assertEqual(requeue_stale_image_jobs(older_than=-1), 1)
+        self.assertEqual(len(claim_image_jobs(10)), 1)
+
+    def test_broken_uploads_are_retried_then_marked_failed(self):
+        bike = make_bike(self.owner, main_image=SimpleUploadedFile("bad.png", b"not an image"))
+        for attempt in range(ImageJob.MAX_ATTEMPTS):
+            with self.assertLogs("core.management.commands.process_image_jobs", "ERROR"):
+                self.assertIn("(1 failed)", run_image_jobs())
+            # retries back off; the same run never picks the job up again
+            self.assertIn("Processed 0 image jobs", run_image_jobs())
+            ImageJob.objects.update(available_at=timezone.now())
+        job = ImageJob.objects.get(name=bike.main_image.name)
+        self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_FAILED, ImageJob.MAX_ATTEMPTS))
+        self.assertIn("UnidentifiedImageError", job.error)
+        self.assertIn("Processed 0 image jobs", run_image_jobs())
+        # the page still renders the original
+        self.assertContains(self.client.get(reverse("buy-bike")), f'src="{bike.main_image.url}"')
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)  # counts the queries of a full render
+class BikeGalleryTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+
+    def detail_queries(self, bike):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("bike-detail", args=[bike.pk]))
+        return response, len(ctx.captured_queries)
+
+    def test_any_number_of_photos_in_order_with_a_constant_query_count(self):
+        bike = make_bike(self.owner)
+        self.detail_queries(bike)  # warm the navbar cache
+        _, baseline = self.detail_queries(bike)
+        for order in (2, 0, 1, 3, 4, 5, 6, 7):
+            BikeImage.objects.create(bike=bike, image=png_upload(f"p{order}.png", (60, 40)), order=order)
+        response, queries = self.detail_queries(bike)
+        self.assertEqual(queries, baseline)
+        self.assertEqual([t.order for t in response.context["thumbs"]], list(range(8)))
+        self.assertContains(response, 'alt="thumb 8"')
+
+    def test_listing_rows_only_carry_the_card_image(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("buy-bike"))
+        listing_sql = " ".join(q["sql"] for q in ctx.captured_queries if '"core_bike"' in q["sql"])
+        self.assertIn('"main_image"', listing_sql)
+        self.assertNotIn("thumb", listing_sql)
+        self.assertNotIn("core_bikeimage", listing_sql)
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """locmem backend that counts connections and rejects listed recipients."""
+    opened = 0
+    reject = set()
+    down = False
+
+    def open(self):
+        if FlakyEmailBackend.down:
+            raise ConnectionRefusedError("mail server down")
+        FlakyEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.reject & set(message.to):
+                raise OSError(f"rejected {message.to}")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="core.tests.FlakyEmailBackend", CONTACT_EMAIL_RECIPIENTS=["sales@example.com"])
+class EmailOutboxTests(TestCase):
+    VALID = {
+        "name": "Asha Rao", "email": "asha@example.com", "phone": "9876543210",
+        "reason": "Buy a Bike", "channel": "Website", "message": "Looking for a scooter, please call.",
+    }
+
+    def setUp(self):
+        FlakyEmailBackend.opened, FlakyEmailBackend.reject, FlakyEmailBackend.down = 0, set(), False
+
+    def submit(self, **overrides):
+        return self.client.post(reverse("contact_submit"), {**self.VALID, **overrides}, content_type="application/json")
+
+    def due_now(self):
+        OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING).update(available_at=timezone.now())
+
+    def test_submission_is_queued_not_sent(self):
+        response = self.submit()
+        self.assertEqual(response.json(), {"success": True})
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.to, email.reply_to, email.status), (["sales@example.com"], ["asha@example.com"], "pending"))
+        self.assertIn("Asha Rao", email.subject)
+        self.assertEqual(self.submit(phone="12").status_code, 400)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_header_injection_is_rejected_before_queueing(self):
+        for name in ("Asha\r\nBcc: spam@example.com", "Asha\nRao", "Asha\tRao"):
+            with self.subTest(name=name):
+                self.assertEqual(self.submit(name=name).json()["error"], "Invalid name")
+        with self.assertRaises(BadHeaderError):
+            queue_email("hi\r\nBcc: spam@example.com", "body", ["sales@example.com"])
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_batches_share_one_connection(self):
+        for i in range(5):
+            queue_email(f"hello {i}", "body", ["sales@example.com"])
+        self.assertEqual(send_queued_emails(batch_size=3), (3, 0))
+        self.assertEqual(FlakyEmailBackend.opened, 1)
+        out = io.StringIO()
+        call_command("send_queued_email", once=True, batch=3, stdout=out)
+        self.assertIn("Sent 2 emails (0 failed)", out.getvalue())
+        self.assertEqual([m.subject for m in mail.outbox], [f"hello {i}" for i in range(5)])
+        self.assertEqual(FlakyEmailBackend.opened, 2)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+
+    def test_failures_back_off_and_give_up_after_max_attempts(self):
+        queue_email("ok", "body", ["sales@example.com"])
+        bad = queue_email("bad", "body", ["bounce@example.com"])
+        FlakyEmailBackend.reject = {"bounce@example.com"}
+        with self.assertLogs("core.outbox", "ERROR"):
+            self.assertEqual(send_queued_emails(), (1, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ("pending", 1))
+        self.assertGreater(bad.available_at, timezone.now())
+        self.assertIn("rejected", bad.last_error)
+        self.assertEqual(send_queued_emails(), (0, 0))  # not due yet
+
+        for _ in range(OutboxEmail.MAX_ATTEMPTS - 1):
+            self.due_now()
+            with self.assertLogs("core.outbox", "ERROR"):
+                send_queued_emails()
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ("failed", OutboxEmail.MAX_ATTEMPTS))
+
+    def test_unreachable_server_keeps_the_batch_queued(self):
+        queue_email("later", "body", ["sales@example.com"])
+        FlakyEmailBackend.down = True
+        with self.assertLogs("core.outbox", "ERROR"):
+            self.assertEqual(send_queued_emails(), (0, 1))
+        FlakyEmailBackend.down = False
+        self.due_now()
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(OutboxEmail.objects.get().attempts, 2)
+
+
+def legacy_price(brand, variant, year_int, kms, owner, current_year):
+    """The heuristic sell_get_price used to inline, kept as the reference."""
+    brand_base = {
+        'TVS': 60000, 'Honda': 75000, 'Bajaj': 50000, 'Hero': 40000, 'Royal Enfield': 220000,
+        'Yamaha': 80000, 'Vespa': 95000, 'KTM': 240000, 'Suzuki': 85000
+    }
+    base = brand_base.get(brand, 50000)
+    vf = 1.0
+    if '350' in variant or '410' in variant or '400' in variant:
+        vf = 1.6
+    elif '150' in variant:
+        vf = 1.25
+    elif '125' in variant:
+        vf = 1.05
+    elif '110' in variant:
+        vf = 0.92
+    age = max(0, (current_year - year_int))
+    age_factor = max(0.35, 1 - (age * 0.06))
+    kms_factor = 1.0
+    if 'Under' in kms:
+        kms_factor = 0.96
+    elif '5,000' in kms and '20,000' in kms:
+        kms_factor = 0.9
+    elif '20,000' in kms:
+        kms_factor = 0.8
+    elif '+' in kms or '50,000' in kms:
+        kms_factor = 0.72
+    owner_factor = 1.0
+    if owner.startswith('2nd'):
+        owner_factor = 0.88
+    elif owner.startswith('3rd'):
+        owner_factor = 0.75
+    price = int(round(base * vf * age_factor * kms_factor * owner_factor))
+    return (price // 100) * 100
+
+
+@override_settings(PRICE_MODEL_PATH=None)  # the rules only, even if a model was trained locally
+class PricingEngineTests(TestCase):
+    BRANDS = ["TVS", "Honda", "Bajaj", "Hero", "Royal Enfield", "Yamaha", "Vespa", "KTM", "Suzuki", "Ola", "honda"]
+    VARIANTS = ["Classic 350", "Himalayan 410", "NS400", "Unicorn 150", "Shine 125", "Splendor 110", "Jupiter",
+                "125 / 150", "", "3.0 kWh"]
+    KMS = ["Under 5,000", "5,000 - 20,000", "20,000 - 50,000", "50,000+", "20,000 5,000", "+", "unknown"]
+    OWNERS = ["1st Owner", "2nd Owner", "3rd+ Owner", "2nd", "4th"]
+    YEARS = [2026, 2025, 2020, 2015, 2010, 1995, 2030]
+
+    def setUp(self):
+        clear_caches()
+
+    def combos(self):
+        for brand in self.BRANDS:
+            for variant in self.VARIANTS:
+                for kms in self.KMS:
+                    for owner in self.OWNERS:
+                        yield brand, variant, self.YEARS[len(brand + variant + kms + owner) % 7], kms, owner
+
+    def test_seeded_rules_match_the_old_heuristic(self):
+        engine = get_pricing_engine()
+        rows = list(self.combos())
+        expected = [legacy_price(*row, current_year=2026) for row in rows]
+        self.assertEqual([engine.quote(*row, current_year=2026) for row in rows], expected)
+        self.assertEqual(engine.quote_many(rows, current_year=2026).tolist(), expected)
+        self.assertEqual(engine.quote_many([]).tolist(), [])
+
+    def test_endpoint_response_is_unchanged(self):
+        payload = {"brand": "Royal Enfield", "model": "Classic", "variant": "Classic 350", "year": "2019",
+                   "kms": "5,000 - 20,000", "owner": "2nd Owner"}
+        response = self.client.post(reverse("sell-get-price"), payload)
+        sr = SellRequest.objects.get()
+        price = legacy_price("Royal Enfield", "Classic 350", 2019, "5,000 - 20,000", "2nd Owner",
+                             timezone.now().year)
+        self.assertEqual(response.content, b'{"ok": true, "price": %d, "id": %d}' % (price, sr.pk))
+        self.assertEqual(sr.estimated_price, price)
+
+    def test_admin_edits_are_picked_up_and_compiled_once(self):
+        engine = get_pricing_engine()
+        with self.assertNumQueries(0):
+            self.assertIs(get_pricing_engine(), engine)
+        PriceRule.objects.filter(kind=PriceRule.KIND_BRAND, pattern="Hero").update(value=1)  # no signal
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceRule.objects.create(kind=PriceRule.KIND_BRAND, pattern="Ola", value=100000)
+        self.assertEqual(get_pricing_engine().quote("Ola", "S1", 2026, "Under 5,000", "1st", current_year=2026), 96000)
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceRule.objects.filter(kind=PriceRule.KIND_OWNER).delete()
+        self.assertEqual(get_pricing_engine().quote("Ola", "S1", 2026, "Under 5,000", "2nd", current_year=2026), 96000)
+
+    def test_invalid_pattern_is_rejected_in_the_admin(self):
+        rule = PriceRule(kind=PriceRule.KIND_VARIANT, pattern="(350", value=1.5)
+        with self.assertRaisesMessage(Exception, "Invalid regular expression"):
+            rule.full_clean()
+
+    def test_engine_is_usable_without_the_database(self):
+        engine = PricingEngine({"Hero": 40000}, variant_rules=[(re.compile("125"), 1.05)])
+        self.assertEqual(engine.quote("Hero", "Glamour 125", 2026, "x", "1st", current_year=2026), 42000)
+
+
+class PriceModelTests(TestCase):
+    # exact log-linear prices, so the fit should recover these coefficients
+    BRANDS = {"Honda": 9.0, "Royal Enfield": 9.6}
+    COEF = {"log_cc": 0.5, "no_cc": 2.7, "age": -0.08, "log_km": -0.05, "owners": -0.1}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        bikes, this_year = [], timezone.now().year
+        for i in range(300):
+            brand = list(cls.BRANDS)[i % 2]
+            cc = (None, 110, 125, 150, 350)[i % 5]
+            year, km, owners = this_year - i % 15, 1000 + 997 * i % 60000, 1 + i % 3
+            log_price = (cls.BRANDS[brand] + (cls.COEF["log_cc"] * math.log(cc) if cc else cls.COEF["no_cc"])
+                         + cls.COEF["age"] * (this_year - year) + cls.COEF["log_km"] * math.log1p(km)
+                         + cls.COEF["owners"] * owners)
+            bikes.append(Bike(owner=cls.owner, brand=brand, model="M", variant=f"{cc}cc" if cc else "3kWh",
+                              engine_cc=cc, make_year=year, kilometers=km, previous_owner=("1st", "2nd", "3rd+")[owners - 1],
+                              price=round(math.exp(log_price), 2), location="Chennai", is_published=True))
+        # too few listings to be modelled; priced by the PriceRule heuristic
+        bikes += [Bike(owner=cls.owner, brand="KTM", model="Duke", variant="390cc", engine_cc=390, make_year=2020,
+                       kilometers=5000, price=200000, location="Chennai", is_published=True) for _ in range(5)]
+        Bike.objects.bulk_create(bikes)
+
+    def setUp(self):
+        clear_caches()
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        self.path = f"{folder}/price_model.json"
+        settings = self.settings(PRICE_MODEL_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def train(self):
+        call_command("train_price_model", stdout=io.StringIO())
+        return get_price_model()
+
+    def test_training_recovers_the_coefficients(self):
+        model = self.train()
+        self.assertEqual(sorted(model.brands), ["Honda", "Royal Enfield"])
+        self.assertEqual(model.listings, 300)
+        for brand, value in self.BRANDS.items():
+            self.assertAlmostEqual(model.brands[brand], value, places=3)
+        for term, value in self.COEF.items():
+            self.assertAlmostEqual(model.coef[term], value, places=3)
+        self.assertLess(model.rmse, 1e-3)
+
+    def test_model_is_loaded_once_per_file_version(self):
+        model = self.train()
+        self.assertIs(get_price_model(), model)
+        data = json.loads(open(self.path).read())
+        data["brands"]["Honda"] = 10.0
+        with open(self.path, "w") as fh:
+            json.dump(data, fh)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(get_price_model().brands["Honda"], 10.0)
+
+    def test_sell_estimate_uses_the_model_and_falls_back_for_sparse_brands(self):
+        url = reverse("sell-get-price")
+        payload = {"model": "M", "variant": "150CC", "year": "2020", "kms": "5001 - 10000", "owner": "2nd Owner"}
+        before = self.client.post(url, dict(payload, brand="Honda")).json()["price"]
+
+        model = self.train()
+        expected = model.predict("Honda", "150CC", 2020, "5001 - 10000", "2nd Owner")
+        self.assertEqual(self.client.post(url, dict(payload, brand="Honda")).json()["price"], int(expected) // 100 * 100)
+        self.assertNotEqual(before, int(expected) // 100 * 100)
+
+        year = timezone.now().year
+        self.assertEqual(self.client.post(url, dict(payload, brand="KTM")).json()["price"],
+                         legacy_price("KTM", "150CC", 2020, "5001 - 10000", "2nd Owner", year))
+        # a kms value the model can't read also falls back
+        self.assertEqual(self.client.post(url, dict(payload, brand="Honda", kms="lots")).json()["price"],
+                         legacy_price("Honda", "150CC", 2020, "lots", "2nd Owner", year))
+
+    def test_predict_many_matches_predict(self):
+        model = self.train()
+        rows = [(brand, variant, year, kms, owner)
+                for brand in ("Honda", "Royal Enfield", "KTM")
+                for variant in ("125CC Split Seat Disc BS6", "350 cc", "3kWh")
+                for year in (2005, 2019, 2026)
+                for kms in ("1 - 5000", "Under 5,000", "50,000+", "?")
+                for owner in ("1st Owner", "5th Owner")]
+        batch = model.predict_many(rows, current_year=2026)
+        for row, value in zip(rows, batch.tolist()):
+            single = model.predict(*row, current_year=2026)
+            if single is None:
+                self.assertTrue(math.isnan(value), row)
+            else:
+                self.assertAlmostEqual(value, single, delta=1e-6 * single)
+        self.assertEqual(estimate_many(rows, current_year=2026).tolist(),
+                         [estimate_price(*row, current_year=2026) for row in rows])
+
+    def test_too_few_listings_keeps_the_heuristic(self):
+        Bike.objects.exclude(brand="KTM").update(is_published=False)
+        with self.assertRaisesMessage(CommandError, "need at least"):
+            call_command("train_price_model", stdout=io.StringIO())
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(get_price_model())
+
+
+@override_settings(PRICE_MODEL_PATH=None)
+class BulkValuationTests(TestCase):
+    CSV = (
+        "brand,model,variant,year,kms,owner,name\r\n"
+        "Honda,Shine,125CC Split Seat Disc BS6,2019,10001 - 20000,1st Owner,Dealer A\r\n"
+        "Royal Enfield,Classic,350cc,2016,50001 - 100000,2nd Owner,\r\n"
+        "Bajaj,Pulsar,150CC,not-a-year,1 - 5000,1st Owner,\r\n"
+        "Hero,Splendor,,2020,1 - 5000,1st Owner,\r\n"
+        "TVS,Jupiter,110cc,2021,5001 - 10000,3rd Owner,\r\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", "staff@example.com", "pw-12345", is_staff=True)
+        cls.dealer = User.objects.create_user("dealer", "dealer@example.com", "pw-12345")
+
+    def setUp(self):
+        clear_caches()
+
+    def parse(self, text):
+        return list(csv.DictReader(io.StringIO(text)))
+
+    def check_output(self, rows):
+        self.assertEqual([row["brand"] for row in rows], ["Honda", "Royal Enfield", "Bajaj", "Hero", "TVS"])
+        self.assertEqual([row["error"] for row in rows], ["", "", "Invalid year", "Missing required fields", ""])
+        for row in rows:
+            if not row["error"]:
+                expected = estimate_price(row["brand"], row["variant"], int(row["year"]), row["kms"], row["owner"])
+                self.assertEqual(int(row["estimated_price"]), expected)
+                sr = SellRequest.objects.get(pk=row["sell_request_id"])
+                self.assertEqual((sr.brand, sr.kms_range, sr.estimated_price), (row["brand"], row["kms"], expected))
+        self.assertEqual(SellRequest.objects.count(), 3)
+        self.assertEqual(SellRequest.objects.get(brand="Honda").name, "Dealer A")
+
+    def test_command_writes_sell_requests_in_batches(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        with open(f"{folder}/dealer.csv", "w", newline="") as fh:
+            fh.write(self.CSV)
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("value_bikes", f"{folder}/dealer.csv", "--batch", "2", stdout=out)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "core_sellrequest"')]
+        self.assertEqual(len(inserts), 2)  # batches [Honda, RE] and [TVS]; [Bajaj, Hero] has no valid row
+        self.check_output(self.parse(out.getvalue()))
+
+    def test_command_no_save(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        with open(f"{folder}/dealer.csv", "w", newline="") as fh:
+            fh.write(self.CSV)
+        call_command("value_bikes", f"{folder}/dealer.csv", "--no-save", "--output", f"{folder}/out.csv")
+        with open(f"{folder}/out.csv", newline="") as fh:
+            rows = self.parse(fh.read())
+        self.assertEqual(rows[0]["sell_request_id"], "")
+        self.assertTrue(rows[0]["estimated_price"])
+        self.assertFalse(SellRequest.objects.exists())
+
+    def test_endpoint_streams_csv_for_staff(self):
+        self.client.force_login(self.staff)
+        upload = SimpleUploadedFile("dealer.csv", ("\ufeff" + self.CSV).encode("utf-8"), content_type="text/csv")
+        response = self.client.post(reverse("sell-bulk-valuation"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = self.parse(b"".join(response.streaming_content).decode())
+        self.check_output(rows)
+        self.assertTrue(all(sr.user == self.staff for sr in SellRequest.objects.all()))
+
+    def test_endpoint_is_staff_only(self):
+        self.client.force_login(self.dealer)
+        upload = SimpleUploadedFile("dealer.csv", self.CSV.encode(), content_type="text/csv")
+        response = self.client.post(reverse("sell-bulk-valuation"), {"file": upload})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(SellRequest.objects.exists())
+
+    def test_storage_checks_apply_to_bulk_rows_only(self):
+        row = {"brand": "Honda", "model": "Shine", "variant": "125CC", "year": "2019",
+               "kms": "1 - 5000", "owner": "1st Owner"}
+        bad = [dict(row, brand="H" * 81), dict(row, year="0")]
+        rows = list(value_rows(bad, save=False))
+        self.assertEqual([r["error"] for r in rows], ["Value too long: brand", "Invalid year"])
+        # the single get-price endpoint answers these exactly as before
+        for payload in bad:
+            response = self.client.post(reverse("sell-get-price"), payload)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()["ok"])
+
+    def test_out_of_range_year_is_a_row_error(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        next_year = timezone.now().year + 1
+        with open(f"{folder}/dealer.csv", "w", newline="") as fh:
+            fh.write("brand,model,variant,year,kms,owner\r\n")
+            for year in ("99999999999999999999", "1899", str(next_year + 1), str(next_year)):
+                fh.write(f"Honda,Shine,125CC,{year},1 - 5000,1st Owner\r\n")
+        out = io.StringIO()
+        call_command("value_bikes", f"{folder}/dealer.csv", "--no-save", stdout=out)
+        rows = self.parse(out.getvalue())
+        self.assertEqual([row["error"] for row in rows], ["Invalid year"] * 3 + [""])
+        self.assertTrue(rows[-1]["estimated_price"])
+
+    def test_endpoint_rejects_missing_columns(self):
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(reverse("sell-bulk-valuation")), 'name="file"')
+        upload = SimpleUploadedFile("dealer.csv", b"brand,model\r\nHonda,Shine\r\n", content_type="text/csv")
+        response = self.client.post(reverse("sell-bulk-valuation"), {"file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Missing columns: variant, year, kms, owner")
+
+
+def run_concurrently(fn, args):
+    """Call fn(arg) for every arg in its own thread, released together; return the results."""
+    barrier = threading.Barrier(len(args))
+    results = [None] * len(args)
+
+    def worker(i, arg):
+        try:
+            barrier.wait()
+            results[i] = fn(arg)
+        except Exception as exc:
+            results[i] = exc
+        finally:
+            connections.close_all()  # each thread has its own connection
+
+    threads = [threading.Thread(target=worker, args=(i, arg)) for i, arg in enumerate(args)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class BikeBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller", "seller@example.com", "pw-12345")
+        cls.buyer = User.objects.create_user("buyer", "buyer@example.com", "pw-12345")
+        cls.other = User.objects.create_user("other", "other@example.com", "pw-12345")
+        cls.bike = make_bike(cls.seller)
+
+    def test_book_is_a_single_conditional_update(self):
+        bike = Bike.objects.get(pk=self.bike.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(bike.book(self.buyer))
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]["sql"]
+        self.assertTrue(sql.startswith("UPDATE"), sql)
+        self.assertIn('"is_booked"', sql.split("WHERE")[1])
+
+        stale = Bike.objects.get(pk=self.bike.pk)
+        stale.is_booked = False  # an out-of-date instance still can't double-book
+        self.assertFalse(stale.book(self.other))
+        bike.refresh_from_db()
+        self.assertEqual((bike.is_booked, bike.booked_by), (True, self.buyer))
+        self.assertIsNotNone(bike.booked_at)
+
+        self.assertTrue(bike.unbook())
+        self.assertFalse(bike.unbook())
+        bike.refresh_from_db()
+        self.assertEqual((bike.is_booked, bike.booked_by, bike.booked_at), (False, None, None))
+
+    def test_booking_refreshes_listings(self):
+        generation = get_generation("bikes")
+        before = Bike.objects.get(pk=self.bike.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bike.book(self.buyer)
+            self.assertEqual(get_generation("bikes"), generation)
+        self.assertGreater(get_generation("bikes"), generation)
+        self.assertGreater(Bike.objects.get(pk=self.bike.pk).updated_at, before)
+
+    def test_book_endpoint(self):
+        url = reverse("book-bike", args=[self.bike.pk])
+        self.assertEqual(self.client.post(url).status_code, 302)  # login required
+
+        self.client.force_login(self.seller)
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+        self.client.force_login(self.buyer)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["success"])
+
+        self.client.force_login(self.other)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(response.json()["success"])
+        self.assertEqual(Bike.objects.get(pk=self.bike.pk).booked_by, self.buyer)
+        self.assertContains(self.client.get(reverse("bike-payment", args=[self.bike.pk])), "Already Booked")
+
+
+class BikeBookingConcurrencyTests(TransactionTestCase):
+    BUYERS = 12
+
+    def setUp(self):
+        seller = User.objects.create(username="seller")
+        self.buyers = User.objects.bulk_create(User(username=f"buyer{i}") for i in range(self.BUYERS))
+        self.bikes = [make_bike(seller) for _ in range(3)]
+
+    def test_exactly_one_buyer_wins(self):
+        bike = self.bikes[0]
+        results = run_concurrently(lambda user: Bike.objects.get(pk=bike.pk).book(user), self.buyers)
+        self.assertEqual(results.count(True), 1, results)
+        self.assertEqual(results.count(False), self.BUYERS - 1, results)
+        winner = self.buyers[results.index(True)]
+        self.assertEqual(Bike.objects.get(pk=bike.pk).booked_by, winner)
+        # the other bikes were never touched
+        self.assertFalse(Bike.objects.filter(pk__in=[b.pk for b in self.bikes[1:]], is_booked=True).exists())
+
+    def test_each_bike_gets_its_own_winner(self):
+        pairs = [(bike, user) for user in self.buyers for bike in self.bikes]
+        results = run_concurrently(lambda pair: Bike.objects.get(pk=pair[0].pk).book(pair[1]), pairs)
+        for bike in self.bikes:
+            won = [result for (b, _), result in zip(pairs, results) if b == bike]
+            self.assertEqual(won.count(True), 1, results)
+            self.assertEqual(won.count(False), self.BUYERS - 1, results)
+        self.assertEqual(Bike.objects.filter(is_booked=True).count(), len(self.bikes))
+
+
+class TestRideBookingTests(TestCase):
+    AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller", "seller@example.com", "pw-12345")
+        cls.rider = User.objects.create_user("rider", "rider@example.com", "pw-12345")
+        cls.bike = make_bike(cls.seller)
+
+    def book(self, user=None):
+        self.client.force_login(user or self.rider)
+        return self.client.post(reverse("book-test-ride", args=[self.bike.pk]), {"phone": "98400 00000"}, **self.AJAX)
+
+    def test_second_pending_request_is_rejected_by_the_constraint(self):
+        self.assertTrue(self.book().json()["success"])
+        response = self.book()
+        self.assertFalse(response.json()["success"])
+        self.assertEqual(response.json()["message"], "You already have a pending test ride for this bike.")
+        self.assertEqual(TestRide.objects.filter(bike=self.bike, user=self.rider).count(), 1)
+
+    def test_rider_can_book_again_once_the_request_is_closed(self):
+        self.book()
+        TestRide.objects.update(status=TestRide.STATUS_CANCELLED)
+        self.assertTrue(self.book().json()["success"])
+        self.assertEqual(TestRide.objects.filter(status=TestRide.STATUS_PENDING).count(), 1)
+        self.assertEqual(TestRide.objects.count(), 2)
+
+    def test_owner_cannot_book_their_own_listing(self):
+        self.assertEqual(self.book(self.seller).status_code, 400)
+        self.assertFalse(TestRide.objects.exists())
+
+    def test_no_pre_check_query(self):
+        self.client.force_login(self.rider)
+        url = reverse("book-test-ride", args=[self.bike.pk])
+        self.client.post(url, **self.AJAX)  # warm the session
+        TestRide.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, **self.AJAX)
+        ride_queries = [q["sql"] for q in queries.captured_queries if "core_testride" in q["sql"]]
+        self.assertEqual(len(ride_queries), 1)
+        self.assertTrue(ride_queries[0].startswith("INSERT"))
+
+
+class TestRideConcurrencyTests(TransactionTestCase):
+    def test_simultaneous_requests_leave_one_pending_ride(self):
+        seller = User.objects.create(username="seller")
+        rider = User.objects.create(username="rider")
+        bike = make_bike(seller)
+        clients = []
+        for _ in range(10):
+            client = Client()
+            client.force_login(rider)
+            clients.append(client)
+
+        url = reverse("book-test-ride", args=[bike.pk])
+        responses = run_concurrently(lambda c: c.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest").json(), clients)
+        self.assertEqual([r["success"] for r in responses].count(True), 1, responses)
+        self.assertEqual(TestRide.objects.filter(bike=bike, user=rider, status=TestRide.STATUS_PENDING).count(), 1)
+
+
+class EmailOrUsernameLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", "Alice@Example.com", "pw-alice-123")
+        # an account whose username looks like someone else's email
+        cls.other = User.objects.create_user("bob@example.com", "bob@example.com", "pw-other-123")
+        cls.bob = User.objects.create_user("bob", "BOB@example.com", "pw-bob-1234")
+
+    def attempt(self, identifier, password):
+        """authenticate() plus how many queries and password hashes it took."""
+        with mock.patch.object(PBKDF2PasswordHasher, "encode", autospec=True,
+                               side_effect=PBKDF2PasswordHasher.encode) as encode:
+            with CaptureQueriesContext(connection) as queries:
+                user = authenticate(None, username=identifier, password=password)
+        return user, len(queries), encode.call_count
+
+    def test_username_and_email_cost_one_query_and_one_hash(self):
+        for identifier in ("alice", "alice@example.com", "ALICE@EXAMPLE.COM"):
+            with self.subTest(identifier=identifier):
+                self.assertEqual(self.attempt(identifier, "pw-alice-123"), (self.alice, 1, 1))
+
+    def test_failures_cost_one_hash(self):
+        self.assertEqual(self.attempt("alice@example.com", "wrong"), (None, 1, 1))
+        self.assertEqual(self.attempt("nobody@example.com", "wrong"), (None, 1, 1))
+
+    def test_username_wins_over_another_accounts_email(self):
+        self.assertEqual(authenticate(None, username="bob@example.com", password="pw-other-123"), self.other)
+        self.assertIsNone(authenticate(None, username="bob@example.com", password="pw-bob-1234"))
+        self.assertEqual(authenticate(None, username="bob", password="pw-bob-1234"), self.bob)
+
+    def test_inactive_users_cannot_log_in(self):
+        User.objects.filter(pk=self.alice.pk).update(is_active=False)
+        self.assertIsNone(authenticate(None, username="alice@example.com", password="pw-alice-123"))
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "checks the SQLite query plan")
+    def test_lookup_uses_indexes(self):
+        plan = users_matching("alice@example.com").explain()
+        self.assertNotRegex(plan, r"\bSCAN (auth_user\b|\"auth_user\")(?! USING)", plan)
+        self.assertIn("auth_user_email_lower_idx", plan)
+
+    def test_login_view_accepts_email(self):
+        response = self.client.post(reverse("login"), {"username": "Alice@example.com", "password": "pw-alice-123"})
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session["_auth_user_id"]), self.alice.pk)
+        response = self.client.post(reverse("login"), {"username": "alice", "password": "nope"})
+        self.assertContains(response, "Invalid credentials")
+
+
+@override_settings(LOGIN_THROTTLE={"ip": (5, 60), "identifier": (3, 60)})
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", "alice@example.com", "pw-alice-123")
+
+    def setUp(self):
+        clear_caches()
+
+    def login(self, identifier, password="wrong", ip="10.0.0.1"):
+        return self.client.post(reverse("login"), {"username": identifier, "password": password}, REMOTE_ADDR=ip)
+
+    def test_identifier_limit_blocks_before_hashing(self):
+        for _ in range(3):
+            self.assertEqual(self.login("alice").status_code, 200)
+        with mock.patch.object(PBKDF2PasswordHasher, "encode") as encode:
+            response = self.login("ALICE", password="pw-alice-123", ip="10.0.0.2")  # same account, new IP
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertContains(response, "Too many login attempts", status_code=429)
+        encode.assert_not_called()
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+    def test_ip_limit_covers_many_identifiers(self):
+        for i in range(5):
+            self.assertEqual(self.login(f"user{i}@example.com").status_code, 200)
+        self.assertEqual(self.login("alice", "pw-alice-123").status_code, 429)
+        # another client is unaffected
+        response = self.login("alice", "pw-alice-123", ip="10.0.0.9")
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+
+    def test_client_ip_behind_trusted_proxies(self):
+        factory = RequestFactory()
+        # client, spoofed by the client itself, then appended by two proxies
+        request = factory.post("/", REMOTE_ADDR="10.0.0.254", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.7, 10.0.0.253")
+        self.assertEqual(client_ip(request), "10.0.0.254")  # no proxies configured: header ignored
+        with override_settings(LOGIN_THROTTLE_PROXIES=2):
+            self.assertEqual(client_ip(request), "203.0.113.7")
+            # didn't pass through both proxies
+            self.assertEqual(client_ip(factory.post("/", REMOTE_ADDR="10.0.0.254")), "10.0.0.254")
+
+        with override_settings(LOGIN_THROTTLE_PROXIES=1):
+            for i in range(5):
+                self.client.post(reverse("login"), {"username": f"user{i}", "password": "x"},
+                                 REMOTE_ADDR="10.0.0.254", HTTP_X_FORWARDED_FOR=f"198.51.100.{i}")
+            response = self.client.post(reverse("login"), {"username": "alice", "password": "pw-alice-123"},
+                                        REMOTE_ADDR="10.0.0.254", HTTP_X_FORWARDED_FOR="198.51.100.99")
+            self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+
+    def test_counters(self):
+        for _ in range(4):
+            self.login("alice")
+        self.assertEqual(throttle_stats(), {"allowed": 3, "blocked_ip": 0, "blocked_identifier": 1})
+
+        staff = User.objects.create_user("ops", "ops@example.com", "pw-ops-1234", is_staff=True)
+        self.assertEqual(self.client.get(reverse("login-throttle-stats")).status_code, 302)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse("login-throttle-stats")).json()["blocked_identifier"], 1)
+
+    def test_window_slides(self):
+        limiter = SlidingWindowLimiter("test", limit=10, window=60)
+        start = 600.0  # a bucket boundary
+        self.assertEqual([limiter.hit("k", now=start + i) for i in range(10)], [0] * 10)
+        self.assertEqual(limiter.hit("k", now=start + 20), 40)  # wait for the bucket to end
+        # halfway into the next bucket the 11 earlier hits count as 5.5
+        self.assertEqual([limiter.hit("k", now=start + 90) for _ in range(5)], [0, 0, 0, 0, 30])
+        # two windows later everything has expired
+        self.assertEqual(limiter.hit("k", now=start + 180), 0)
+
+    @override_settings(LOGIN_THROTTLE=None)
+    def test_can_be_disabled(self):
+        for _ in range(6):  # over both limits of this class
+            self.assertEqual(self.login("alice", ip="10.0.0.1").status_code, 200)
+
+
+class DatabaseRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        cls.bike = make_bike(cls.owner)
+
+    def setUp(self):
+        clear_caches()
+
+    def test_router_uses_the_replica_only_for_content_reads_in_read_only_views(self):
+        router = ReplicaRouter()
+        routed = read_from_replica(lambda model: router.db_for_read(model))
+        self.assertIsNone(routed(Bike))  # no replica configured: default
+        with mock.patch.dict(django_settings.DATABASES, {"replica": {}}):
+            self.assertEqual(routed(Bike), "replica")
+            self.assertIsNone(routed(User))  # sessions / auth stay on the primary
+            self.assertIsNone(router.db_for_read(Bike))  # outside a decorated view
+
+            @read_from_replica
+            def rebuild_cache():
+                with primary_reads():
+                    return router.db_for_read(Bike)
+
+            self.assertIsNone(rebuild_cache())
+            self.assertEqual(router.db_for_write(Bike), "default")
+        self.assertFalse(router.allow_migrate("replica", "core"))
+
+    def test_read_only_views_are_flagged(self):
+        seen = {}
+
+        def spy(router, model, **hints):
+            seen.setdefault(model._meta.label, set()).add(replica_reads_active())
+
+        pages = [reverse("home"), reverse("buy-bike"), reverse("api-bikes"), reverse("bike-detail", args=[self.bike.pk])]
+        with mock.patch.object(ReplicaRouter, "db_for_read", spy):
+            for url in pages:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+        self.assertIn(True, seen["core.Bike"])
+        # generation-cached content (navbar, home sections) is built from the primary
+        self.assertEqual(seen["core.SiteBrand"], {False})
+
+        seen.clear()
+        with mock.patch.object(ReplicaRouter, "db_for_read", spy):
+            self.client.post(reverse("sell-get-price"), {"brand": "Honda"})
+            self.client.get(reverse("login"))
+        self.assertNotIn(True, set().union(*seen.values()))
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "SQLite pragmas")
+    def test_sqlite_connections_are_tuned(self):
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ("journal_mode", "synchronous", "mmap_size", "busy_timeout"):
+                cursor.execute(f"PRAGMA {name}")
+                pragmas[name] = cursor.fetchone()[0]
+        # NORMAL is only safe in WAL mode; the rollback journal keeps FULL
+        self.assertEqual(pragmas["synchronous"], 1 if pragmas["journal_mode"] == "wal" else 2)
+        self.assertGreater(pragmas["mmap_size"], 0)
+        self.assertGreater(pragmas["busy_timeout"], 0)
+        # persistent, so left to enable_wal instead of rewriting the file on every connect
+        self.assertNotIn("journal_mode", connection.settings_dict["OPTIONS"]["init_command"])
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "SQLite journal mode")
+class EnableWalTests(TransactionTestCase):
+    # not TestCase: the journal mode can't change inside a transaction
+    def test_enable_wal_persists_in_the_file(self):
+        out = io.StringIO()
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=DELETE")
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 2)  # FULL in rollback-journal mode
+
+        call_command("enable_wal", stdout=out)
+        self.assertIn("journal_mode=wal", out.getvalue())
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        cls.bike = make_bike(cls.owner)
+        cls.other = make_bike(cls.owner, brand="TVS", model="Jupiter")
+
+    def setUp(self):
+        clear_caches()
+
+    def revalidate(self, url, response, **extra):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **extra)
+
+    def test_unchanged_detail_page_is_a_304_from_one_query(self):
+        url = reverse("bike-detail", args=[self.bike.pk])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header("ETag"))
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.revalidate(url, first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.templates, [])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+        BikeImage.objects.create(bike=self.bike, image="bikes/gallery/extra.jpg")
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+        self.assertEqual(self.client.get(reverse("bike-detail", args=[10**6])).status_code, 404)
+
+    def test_detail_validators_depend_on_the_viewer(self):
+        url = reverse("bike-detail", args=[self.bike.pk])
+        anonymous = self.client.get(url)
+        self.client.force_login(self.owner)
+        logged_in = self.revalidate(url, anonymous)
+        self.assertEqual(logged_in.status_code, 200)
+        self.assertContains(logged_in, "Buy Now")
+        self.assertFalse(logged_in.has_header("Last-Modified"))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=anonymous["Last-Modified"]).status_code, 200)
+        self.assertEqual(self.revalidate(url, logged_in).status_code, 304)
+
+    def test_listing_etag_follows_bike_changes_and_filters(self):
+        for url in (reverse("buy-bike"), reverse("api-bikes")):
+            with self.subTest(url=url):
+                first = self.client.get(url, {"brand": ["TVS", "Honda"]})
+                self.assertEqual(first.status_code, 200)
+                again = self.revalidate(url, first, data={"brand": ["Honda", "TVS"]})
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(self.revalidate(url, first, data={"brand": "Honda"}).status_code, 200)
+
+        url = reverse("buy-bike")
+        changes = [
+            lambda: self.other.book(self.owner),
+            lambda: Bike.objects.get(pk=self.other.pk).save(),
+            lambda: make_bike(self.owner, model="Unicorn").delete(),
+        ]
+        for change in changes:
+            first = self.client.get(url)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_listing_validator_is_an_index_lookup(self):
+        first = self.client.get(reverse("buy-bike"))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.revalidate(reverse("buy-bike"), first).status_code, 304)
+        self.assertEqual(len(queries), 1)
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {queries[0]['sql']}")
+                plan = " ".join(str(row) for row in cursor.fetchall())
+            self.assertIn("bike_updated_idx", plan)
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "pw-12345")
+        cls.bike = make_bike(cls.owner)
+
+    def setUp(self):
+        clear_caches()
+
+    def test_repeat_anonymous_views_skip_the_view(self):
+        pages = [reverse("home"), reverse("buy-bike"), reverse("bike-detail", args=[self.bike.pk])]
+        for url in pages:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertIsNotNone(first.context)
+                with CaptureQueriesContext(connection) as queries:
+                    second = self.client.get(url)
+                self.assertIsNone(second.context)  # no template rendered
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second["Content-Type"], first["Content-Type"])
+                self.assertNotIn("core_bikeimage", " ".join(q["sql"] for q in queries))
+                self.assertLessEqual(len(queries), 1)  # at most the ETag / Last-Modified lookup
+
+    def test_anonymous_detail_page_is_shareable(self):
+        response = self.client.get(reverse("bike-detail", args=[self.bike.pk]))
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        self.assertNotIn("csrftoken", response.cookies)
+        self.assertIsNotNone(cache.get(f"{PAGE_KEY_PREFIX}:bike:{self.bike.pk}"))
+
+    def test_query_string_is_normalized(self):
+        url = reverse("buy-bike")
+        self.client.get(url, {"brand": ["TVS", "Honda"], "q": ""})
+        self.assertIsNone(self.client.get(url, {"brand": ["Honda", "TVS"]}).context)
+        self.assertIsNotNone(self.client.get(url, {"brand": "Honda"}).context)
+
+    def test_saving_a_bike_purges_its_page_and_the_listings(self):
+        detail, listing = reverse("bike-detail", args=[self.bike.pk]), reverse("buy-bike")
+        self.client.get(detail)
+        self.client.get(listing)
+
+        bike = Bike.objects.get(pk=self.bike.pk)
+        bike.price, bike.kilometers = 61234, 34567
+        with self.captureOnCommitCallbacks(execute=True):
+            bike.save()
+            # until the commit the old versions stand: a concurrent render of the
+            # pre-save rows is stored under them and never served afterwards
+            self.assertIsNotNone(cache.get(f"{PAGE_KEY_PREFIX}:bike:{self.bike.pk}"))
+        self.assertIsNone(cache.get(f"{PAGE_KEY_PREFIX}:bike:{self.bike.pk}"))
+        self.assertContains(self.client.get(detail), "34567 Km")
+        self.assertContains(self.client.get(listing), "61,234")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bike.book(self.owner)  # an UPDATE, no post_save: the versions still move
+        self.assertIsNotNone(self.client.get(detail).context)
+        self.assertIsNotNone(self.client.get(listing).context)
+
+    def test_logged_in_users_bypass_the_cache(self):
+        url = reverse("bike-detail", args=[self.bike.pk])
+        self.client.get(url)
+        self.client.force_login(self.owner)
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, "Buy Now")
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+        cache.clear()
+        self.client.get(url)
+        self.assertIsNone(cache.get(f"{PAGE_KEY_PREFIX}:bike:{self.bike.pk}"))
+
+    def test_pages_with_per_visitor_state_are_not_stored(self):
+        def make_request():
+            request = RequestFactory().get("/")
+            request.user, request.session = AnonymousUser(), SessionStore()
+            return request
+
+        def csrf_view(request):
+            get_token(request)
+            return HttpResponse("form")
+
+        def cookie_view(request):
+            response = HttpResponse("hello")
+            response.set_cookie("seen", "1")
+            return response
+
+        def session_view(request):
+            request.session["visited"] = True
+            return HttpResponse("hello")
+
+        for view in (csrf_view, cookie_view, session_view):
+            with self.subTest(view=view.__name__):
+                cached = cache_anonymous_page(lambda request: (view.__name__, 1))(view)
+                cached(make_request())
+                self.assertIsNone(cache.get(f"{PAGE_KEY_PREFIX}:{view.__name__}"))
+
+
+class StaticManifestTests(TestCase):
+    """collectstatic with the production storage; every {% static %} name must be in its manifest."""
+
+    STATIC_REF_RE = re.compile(r"""{%\s*static\s+(['"])(.+?)\1""")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(STATIC_ROOT=static_root))
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def setUp(self):
+        clear_caches()  # no page cached with unhashed URLs
+
+    def test_every_static_reference_is_in_the_manifest(self):
+        templates = Path(apps.get_app_config("core").path, "templates")
+        references = {
+            (path.relative_to(templates), match.group(2))
+            for path in templates.rglob("*.html")
+            for match in self.STATIC_REF_RE.finditer(path.read_text(encoding="utf-8"))
+        }
+        self.assertGreater(len(references), 20)
+        for template, name in sorted(references):
+            with self.subTest(template=str(template), name=name):
+                self.assertNotIn("\\", name)
+                hashed = staticfiles_storage.stored_name(name)  # raises if the manifest lacks it
+                self.assertNotEqual(hashed, name)
+                self.assertTrue(staticfiles_storage.exists(hashed))
+
+    def test_hashed_files_are_precompressed_and_immutable(self):
+        hashed = staticfiles_storage.stored_name("core/css/base.css")
+        self.assertTrue(staticfiles_storage.exists(f"{hashed}.gz"))
+        self.assertTrue(staticfiles_storage.exists(f"{hashed}.br"))
+
+        for accept, encoding in (("gzip", "gzip"), ("br, gzip", "br")):
+            response = self.client.get(staticfiles_storage.url("core/css/base.css"), HTTP_ACCEPT_ENCODING=accept)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertEqual(response["Content-Encoding"], encoding)
+            b"".join(response.streaming_content)
+
+        self.assertContains(self.client.get(reverse("home")), staticfiles_storage.url("core/images/logo.png"))
+
+    def test_names_missing_from_the_manifest_raise(self):
+        with self.assertRaisesMessage(ValueError, "Missing staticfiles manifest entry"):
+            staticfiles_storage.stored_name("core/css/no-such-file.css")
+
+    def test_plain_names_before_collectstatic(self):
+        # the settings' storage works for any test runner, without a STATIC_ROOT
+        with tempfile.TemporaryDirectory() as empty, override_settings(STATIC_ROOT=empty):
+            self.assertEqual(staticfiles_storage.stored_name("core/css/base.css"), "core/css/base.css")
+            self.assertContains(self.client.get(reverse("about")), 'src="/static/core/images/logo.png"')
+
+            # a deploy that skipped collectstatic fails loudly instead of serving unhashed URLs
+            with mock.patch("core.storage._plain_names_allowed", return_value=False):
+                with self.assertRaisesMessage(ValueError, "Missing staticfiles manifest entry"):
+                    staticfiles_storage.stored_name("core/css/base.css")
+
+
+class PageAssetTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.bundle_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.bundle_dir, ignore_errors=True)
+        patcher = mock.patch.object(assets, "BUNDLE_DIR", self.bundle_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_minify_css(self):
+        css = ('/* header */\n.a  >  .b , .c:hover {\n  color : red ;\n  content: "x  ;  y";\n}\n'
+               '@media (max-width: 600px) and (min-width: 1px) {\n  .d { margin: 0 auto !important; }\n}\n')
+        self.assertEqual(
+            assets.minify_css(css),
+            '.a>.b,.c:hover{color:red;content:"x  ;  y"}'
+            '@media (max-width: 600px) and (min-width: 1px){.d{margin:0 auto!important}}',
+        )
+
+    def test_minify_css_keeps_descendant_pseudo_classes(self):
+        # `.a :hover` is any hovered descendant of .a, `.a:hover` is .a itself
+        css = ".a :hover { color: red }\n.a > :first-child , .b\n::before { margin : 0 }\n"
+        self.assertEqual(assets.minify_css(css), ".a :hover{color:red}.a>:first-child,.b ::before{margin:0}")
+        self.assertEqual(assets.minify_css("@media print { .a :hover { color : red } }"),
+                         "@media print{.a :hover{color:red}}")
+
+    def test_minify_js_keeps_literals_and_line_breaks(self):
+        js = (
+            "// header\n"
+            "const total = a / b;  /* ratio */\n"
+            "const re = /[/*]+\\//g;\n"
+            "const s = '// not a comment', t = `x ${ {a: 1}.a } /* kept */ ${y}`;\n"
+            "let c = a\n"
+            "\n"
+            "    ++b\n"
+            "return - -c\n"
+        )
+        self.assertEqual(assets.minify_js(js), (
+            "const total=a/b;\n"
+            "const re=/[/*]+\\//g;\n"
+            "const s='// not a comment',t=`x ${{a:1}.a} /* kept */ ${y}`;\n"
+            "let c=a\n"
+            "++b\n"
+            "return- -c\n"
+        ))
+
+    def test_bundles_and_critical_css(self):
+        report = assets.build_bundles(self.bundle_dir)
+        self.assertEqual(set(report), set(assets.PAGES))
+        for page, sizes in report.items():
+            self.assertLess(sizes["css"][1], sizes["css"][0], page)
+            self.assertLess(sizes["js"][1], sizes["js"][0], page)
+
+        home_css = (self.bundle_dir / "home.css").read_text()
+        self.assertTrue(home_css.startswith("@import"))  # only honoured before any rule
+        self.assertIn(".site-header{", home_css)
+        home_js = (self.bundle_dir / "home.js").read_text()
+        self.assertIn("getElementById('menuToggle')", home_js)  # base.js first ...
+        self.assertIn("heroCarousel", home_js)  # ... then home.js
+
+        home = (self.bundle_dir / "home.critical.css").read_text()
+        self.assertIn(".hero-heading{", home)
+        self.assertIn(".site-header{", home)
+        self.assertNotIn(".faq-item", home)  # below the fold
+        self.assertNotIn("@import", home)
+        buy = (self.bundle_dir / "buy_bike.critical.css").read_text()
+        self.assertIn(".product-card", buy)
+        self.assertLess(len(buy), len((self.bundle_dir / "buy_bike.css").read_text()))
+
+    @unittest.skipUnless(shutil.which("node"), "syntax check needs node")
+    def test_js_bundles_parse(self):
+        import subprocess
+
+        assets.build_bundles(self.bundle_dir)
+        for path in self.bundle_dir.glob("*.js"):
+            result = subprocess.run(["node", "--check", str(path)], capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, f"{path.name}: {result.stderr}")
+
+    def test_pages_link_assets_in_head(self):
+        response = self.client.get(reverse("home"))
+        head, body = response.content.decode().split("<body", 1)
+        self.assertIn(staticfiles_storage.url("core/css/home.css"), head)
+        self.assertIn(f'<script defer src="{staticfiles_storage.url("core/js/base.js")}">', head)
+        self.assertNotIn('rel="stylesheet"', body)
+        self.assertNotIn("<script", body)
+
+    def test_built_pages_use_one_bundle_and_inline_critical_css(self):
+        assets.build_bundles(self.bundle_dir)
+        head = self.client.get(reverse("home")).content.decode().split("<body", 1)[0]
+        self.assertIn("<style>", head)
+        self.assertIn(".hero-heading{", head)
+        self.assertIn(f'rel="preload" as="style" href="{staticfiles_storage.url("core/bundles/home.css")}"', head)
+        self.assertIn(f'<script defer src="{staticfiles_storage.url("core/bundles/home.js")}">', head)
+        self.assertNotIn("core/css/", head)
+
+        head = self.client.get(reverse("about")).content.decode().split("<body", 1)[0]
+        self.assertNotIn("<style>", head)
+        self.assertIn(f'<link rel="stylesheet" href="{staticfiles_storage.url("core/bundles/about.css")}">', head)
@@ -0,0 +1,113 @@
+# core/throttle.py
+"""
+Sliding-window rate limits kept in the Django cache.
+
+login_view checks every POST against two limits in settings.LOGIN_THROTTLE before
+any password is hashed: one per client IP and one per identifier (username / email).
+Over either limit the view answers 429 with Retry-After, so a credential-stuffing
+burst costs a few cache operations per request instead of a PBKDF2 run.
+
+The client IP is REMOTE_ADDR unless settings.LOGIN_THROTTLE_PROXIES says how many
+reverse proxies / load balancers sit in front of the app. Each appends the address
+it saw to X-Forwarded-For, so the client is the entry that many places from the
+right. Leftmost entries are whatever the client sent and are never trusted. Behind
+a proxy with the setting left at 0, every visitor shares the proxy's address and
+one attacker can use up the IP limit for all of them.
+
+Each window is an approximate sliding window built from two fixed buckets:
+
+    count = previous_bucket * (1 - elapsed fraction of the current bucket) + current_bucket
+
+Buckets are bumped with cache.incr(), which is atomic on Redis / Memcached (and on
+LocMemCache, per process). Allowed / blocked totals are kept in the cache too; see
+throttle_stats() and the staff-only login_throttle_stats view.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = "core:throttle"
+DEFAULT_LOGIN_THROTTLE = {
+    # name -> (attempts, window seconds)
+    'ip': (30, 300),
+    'identifier': (10, 300),
+}
+STATS = ('allowed', 'blocked_ip', 'blocked_identifier')
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # first hit in this bucket; add() loses if another request just created it
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+class SlidingWindowLimiter:
+    def __init__(self, name, limit, window):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    def _key(self, value, bucket):
+        digest = hashlib.sha1(value.encode()).hexdigest()  # any identifier makes a safe cache key
+        return f"{KEY_PREFIX}:{self.name}:{digest}:{bucket}"
+
+    def hit(self, value, now=None):
+        """Count one attempt for `value`. Returns 0 if allowed, else seconds until it may retry."""
+        now = time.time() if now is None else now
+        bucket, offset = divmod(now, self.window)
+        current = _incr(self._key(value, int(bucket)), timeout=2 * self.window)
+        previous = cache.get(self._key(value, int(bucket) - 1), 0)
+        if previous * (1 - offset / self.window) + current <= self.limit:
+            return 0
+        return max(1, math.ceil(self.window - offset))
+
+
+def login_limiters():
+    """{'ip' | 'identifier': limiter} from settings.LOGIN_THROTTLE (None or {} turns it off)."""
+    rates = getattr(settings, 'LOGIN_THROTTLE', DEFAULT_LOGIN_THROTTLE) or {}
+    return {name: SlidingWindowLimiter(f"login-{name}", limit, window) for name, (limit, window) in rates.items()}
+
+
+def client_ip(request):
+    """The visitor's address, read through settings.LOGIN_THROTTLE_PROXIES trusted proxies."""
+    proxies = getattr(settings, 'LOGIN_THROTTLE_PROXIES', 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        if len(forwarded) >= proxies and forwarded[-proxies]:
+            return forwarded[-proxies]
+    # no proxy, or the request didn't come through all of them
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def throttle_login(request, identifier):
+    """Count a login attempt; 0 if it may go ahead, else the Retry-After in seconds."""
+    values = {'ip': client_ip(request), 'identifier': identifier.strip().lower()}
+    retry_after, blocked = 0, None
+    for name, limiter in login_limiters().items():
+        wait = limiter.hit(values[name])
+        if wait > retry_after:
+            retry_after, blocked = wait, name
+    _count('allowed' if blocked is None else f"blocked_{blocked}")
+    return retry_after
+
+
+def _count(stat):
+    key = f"{KEY_PREFIX}:stats:{stat}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def throttle_stats():
+    """Login attempts allowed / blocked since the cache was last cleared."""
+    values = cache.get_many([f"{KEY_PREFIX}:stats:{stat}" for stat in STATS])
+    return {stat: values.get(f"{KEY_PREFIX}:stats:{stat}", 0) for stat in STATS}
@@ -8,11 +8,15 @@ urlpatterns = [
     path('contact/submit/', views.contact_submit, name='contact_submit'),
     path('about/', views.about, name='about'),
     path('buy-bike/', views.buy_bike, name='buy-bike'),
+    path('api/bikes/', views.bike_list_api, name='api-bikes'),
     path('bike/<int:pk>/', views.bike_detail, name='bike-detail'),
    path("bike/<int:pk>/payment/", views.bike_payment, name="bike-payment"),
+    path('bike/<int:pk>/book/', views.book_bike, name='book-bike'),
     path('bike/<int:pk>/book-test-ride/', views.book_test_ride, name='book-test-ride'),
     path('accounts/login/', views.login_view, name='login'),
     path('accounts/logout/', views.logout_view, name='logout'),
+    path('accounts/login/throttle-stats/', views.login_throttle_stats, name='login-throttle-stats'),
     path('sell-bike/', views.sell_bike_view, name='sell-bike'),
     path('sell-bike/get-price/', views.sell_get_price, name='sell-get-price'),
+    path('sell-bike/bulk-valuation/', views.sell_bulk_valuation, name='sell-bulk-valuation'),
 ]
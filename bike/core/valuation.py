@@ -0,0 +1,108 @@
+# core/valuation.py
+"""
+Sell valuations, one at a time (the sell page) or in bulk (dealer spreadsheets).
+
+Bulk input is a CSV with a header row:
+
+    brand,model,variant,year,kms,owner[,name,phone,notes]
+    Honda,Shine,125CC Split Seat Disc BS6,2019,10001 - 20000,1st Owner
+
+value_rows() validates each row the same way as the get-price endpoint
+(parse_sell_request), then rejects what shouldn't be stored (check_row_values; the
+endpoint keeps its original, looser rules). It works through the file BATCH_SIZE
+rows at a time: every batch is priced with pricing.estimate_many and its
+SellRequests are written with one bulk_create. Rows are yielded as soon as their batch is saved, so the staff endpoint
+and the value_bikes command stream files of any length in constant memory.
+"""
+import csv
+import itertools
+
+from django.utils import timezone
+
+from .models import SellRequest
+from .pricing import estimate_many
+
+REQUIRED_FIELDS = ('brand', 'model', 'variant', 'year', 'kms', 'owner')
+OPTIONAL_FIELDS = ('name', 'phone', 'notes')
+OUTPUT_FIELDS = REQUIRED_FIELDS + OPTIONAL_FIELDS + ('estimated_price', 'sell_request_id', 'error')
+BATCH_SIZE = 500
+MIN_YEAR = 1900
+
+# payload key -> SellRequest field, for the length checks
+COLUMN_FIELDS = {'brand': 'brand', 'model': 'model', 'variant': 'variant', 'kms': 'kms_range',
+                 'owner': 'owner', 'name': 'name', 'phone': 'phone'}
+
+
+def parse_sell_request(data):
+    """(values, error) for a POST or CSV row; values are stripped and 'year' is an int when valid."""
+    values = {key: (data.get(key) or '').strip() for key in REQUIRED_FIELDS + OPTIONAL_FIELDS}
+    if not all(values[key] for key in REQUIRED_FIELDS):
+        return values, 'Missing required fields'
+    try:
+        values['year'] = int(values['year'])
+    except ValueError:
+        return values, 'Invalid year'
+    return values, None
+
+
+def check_row_values(values):
+    """Error for parsed bulk row values that shouldn't be stored as a SellRequest, or None."""
+    # also keeps estimate_many's int64 year array from overflowing on a typo'd row
+    if not MIN_YEAR <= values['year'] <= timezone.now().year + 1:
+        return 'Invalid year'
+    for key, field in COLUMN_FIELDS.items():
+        if len(values[key]) > SellRequest._meta.get_field(field).max_length:
+            return f'Value too long: {key}'
+    return None
+
+
+def _parse_row(row):
+    values, error = parse_sell_request(row)
+    return values, error or check_row_values(values)
+
+
+def sell_request(values, price, user=None):
+    return SellRequest(
+        user=user, brand=values['brand'], model=values['model'], variant=values['variant'],
+        year=values['year'], kms_range=values['kms'], owner=values['owner'], estimated_price=price,
+        name=values['name'], phone=values['phone'], notes=values['notes'],
+    )
+
+
+def value_rows(rows, user=None, save=True, batch_size=BATCH_SIZE):
+    """Yield an OUTPUT_FIELDS dict per input row; invalid rows get an error and no SellRequest."""
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        parsed = [_parse_row(row) for row in batch]
+        valid = [values for values, error in parsed if error is None]
+        prices = estimate_many((v['brand'], v['variant'], v['year'], v['kms'], v['owner']) for v in valid)
+        requests = [sell_request(values, price, user) for values, price in zip(valid, prices.tolist())]
+        if save and requests:
+            SellRequest.objects.bulk_create(requests)
+
+        saved = iter(requests)
+        for values, error in parsed:
+            out = dict(values, estimated_price='', sell_request_id='', error=error or '')
+            if error is None:
+                sr = next(saved)
+                out.update(estimated_price=sr.estimated_price, sell_request_id=sr.pk or '')
+            yield out
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def valuation_csv(rows):
+    """CSV lines (header first) for value_rows() output."""
+    writer = csv.DictWriter(_Echo(), OUTPUT_FIELDS, extrasaction='ignore')
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def missing_columns(fieldnames):
+    return [field for field in REQUIRED_FIELDS if field not in (fieldnames or ())]